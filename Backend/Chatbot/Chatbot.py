@@ -1,5 +1,6 @@
 import os
 import json
+import time
 import asyncio
 from typing import Any, Dict, List
 import google.generativeai as genai
@@ -14,12 +15,23 @@ if not API_KEY:
 genai.configure(api_key=API_KEY)
 model = genai.GenerativeModel("gemini-2.5-flash-lite")
 
-MAX_MESSAGES = 10
 CONVERSATION_LOG = "conversation_log.json"
 
-# ---- Seed with system prompt ----
+# ---- Seed every session with the system prompt (one shared copy) ----
 from .prompts import system_prompt
-messages = [{"role": "model", "parts": [{"text": system_prompt}]}]
+from .session_store import session_store
+from .stream_parser import OutputStepParser, plan_round, reply_events
+from Master_LLM.llm_client import LLMClient, LLMTimeoutError, LLMOverloadedError
+from .tool_runner import tool_runner, action_call
+from .response_cache import response_cache
+SYSTEM_MESSAGE = {"role": "model", "parts": [{"text": system_prompt}]}
+
+# Dedicated, bounded pool for Gemini calls (keeps them off the event loop)
+chat_llm = LLMClient("chatbot")
+# Model responses per turn: tool rounds plus the final answer
+MAX_AGENT_ROUNDS = int(os.getenv("CHAT_MAX_AGENT_ROUNDS", "4"))
+# Deadline for a whole turn: every round may use a full model call
+TURN_TIMEOUT_SECONDS = chat_llm.timeout * MAX_AGENT_ROUNDS
 
 
 # ---------------- Helpers ----------------
@@ -36,77 +48,140 @@ def log_message(level: str, message: str):
     print(f"{prefix} {message}")
 
 
-def trim_history(msgs, max_len=MAX_MESSAGES):
-    if len(msgs) <= max_len:
-        return msgs
-    return [msgs[0]] + msgs[-(max_len - 1):]
-
-
 # def append_to_conversation_log(user_query, assistant_response):
 #     # Removed file write / JSON dump
 #     log_message("info", f"User: {user_query}")
 #     log_message("info", f"Assistant: {assistant_response}")
 
 
-def extract_all_json(text: str) -> List[Dict[str, Any]]:
-    results = []
-    s = text
-    start = None
-    depth = 0
-    for i, ch in enumerate(s):
-        if ch == "{":
-            if depth == 0:
-                start = i
-            depth += 1
-        elif ch == "}":
-            depth -= 1
-            if depth == 0 and start is not None:
-                candidate = s[start:i+1]
-                try:
-                    results.append(json.loads(candidate))
-                except Exception:
-                    pass
-                start = None
-    return results
-
-
-def process_user_query(user_query: str) -> Dict[str, Any]:
-    global messages
-    chat = model.start_chat(history=messages)
-
-    messages.append({"role": "user", "parts": [{"text": user_query}]})
-    messages = trim_history(messages)
+def process_user_query(user_query: str, user_id: str = "default") -> Dict[str, Any]:
+    session = session_store.get(user_id)
+    cached = response_cache.lookup(user_query)
+    if cached is not None:
+        session_store.record_turn(session, user_query, cached)
+        return {"final": cached}
+    return _process_turn(session, user_query)
 
-    try:
-        resp = chat.send_message(user_query)
-    except Exception as e:
-        return {"final": f"❌ Gemini API error: {e}"}
 
-    raw = resp.text.strip()
-    steps = extract_all_json(raw)
+def _observation_message(observations: List[Dict[str, Any]], round_no: int) -> str:
+    """Tool results sent back to the model; the last allowed round asks for the answer."""
+    message = json.dumps(observations, ensure_ascii=False)
+    if round_no + 2 >= MAX_AGENT_ROUNDS:
+        message += "\nNo more tools can be run. Reply now with the final output step."
+    return message
 
-    reply = None
 
-    step_handlers = {
-        "output": lambda step: step.get("content") or step.get("output"),
-        "ask_user": lambda step: f"❓ {step.get('question')}",
-    }
+def _log_actions(actions: List[Dict[str, Any]]):
+    calls = ", ".join(f"{name}({tool_input!r})" for name, tool_input in map(action_call, actions))
+    log_message("info", f"Running tools: {calls}")
 
-    for step in steps:
-        stype = (step.get("step") or "").lower()
-        if stype == "output" and not reply:  # first valid output wins
-            reply = step_handlers["output"](step)
-        elif stype == "ask_user" and reply is None:  # only if no output yet
-            reply = step_handlers["ask_user"](step)
 
-    if not reply:
-        reply = raw
+def _process_turn(session, user_query: str) -> Dict[str, Any]:
+    start = time.perf_counter()
+    chat = model.start_chat(history=session.history(SYSTEM_MESSAGE))
+    message = user_query
+    seen = {}   # (tool, input) -> result, reused if the model asks again this turn
+    reply = None
 
-    messages.append({"role": "model", "parts": [{"text": reply}]})
-    messages = trim_history(messages)
+    for round_no in range(MAX_AGENT_ROUNDS):
+        try:
+            resp = chat.send_message(message, request_options={"timeout": chat_llm.timeout})
+        except Exception as e:
+            return {"final": f"❌ Gemini API error: {e}"}
+
+        actions, reply = plan_round(resp.text, final_round=round_no == MAX_AGENT_ROUNDS - 1)
+        if not actions:
+            break
+        _log_actions(actions)
+        message = _observation_message(tool_runner.run(actions, seen), round_no)
+
+    # Only the exchange itself is kept; tool rounds are not replayed next turn
+    session_store.record_turn(session, user_query, reply)
+    response_cache.store(user_query, reply, seen, (time.perf_counter() - start) * 1000)
     #append_to_conversation_log(user_query, reply)
 
     return {"final": reply}
+
+
+# ---------------- Streaming ----------------
+def _chunk_text(chunk) -> str:
+    # Chunks without text parts (e.g. safety metadata) raise on .text
+    try:
+        return chunk.text
+    except ValueError:
+        return ""
+
+
+def process_user_query_stream(user_query: str, user_id: str = "default"):
+    """
+    Streaming process_user_query. Runs the same tool loop and picks the reply
+    with the same plan_round(). Yields ("delta", text) as a reply arrives,
+    ("reset", "") when text already sent turns out not to be the reply (the
+    response also asked for tools, or its reply differs from the preview),
+    ("tools", [names]) before each tool round, then ("done", reply) or
+    ("error", message).
+    """
+    session = session_store.get(user_id)
+    cached = response_cache.lookup(user_query)
+    if cached is not None:
+        session_store.record_turn(session, user_query, cached)
+        yield "delta", cached
+        yield "done", cached
+        return
+
+    start = time.perf_counter()
+    chat = model.start_chat(history=session.history(SYSTEM_MESSAGE))
+    message = user_query
+    seen = {}
+
+    for round_no in range(MAX_AGENT_ROUNDS):
+        parser = OutputStepParser()
+        try:
+            stream = chat.send_message(message, stream=True, request_options={"timeout": chat_llm.timeout})
+            for chunk in stream:
+                delta = parser.feed(_chunk_text(chunk))
+                if delta:
+                    yield "delta", delta
+        except Exception as e:
+            log_message("error", f"Gemini stream failed: {e}")
+            yield "error", f"❌ Gemini API error: {e}"
+            return
+
+        actions, reply = plan_round("".join(parser.raw), final_round=round_no == MAX_AGENT_ROUNDS - 1)
+        shown = parser.reply
+        if not actions:
+            break
+        if shown:
+            yield "reset", ""
+        _log_actions(actions)
+        yield "tools", [action_call(step)[0] for step in actions]
+        message = _observation_message(tool_runner.run(actions, seen), round_no)
+
+    yield from reply_events(shown, reply)
+    session_store.record_turn(session, user_query, reply)
+    response_cache.store(user_query, reply, seen, (time.perf_counter() - start) * 1000)
+    yield "done", reply
+
+
+# ---------------- Async entry points (used by the API routes) ----------------
+async def process_user_query_async(user_query: str, user_id: str = "default") -> Dict[str, Any]:
+    """process_user_query on chat_llm's pool, with its concurrency limit and deadline."""
+    try:
+        return await chat_llm.run(process_user_query, user_query, user_id, timeout=TURN_TIMEOUT_SECONDS)
+    except (LLMTimeoutError, LLMOverloadedError) as e:
+        log_message("warn", str(e))
+        return {"final": f"❌ Assistant is busy, please try again: {e}"}
+
+
+async def process_user_query_stream_async(user_query: str, user_id: str = "default"):
+    """process_user_query_stream as an async iterator, run on chat_llm's pool."""
+    try:
+        async for event in chat_llm.stream(process_user_query_stream, user_query, user_id,
+                                           timeout=TURN_TIMEOUT_SECONDS):
+            yield event
+    except (LLMTimeoutError, LLMOverloadedError) as e:
+        log_message("warn", str(e))
+        yield "error", f"❌ Assistant is busy, please try again: {e}"
              #"Malanjkhand Copper Mine Madhya Pradesh",
             #"Tummalapalle Uranium Mine Andhra Pradesh",
             #"Khetri Copper Mine Rajasthan",
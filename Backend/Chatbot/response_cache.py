@@ -0,0 +1,234 @@
+import os
+import re
+import time
+import threading
+from collections import OrderedDict
+
+from Realtime_API.Realtime_API import MINE_MATCH_RADIUS_KM
+
+CHAT_CACHE_MAX_ENTRIES = int(os.getenv("CHAT_CACHE_MAX_ENTRIES", "512"))
+# Trigram similarity of the question wording needed to reuse an answer about the same place
+CHAT_CACHE_SIMILARITY = float(os.getenv("CHAT_CACHE_SIMILARITY", "0.6"))
+# How often each tool's upstream data changes; answers expire at the next update.
+# Tools not listed (get_time) make an answer uncacheable.
+TOOL_REFRESH_SECONDS = {
+    "search_weather_and_soil": 900,   # Open-Meteo current conditions are quarter-hourly
+    "get_weather": 900,
+    "find_nearby_mines": 3600,        # mines.csv, hot-reloaded on change
+}
+
+# Words that carry no meaning for the cache key
+_FILLER = {
+    "a", "an", "the", "of", "for", "at", "in", "on", "to", "is", "are", "was", "what", "whats", "how",
+    "please", "pls", "me", "tell", "show", "give", "get", "can", "could", "you", "i", "we", "about",
+    "current", "currently", "now", "today", "right", "there", "it", "its", "and", "like", "check",
+}
+# Words that name the kind of site rather than which one
+_SITE_WORDS = {
+    "mine", "mines", "mining", "pit", "open", "cast", "opencast", "ocp", "oc", "underground", "ug",
+    "project", "colliery", "quarry", "site", "coal", "iron", "copper", "ore", "uranium", "bauxite", "limestone",
+    "area", "region",
+}
+# Question words folded onto one canonical intent each
+_INTENTS = {
+    "status": "status", "environmental": "status", "environment": "status", "condition": "status",
+    "conditions": "status", "report": "status", "update": "status", "details": "status",
+    "info": "status", "information": "status", "overview": "status", "situation": "status",
+    "safe": "safety", "safety": "safety", "unsafe": "safety", "risk": "safety", "risky": "safety",
+    "danger": "safety", "dangerous": "safety", "hazard": "safety", "hazards": "safety",
+    "weather": "weather", "temperature": "weather", "temp": "weather", "wind": "weather",
+    "rain": "weather", "rainfall": "weather", "humidity": "weather", "forecast": "weather",
+    "soil": "soil", "ndvi": "vegetation", "vegetation": "vegetation", "greenery": "vegetation",
+    "coordinates": "location", "location": "location", "where": "location", "nearby": "nearby",
+    "near": "nearby", "nearest": "nearby",
+}
+# Decimal numbers (coordinates) stay one token: "23.456" must not become "23" and "456"
+_WORD = re.compile(r"-?\d+\.\d+|[a-z0-9]+")
+_UNCACHEABLE_PREFIXES = ("❌", "❓", "⚠️")
+# Sections of a search_weather_and_soil result; each is None when its fetch failed
+_WEATHER_AND_SOIL_PARTS = ("soil", "weather", "ndvi")
+
+
+def parse_query(text: str):
+    """
+    (place tokens, intent text) of a question; place tokens are what the answer
+    is about. Names are order-free; coordinates keep their order (lat, lon).
+    """
+    place, coords, intent = [], [], set()
+    for word in _WORD.findall((text or "").lower().replace("'", "")):
+        if word in _FILLER:
+            continue
+        if word in _INTENTS:
+            intent.add(_INTENTS[word])
+        elif word in _SITE_WORDS:
+            continue
+        elif "." in word:
+            coords.append(word)
+        elif word.isdigit() and len(word) < 3:
+            continue
+        else:
+            place.append(word)
+    return tuple(sorted(set(place))) + tuple(coords), " ".join(sorted(intent))
+
+
+def trigrams(text: str) -> frozenset:
+    padded = f"  {text} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def similarity(a: frozenset, b: frozenset) -> float:
+    if a == b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def resolve_subject(tool_results: dict):
+    """
+    What a turn's data was about, from the tools it ran: the registered mine
+    (or surveyed polygon) behind each place lookup. None if the turn used no
+    cacheable data.
+    """
+    subject = set()
+    for (name, tool_input), result in tool_results.items():
+        if name not in TOOL_REFRESH_SECONDS:
+            return None
+        if isinstance(result, dict) and result.get("error"):
+            return None
+        if name == "search_weather_and_soil":
+            if any(result.get(part) is None for part in _WEATHER_AND_SOIL_PARTS):
+                # A part failed upstream (or had no data): the answer is incomplete
+                return None
+            nearby = result.get("registered_mines_nearby") or []
+            if nearby and (nearby[0].get("distance_km") or 0) <= MINE_MATCH_RADIUS_KM:
+                subject.add(("mine", nearby[0]["id"]))
+            else:
+                subject.add(("polygon", result.get("polygon_id")))
+        elif name == "find_nearby_mines":
+            subject.add(("point", result.get("latitude"), result.get("longitude"), result.get("radius_km")))
+        else:
+            subject.add((name, " ".join(tool_input.lower().split())))
+    return tuple(sorted(subject, key=repr)) if subject else None
+
+
+def data_expiry(tool_names, now: float) -> float:
+    """Epoch seconds at which the first of the tools' sources publishes newer data."""
+    return min((now // TOOL_REFRESH_SECONDS[n] + 1) * TOOL_REFRESH_SECONDS[n] for n in tool_names)
+
+
+class _Entry:
+    __slots__ = ("reply", "intent", "grams", "expires_at", "cost_ms", "hits")
+
+    def __init__(self, reply: str, intent: str, expires_at: float, cost_ms: float):
+        self.reply = reply
+        self.intent = intent
+        self.grams = trigrams(intent)
+        self.expires_at = expires_at
+        self.cost_ms = cost_ms
+        self.hits = 0
+
+
+# ---------------- Response Cache ----------------
+class ResponseCache:
+    """
+    Chatbot answers reused for repeated questions about the same place.
+    A question is split into place words ("gevra") and intent ("status");
+    the place words map to the mine the tools resolved them to last time,
+    and a cached answer for that mine is reused when the intent is at least
+    `threshold` similar. Entries expire when the weather/soil data behind
+    them is next updated upstream; the cache is an LRU of max_entries.
+    """
+
+    def __init__(self, max_entries: int = CHAT_CACHE_MAX_ENTRIES, threshold: float = CHAT_CACHE_SIMILARITY):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # (subject, intent) -> _Entry, least recently used first
+        self._by_subject = {}           # subject -> {intent: _Entry}
+        self._aliases = OrderedDict()   # place tokens -> subject
+        self.counters = {"lookups": 0, "hits": 0, "misses": 0, "no_place": 0, "stored": 0,
+                         "not_stored": 0, "expired": 0, "evicted": 0}
+        self.saved_ms = 0.0
+
+    def _drop_locked(self, key):
+        entry = self._entries.pop(key)
+        subject, intent = key
+        bucket = self._by_subject.get(subject)
+        if bucket is not None:
+            bucket.pop(intent, None)
+            if not bucket:
+                del self._by_subject[subject]
+        return entry
+
+    def lookup(self, query: str):
+        """A cached reply for this question, or None."""
+        place, intent = parse_query(query)
+        now = time.time()
+        with self._lock:
+            self.counters["lookups"] += 1
+            if not place:
+                # "what's the status?" depends on the conversation, not just the words
+                self.counters["no_place"] += 1
+                return None
+            subject = self._aliases.get(place)
+            bucket = self._by_subject.get(subject) if subject is not None else None
+            best, best_score = None, 0.0
+            if bucket:
+                grams = trigrams(intent)
+                for entry_intent, entry in list(bucket.items()):
+                    if entry.expires_at <= now:
+                        self._drop_locked((subject, entry_intent))
+                        self.counters["expired"] += 1
+                        continue
+                    score = similarity(grams, entry.grams)
+                    if score > best_score:
+                        best, best_score = entry, score
+            if best is None or best_score < self.threshold:
+                self.counters["misses"] += 1
+                return None
+            self._entries.move_to_end((subject, best.intent))
+            self._aliases.move_to_end(place)
+            best.hits += 1
+            self.counters["hits"] += 1
+            self.saved_ms += best.cost_ms
+            return best.reply
+
+    def store(self, query: str, reply: str, tool_results: dict, cost_ms: float):
+        """Keep a finished turn's reply if it was built from cacheable tool data."""
+        place, intent = parse_query(query)
+        subject = resolve_subject(tool_results) if tool_results else None
+        if not place or subject is None or not reply or reply.startswith(_UNCACHEABLE_PREFIXES):
+            with self._lock:
+                self.counters["not_stored"] += 1
+            return
+        expires_at = data_expiry({name for name, _ in tool_results}, time.time())
+        with self._lock:
+            key = (subject, intent)
+            if key in self._entries:
+                self._drop_locked(key)
+            entry = _Entry(reply, intent, expires_at, cost_ms)
+            self._entries[key] = entry
+            self._by_subject.setdefault(subject, {})[intent] = entry
+            self._aliases[place] = subject
+            self._aliases.move_to_end(place)
+            self.counters["stored"] += 1
+            while len(self._entries) > self.max_entries:
+                self._drop_locked(next(iter(self._entries)))
+                self.counters["evicted"] += 1
+            while len(self._aliases) > self.max_entries:
+                self._aliases.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.counters["lookups"]
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "places": len(self._aliases),
+                "similarity_threshold": self.threshold,
+                **self.counters,
+                "hit_ratio": round(self.counters["hits"] / lookups, 3) if lookups else None,
+                "saved_ms": round(self.saved_ms, 1),
+            }
+
+
+response_cache = ResponseCache()
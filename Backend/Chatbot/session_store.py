@@ -0,0 +1,203 @@
+import os
+import sys
+import time
+import threading
+from collections import OrderedDict
+
+CHAT_SESSION_SHARDS = int(os.getenv("CHAT_SESSION_SHARDS", "16"))
+CHAT_MAX_SESSIONS = int(os.getenv("CHAT_MAX_SESSIONS", "10000"))
+# Sessions untouched this long are dropped
+CHAT_SESSION_IDLE_TTL_SECONDS = float(os.getenv("CHAT_SESSION_IDLE_TTL_SECONDS", "3600"))
+# Ceiling on the estimated memory held by all histories together
+CHAT_SESSION_MAX_MB = float(os.getenv("CHAT_SESSION_MAX_MB", "256"))
+# History sent to the model per turn (system prompt excluded)
+CHAT_HISTORY_TOKEN_BUDGET = int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", "4000"))
+
+CHARS_PER_TOKEN = 4          # rough average for English text with Gemini/GPT tokenizers
+MESSAGE_OVERHEAD_BYTES = 200  # dicts/lists wrapping each message
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+class _Message:
+    __slots__ = ("role", "text", "tokens", "size")
+
+    def __init__(self, role: str, text: str):
+        self.role = role
+        self.text = text
+        self.tokens = estimate_tokens(text)
+        self.size = sys.getsizeof(text) + MESSAGE_OVERHEAD_BYTES
+
+
+# ---------------- Chat Session ----------------
+class ChatSession:
+    """
+    One user's conversation turns. `lock` guards the message list only:
+    history() copies it and record_turn() appends, so the model and tool
+    calls of a turn run without holding it.
+    """
+
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self.lock = threading.Lock()
+        self.messages = []
+        self.tokens = 0
+        self.size = sys.getsizeof(user_id) + MESSAGE_OVERHEAD_BYTES
+        self.last_used = time.monotonic()
+
+    def history(self, system_message: dict = None) -> list:
+        """Gemini-style history: the (shared) system message, then the turns."""
+        with self.lock:
+            turns = [{"role": m.role, "parts": [{"text": m.text}]} for m in self.messages]
+        return ([system_message] if system_message else []) + turns
+
+    def _append(self, role: str, text: str) -> int:
+        message = _Message(role, text)
+        self.messages.append(message)
+        self.tokens += message.tokens
+        self.size += message.size
+        return message.size
+
+    def _trim(self, token_budget: int) -> int:
+        """Drop the oldest turns until the history fits; the newest message always stays."""
+        freed = 0
+        drop = 0
+        tokens = self.tokens
+        while tokens > token_budget and drop < len(self.messages) - 1:
+            tokens -= self.messages[drop].tokens
+            freed += self.messages[drop].size
+            drop += 1
+        # Never start the history with a model turn
+        while drop < len(self.messages) - 1 and self.messages[drop].role != "user":
+            tokens -= self.messages[drop].tokens
+            freed += self.messages[drop].size
+            drop += 1
+        if drop:
+            del self.messages[:drop]
+            self.tokens = tokens
+            self.size -= freed
+        return drop
+
+
+class _Shard:
+    __slots__ = ("lock", "sessions", "size")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sessions = OrderedDict()   # user_id -> ChatSession, least recently used first
+        self.size = 0
+
+
+# ---------------- Session Store ----------------
+class SessionStore:
+    """
+    Chat sessions keyed by user_id, spread over independently locked shards.
+    Each shard is an LRU with its share of the session count and memory
+    ceiling, and drops sessions idle longer than idle_ttl; histories are
+    trimmed to an estimated token budget on every turn.
+    """
+
+    def __init__(self, shards: int = CHAT_SESSION_SHARDS, max_sessions: int = CHAT_MAX_SESSIONS,
+                 idle_ttl: float = CHAT_SESSION_IDLE_TTL_SECONDS, max_mb: float = CHAT_SESSION_MAX_MB,
+                 token_budget: int = CHAT_HISTORY_TOKEN_BUDGET):
+        self._shards = [_Shard() for _ in range(shards)]
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.token_budget = token_budget
+        self._shard_max_sessions = max(1, max_sessions // shards)
+        self._shard_max_bytes = max(1, self.max_bytes // shards)
+        self.counters = {"created": 0, "resumed": 0, "trimmed_messages": 0,
+                         "evicted_lru": 0, "evicted_idle": 0, "evicted_memory": 0}
+
+    def _shard(self, user_id: str) -> _Shard:
+        return self._shards[hash(user_id) % len(self._shards)]
+
+    def _evict_locked(self, shard: _Shard, keep: ChatSession = None):
+        """Oldest-first: idle sessions, then LRU past the count/memory share."""
+        now = time.monotonic()
+        while shard.sessions:
+            user_id, session = next(iter(shard.sessions.items()))
+            if session is keep:
+                break
+            if now - session.last_used > self.idle_ttl:
+                reason = "evicted_idle"
+            elif len(shard.sessions) > self._shard_max_sessions:
+                reason = "evicted_lru"
+            elif shard.size > self._shard_max_bytes:
+                reason = "evicted_memory"
+            else:
+                break
+            del shard.sessions[user_id]
+            shard.size -= session.size
+            self.counters[reason] += 1
+
+    def get(self, user_id: str) -> ChatSession:
+        """The user's session (created if missing or expired), marked most recently used."""
+        shard = self._shard(user_id)
+        with shard.lock:
+            session = shard.sessions.get(user_id)
+            now = time.monotonic()
+            if session is not None and now - session.last_used > self.idle_ttl:
+                del shard.sessions[user_id]
+                shard.size -= session.size
+                self.counters["evicted_idle"] += 1
+                session = None
+            if session is None:
+                session = ChatSession(user_id)
+                shard.sessions[user_id] = session
+                shard.size += session.size
+                self.counters["created"] += 1
+            else:
+                shard.sessions.move_to_end(user_id)
+                self.counters["resumed"] += 1
+            session.last_used = now
+            self._evict_locked(shard, keep=session)
+        return session
+
+    def record_turn(self, session: ChatSession, user_text: str, model_text: str):
+        """Append a completed exchange, trim to the token budget and enforce the ceilings."""
+        shard = self._shard(session.user_id)
+        # Turns that finish together are recorded one after the other
+        with session.lock, shard.lock:
+            before = session.size
+            session._append("user", user_text)
+            session._append("model", model_text)
+            self.counters["trimmed_messages"] += session._trim(self.token_budget)
+            session.last_used = time.monotonic()
+            current = shard.sessions.get(session.user_id)
+            if current is session:
+                shard.size += session.size - before
+                shard.sessions.move_to_end(session.user_id)
+            elif current is None:
+                # Evicted while the model was answering: keep the conversation
+                shard.sessions[session.user_id] = session
+                shard.size += session.size
+            self._evict_locked(shard, keep=session)
+
+    def clear(self, user_id: str) -> bool:
+        shard = self._shard(user_id)
+        with shard.lock:
+            session = shard.sessions.pop(user_id, None)
+            if session is not None:
+                shard.size -= session.size
+        return session is not None
+
+    def stats(self) -> dict:
+        sessions = sum(len(s.sessions) for s in self._shards)
+        size = sum(s.size for s in self._shards)
+        return {
+            "sessions": sessions,
+            "max_sessions": self.max_sessions,
+            "memory_mb": round(size / 1024 / 1024, 3),
+            "max_memory_mb": round(self.max_bytes / 1024 / 1024, 3),
+            "shards": len(self._shards),
+            "idle_ttl_s": self.idle_ttl,
+            "token_budget": self.token_budget,
+            **self.counters,
+        }
+
+
+session_store = SessionStore()
@@ -0,0 +1,256 @@
+import json
+from typing import Any, Dict, List
+
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f", '"': '"', "\\": "\\", "/": "/"}
+# String values of the output step that carry the user-facing reply
+_REPLY_KEYS = ("content", "output")
+
+
+class _StepState:
+    """Parse state of one top-level JSON object (one agent step)."""
+
+    def __init__(self):
+        self.expect_key = True
+        self.key = None
+        self.step = None
+        self.text = []         # the object's source, parsed whole once it closes
+        self.fields = {}       # depth-1 string values by key
+        self.buffered = None   # reply text seen before "step" said this is the output step
+        self.streaming = False
+
+
+# ---------------- Incremental Step Parser ----------------
+class OutputStepParser:
+    """
+    Fed the model's text as it streams, returns only the user-facing part:
+    the content of the first {"step": "output"} object, decoded and emitted
+    while that string is still arriving. Plain replies (no JSON steps) pass
+    through unchanged. What is streamed is a preview: plan_round() on the
+    whole response decides the reply, as on the non-streaming path.
+
+    Action steps are collected whole in `actions`; once one is seen, the
+    output step of that response is not streamed (it was written before the
+    tool ran).
+    """
+
+    def __init__(self):
+        self.raw = []
+        self.parts = []
+        self.output_seen = False
+        self.actions = []
+        self._mode = None       # None until decided, then "json" or "text"
+        self._lead = ""
+        self._depth = 0
+        self._in_string = False
+        self._string_role = None   # "key", "value" (depth-1 strings) or None (nested)
+        self._string = []
+        self._escape = None        # chars of an escape sequence in progress
+        self._high_surrogate = None
+        self._obj = None
+
+    @property
+    def reply(self) -> str:
+        return "".join(self.parts)
+
+    def _emit(self, text: str, out: list):
+        if text:
+            self.parts.append(text)
+            out.append(text)
+
+    # ---- Feeding ----
+    def feed(self, chunk: str) -> str:
+        """Consume the next piece of model text; returns the new user-facing text."""
+        self.raw.append(chunk)
+        out = []
+        if self._mode is None:
+            self._lead += chunk
+            chunk = self._decide_mode(out)
+            if chunk is None:
+                return ""
+        if self._mode == "text":
+            self._emit(chunk, out)
+        else:
+            for ch in chunk:
+                self._feed_json_char(ch, out)
+        return "".join(out)
+
+    def _decide_mode(self, out: list):
+        """Returns the text to parse once the mode is known, or None to keep waiting."""
+        lead = self._lead.lstrip()
+        if lead.startswith("```"):
+            # Fenced block: decide on what follows the fence line
+            newline = lead.find("\n")
+            if newline < 0:
+                return None
+            lead = lead[newline + 1:].lstrip()
+            if not lead:
+                return None
+        elif not lead or lead in ("`", "``"):
+            return None
+        self._mode = "json" if lead.startswith("{") else "text"
+        self._lead = ""
+        return lead
+
+    def _feed_json_char(self, ch: str, out: list):
+        if self._obj is not None:
+            self._obj.text.append(ch)
+        if self._in_string:
+            self._feed_string_char(ch, out)
+            return
+        if self._depth == 0:
+            # Outside any step (fences, stray text) nothing is user-facing
+            if ch == "{":
+                self._depth = 1
+                self._obj = _StepState()
+                self._obj.text.append(ch)
+            return
+        if ch == '"':
+            self._in_string = True
+            self._string = []
+            if self._depth == 1:
+                self._string_role = "key" if self._obj.expect_key else "value"
+                self._obj.streaming = (
+                    self._string_role == "value" and self._obj.step == "output"
+                    and self._obj.key in _REPLY_KEYS and not self.output_seen
+                    and not self.actions
+                )
+            else:
+                self._string_role = None
+        elif ch in "{[":
+            self._depth += 1
+        elif ch in "}]":
+            self._depth -= 1
+            if self._depth == 0:
+                self._end_step()
+        elif self._depth == 1 and ch == ":":
+            self._obj.expect_key = False
+        elif self._depth == 1 and ch == ",":
+            self._obj.expect_key = True
+
+    def _feed_string_char(self, ch: str, out: list):
+        if self._escape is not None:
+            self._escape.append(ch)
+            if self._escape[0] == "u":
+                if len(self._escape) < 5:
+                    return
+                decoded = self._decode_unicode("".join(self._escape[1:]))
+            else:
+                decoded = _ESCAPES.get(ch, ch)
+            self._escape = None
+            self._string_char(decoded, out)
+        elif ch == "\\":
+            self._escape = []
+        elif ch == '"':
+            self._in_string = False
+            self._end_string(out)
+        else:
+            self._string_char(ch, out)
+
+    def _decode_unicode(self, hex_digits: str) -> str:
+        try:
+            code = int(hex_digits, 16)
+        except ValueError:
+            return ""
+        if 0xD800 <= code < 0xDC00:
+            self._high_surrogate = code
+            return ""
+        if 0xDC00 <= code < 0xE000 and self._high_surrogate is not None:
+            code = 0x10000 + ((self._high_surrogate - 0xD800) << 10) + (code - 0xDC00)
+        self._high_surrogate = None
+        return chr(code)
+
+    def _string_char(self, text: str, out: list):
+        if self._string_role is None or not text:
+            return
+        if self._obj.streaming:
+            self._emit(text, out)
+        self._string.append(text)
+
+    def _end_string(self, out: list):
+        if self._string_role is None:
+            return
+        text = "".join(self._string)
+        obj = self._obj
+        if self._string_role == "key":
+            obj.key = text
+            return
+        obj.fields[obj.key] = text
+        if obj.streaming:
+            obj.streaming = False
+            self.output_seen = self.output_seen or bool(text)
+        elif obj.key == "step":
+            obj.step = text.lower()
+            if obj.step == "output" and obj.buffered and not self.output_seen and not self.actions:
+                # "content" came before "step": release it now
+                self._emit(obj.buffered, out)
+                self.output_seen = True
+        elif obj.key in _REPLY_KEYS and obj.step is None and obj.buffered is None:
+            obj.buffered = text
+
+    def _end_step(self):
+        obj = self._obj
+        if obj is not None and obj.step == "action":
+            try:
+                step = json.loads("".join(obj.text))
+            except ValueError:
+                step = obj.fields
+            # Nested values (e.g. a dict "input") are kept as written
+            self.actions.append(step if isinstance(step, dict) else obj.fields)
+        self._obj = None
+
+
+# ---------------- Step Selection (shared by /chat and /chat/stream) ----------------
+def extract_all_json(text: str) -> List[Dict[str, Any]]:
+    results = []
+    s = text
+    start = None
+    depth = 0
+    for i, ch in enumerate(s):
+        if ch == "{":
+            if depth == 0:
+                start = i
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0 and start is not None:
+                candidate = s[start:i+1]
+                try:
+                    results.append(json.loads(candidate))
+                except Exception:
+                    pass
+                start = None
+    return results
+
+
+def select_reply(steps: List[Dict[str, Any]]):
+    """First output step wins; an ask_user question only if there is no output."""
+    reply = None
+    for step in steps:
+        stype = (step.get("step") or "").lower()
+        if stype == "output" and not reply:
+            reply = step.get("content") or step.get("output")
+        elif stype == "ask_user" and reply is None:
+            reply = f"❓ {step.get('question')}"
+    return reply
+
+
+def plan_round(raw: str, final_round: bool):
+    """
+    (actions, reply) for one complete model response: the tools to run next,
+    or the reply when there are none or no more rounds are allowed.
+    Output written alongside an action is the model's guess, so the tools run instead.
+    """
+    raw = raw.strip()
+    steps = extract_all_json(raw)
+    actions = [s for s in steps if (s.get("step") or "").lower() == "action"]
+    if actions and not final_round:
+        return actions, None
+    return [], select_reply(steps) or raw
+
+
+def reply_events(shown: str, reply: str) -> list:
+    """Stream events that turn the preview already sent (`shown`) into `reply`."""
+    if not reply.startswith(shown):
+        return [("reset", ""), ("delta", reply)] if reply else [("reset", "")]
+    rest = reply[len(shown):]
+    return [("delta", rest)] if rest else []
@@ -0,0 +1,116 @@
+import os
+import json
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from .tools import available_tools
+
+# Tool calls running at once across all chats; the rest queue on the pool
+CHAT_TOOL_WORKERS = int(os.getenv("CHAT_TOOL_WORKERS", "16"))
+# Deadline for all the tools requested in one model response
+CHAT_TOOL_TIMEOUT_SECONDS = float(os.getenv("CHAT_TOOL_TIMEOUT_SECONDS", "30"))
+# Longest tool result fed back to the model (keeps the next prompt small)
+OBSERVATION_MAX_CHARS = int(os.getenv("CHAT_OBSERVATION_MAX_CHARS", "6000"))
+LATENCY_WINDOW = 500  # recent rounds kept for percentiles
+
+
+def _percentile(values, q: float):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 2)
+
+
+def action_call(step: dict):
+    """(tool name, input string) of an action step; dict inputs are flattened."""
+    name = step.get("function") or step.get("tool") or ""
+    value = step.get("input", step.get("tool_input"))
+    if isinstance(value, dict):
+        value = ", ".join(str(v) for v in value.values())
+    return str(name), "" if value is None else str(value)
+
+
+def _clip(output) -> str:
+    text = output if isinstance(output, str) else json.dumps(output, default=str)
+    if len(text) > OBSERVATION_MAX_CHARS:
+        text = text[:OBSERVATION_MAX_CHARS] + " …[truncated]"
+    return text
+
+
+# ---------------- Tool Runner ----------------
+class ToolRunner:
+    """
+    Executes the action steps of one model response. Independent calls run
+    concurrently on a shared bounded pool, so a response asking for several
+    tools costs one round of tool latency; results come back as observe steps
+    in the order the model asked for them.
+    """
+
+    def __init__(self, tools: dict = available_tools, max_workers: int = CHAT_TOOL_WORKERS,
+                 timeout: float = CHAT_TOOL_TIMEOUT_SECONDS):
+        self.tools = tools
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="chat-tool")
+        self.counters = {"rounds": 0, "calls": 0, "parallel_calls": 0, "reused": 0,
+                         "unknown_tool": 0, "errors": 0, "timeouts": 0}
+        self._round_ms = deque(maxlen=LATENCY_WINDOW)
+
+    def _call(self, name: str, tool_input: str):
+        try:
+            return self.tools[name]["fn"](tool_input)
+        except Exception as e:
+            self.counters["errors"] += 1
+            print(f"⚠️ Tool {name}({tool_input!r}) failed: {e}")
+            return {"error": f"{name} failed: {e}"}
+
+    def run(self, actions: list, seen: dict = None) -> list:
+        """
+        Observe steps for the given action steps. `seen` maps (name, input) to
+        results already fetched this turn, so repeated requests are not re-run.
+        """
+        start = time.perf_counter()
+        deadline = time.monotonic() + self.timeout
+        seen = {} if seen is None else seen
+        calls = [action_call(step) for step in actions]
+
+        futures = {}
+        for call in dict.fromkeys(calls):
+            name, tool_input = call
+            if call in seen:
+                self.counters["reused"] += 1
+            elif name not in self.tools:
+                self.counters["unknown_tool"] += 1
+                seen[call] = {"error": f"Unknown tool '{name}'. Available: {', '.join(self.tools)}"}
+            else:
+                futures[call] = self._pool.submit(self._call, name, tool_input)
+        self.counters["calls"] += len(futures)
+        if len(futures) > 1:
+            self.counters["parallel_calls"] += len(futures)
+
+        for call, future in futures.items():
+            try:
+                seen[call] = future.result(timeout=max(deadline - time.monotonic(), 0.001))
+            except FutureTimeout:
+                # Left to finish in the background; the model is told it timed out
+                self.counters["timeouts"] += 1
+                seen[call] = {"error": f"{call[0]} timed out after {self.timeout}s"}
+
+        self.counters["rounds"] += 1
+        self._round_ms.append((time.perf_counter() - start) * 1000)
+        return [{"step": "observe", "function": name, "input": tool_input, "output": _clip(seen[(name, tool_input)])}
+                for name, tool_input in calls]
+
+    def stats(self) -> dict:
+        rounds = list(self._round_ms)
+        return {
+            "max_workers": self.max_workers,
+            "timeout_s": self.timeout,
+            **self.counters,
+            "round_ms_p50": _percentile(rounds, 0.5),
+            "round_ms_p95": _percentile(rounds, 0.95),
+        }
+
+
+tool_runner = ToolRunner()
@@ -9,11 +9,17 @@ import requests
 import json
 import re
 
+from Realtime_API.Realtime_API import find_mines_near
+from Realtime_API.single_flight import SingleFlight
+
 load_dotenv()
 
 AGRO_API_KEY = os.getenv("AGRO_API_KEY")
 AGRO_BASE_URL = "https://api.agromonitoring.com/agro/1.0"
 
+# Concurrent tool calls for the same place share one upstream request
+tools_flight = SingleFlight("chatbot_tools")
+
 def extract_coordinates(text: str):
     """
     Extract latitude and longitude from a text string.
@@ -46,6 +52,7 @@ def extract_coordinates(text: str):
 def kelvin_to_celsius(kelvin):
     return round(kelvin - 273.15, 2)
 
+@tools_flight.wrap
 def get_existing_polygons():
     url = f"{AGRO_BASE_URL}/polygons?appid={AGRO_API_KEY}"
     r = requests.get(url)
@@ -74,6 +81,7 @@ def create_polygon(lat, lon, name="my_polygon"):
     r.raise_for_status()
     return r.json()
 
+@tools_flight.wrap
 def get_or_create_polygon(lat, lon, name):
     polygons = get_existing_polygons()
     for poly in polygons:
@@ -81,6 +89,7 @@ def get_or_create_polygon(lat, lon, name):
             return poly
     return create_polygon(lat, lon, name)
 
+@tools_flight.wrap
 def fetch_soil_data(polygon_id):
     url = f"{AGRO_BASE_URL}/soil?polyid={polygon_id}&appid={AGRO_API_KEY}"
     r = requests.get(url)
@@ -93,6 +102,7 @@ def fetch_soil_data(polygon_id):
         "timestamp": datetime.fromtimestamp(data.get("ts", 0), tz=timezone.utc).isoformat(),
     }
 
+@tools_flight.wrap
 def fetch_weather_openmeteo(lat, lon, hours=24):
     url = "https://api.open-meteo.com/v1/forecast"
     params = {
@@ -125,6 +135,7 @@ def fetch_weather_openmeteo(lat, lon, hours=24):
         })
     return result
 
+@tools_flight.wrap
 def fetch_ndvi(polygon_id):
     end = int(time.time())
     start = end - 30 * 24 * 3600  # last 30 days
@@ -170,18 +181,20 @@ def weatherandsoil_search(lat, lon, name):
     return result
 
 
+@tools_flight.wrap
 def get_weather(city: str):
     city = (city or "").strip()
     if not city:
-        return "Please provide a city."
+        return {"error": "Please provide a city."}
     url = f"https://wttr.in/{city}?format=%C+%t"
     try:
         r = requests.get(url, timeout=10)
         if r.status_code == 200:
             return f"The weather in {city} is {r.text}."
-        return f"Weather lookup failed with status {r.status_code}."
+        # Failures are reported as {"error": ...} like the other tools, so they are never cached
+        return {"error": f"Weather lookup failed with status {r.status_code}."}
     except requests.RequestException as e:
-        return f"Weather lookup error: {e}"
+        return {"error": f"Weather lookup error: {e}"}
 
 
 def get_time(place_or_tz: str) -> str:
@@ -208,6 +221,7 @@ TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
 if not TAVILY_API_KEY:
     raise ValueError("TAVILY_API_KEY is not set in the environment")
 
+@tools_flight.wrap
 def search_tavily(query):
     """Search the web using Tavily API."""
     url = "https://api.tavily.com/search"
@@ -261,7 +275,36 @@ def search_weather_and_soil(place_name: str):
     if lat is None or lon is None:
         return {"error": "No coordinates found for the place."}
 
-    return weatherandsoil_search(lat, lon, place_name)
+    result = weatherandsoil_search(lat, lon, place_name)
+    result["registered_mines_nearby"] = [
+        _mine_summary(mine) for mine in find_mines_near(lat, lon, NEARBY_MINES_RADIUS_KM)[:3]
+    ]
+    return result
+
+# --- Registered mines (spatial index lookup) ---
+NEARBY_MINES_RADIUS_KM = 50
+MINE_SUMMARY_FIELDS = [
+    "id", "latitude", "longitude", "distance_km", "area_acres", "height_m", "cohesion_kpa",
+    "friction_angle_deg", "unit_weight_kn_m3", "slope_angle_deg", "water_depth_ratio", "fos",
+]
+
+def _mine_summary(mine):
+    return {key: mine.get(key) for key in MINE_SUMMARY_FIELDS}
+
+def find_nearby_mines(location: str):
+    """Registered mines near "lat, lon" (append e.g. "100 km" to change the radius)."""
+    coords = extract_coordinates(location)
+    if not coords:
+        return {"error": "Provide coordinates like '20.67, 79.30'."}
+    radius = re.search(r"(\d+(?:\.\d+)?)\s*km", location or "", re.I)
+    radius_km = float(radius.group(1)) if radius else NEARBY_MINES_RADIUS_KM
+    mines = find_mines_near(coords[0], coords[1], radius_km)
+    return {
+        "latitude": coords[0],
+        "longitude": coords[1],
+        "radius_km": radius_km,
+        "mines": [_mine_summary(mine) for mine in mines],
+    }
 
 # --- Available tools ---
 available_tools = {
@@ -285,6 +328,11 @@ available_tools = {
         "description": "Searches a place name, retrieves coordinates, and fetches soil, weather, and NDVI data.",
         "input_format": {"place_name": "string"}
     },
+    "find_nearby_mines": {
+        "fn": find_nearby_mines,
+        "description": "Lists registered mines (geotechnical data, FoS) near coordinates, nearest first.",
+        "input_format": {"location": "string, e.g. '20.67, 79.30, 50 km'"}
+    },
 }
 
 
@@ -5,6 +5,8 @@ import asyncio
 import google.generativeai as genai
 from Inside_LLM.prompts import system_prompt
 from Inside_LLM.tools import available_tools
+# Shared with the chatbot; imported the same way as Inside_LLM (run from Master_LLM/)
+from llm_client import LLMClient, LLMTimeoutError, LLMOverloadedError
 
 # --- Configure Gemini ---
 API_KEY = os.getenv("GOOGLE_API_KEY")
@@ -14,6 +16,8 @@ genai.configure(api_key=API_KEY)
 
 # Gemini model
 model = genai.GenerativeModel(model_name="gemini-2.5-flash-lite")
+# Gemini calls run on a bounded pool with deadlines instead of blocking the event loop
+inside_llm = LLMClient("inside_llm")
 
 # --- Utility: Safe JSON parse ---
 def safe_json_loads(text: str):
@@ -57,6 +61,12 @@ def classify_safety(mine_name, soil, weather, forecast):
 
 # --- Main Bot ---
 async def run_bot(query: str) -> dict:
+    try:
+        return await _run_bot(query)
+    except (LLMTimeoutError, LLMOverloadedError) as e:
+        return {"status": "error", "error": f"Gemini unavailable: {e}"}
+
+async def _run_bot(query: str) -> dict:
     chat = model.start_chat(history=[])
 
     # --- Step 1: web_search ---
@@ -66,14 +76,14 @@ async def run_bot(query: str) -> dict:
         f"Return coordinates of this mine using the web_search tool in JSON format like:\n"
         '{"step": "action", "tool": "web_search", "tool_input": "<search query>"}'
     )
-    response1 = chat.send_message(prompt1)
+    response1 = await inside_llm.send_message(chat, prompt1)
     parsed1 = safe_json_loads(response1.text)
     print(parsed1)
     if not parsed1:
         return {"status": "error", "error": "Invalid JSON from Gemini", "raw": response1.text}
 
     tool_input = parsed1.get("tool_input")
-    web_result = available_tools["web_search"]["function"](tool_input)
+    web_result = await asyncio.to_thread(available_tools["web_search"]["function"], tool_input)
     coords = extract_coordinates(web_result)
     print(coords)
     if not coords:
@@ -81,7 +91,7 @@ async def run_bot(query: str) -> dict:
     lat, lon = coords
 
     # --- Step 2: weather_and_soil ---
-    soil_weather_output = available_tools["weather_and_soil"]["function"](lat, lon, tool_input)
+    soil_weather_output = await asyncio.to_thread(available_tools["weather_and_soil"]["function"], lat, lon, tool_input)
     if not soil_weather_output:
         return {"status": "error", "error": "weather_and_soil returned None"}
 
@@ -120,7 +130,7 @@ async def run_bot(query: str) -> dict:
         f"My rule-based system classified this mine as: {conclusion} ({rule_analysis}).\n"
         "Write a short numeric analysis summary in JSON with key 'analysis'."
     )
-    response2 = chat.send_message(prompt2)
+    response2 = await inside_llm.send_message(chat, prompt2)
     parsed2 = safe_json_loads(response2.text)
     gemini_analysis = parsed2.get("analysis") if parsed2 else rule_analysis
 
@@ -1,51 +1,183 @@
 import os
-from catboost import CatBoostClassifier
-import pandas as pd
-import joblib
+import numpy as np
+
+from Master_LLM.ML_Models.Catboost.model_registry import ModelRegistry
+from Master_LLM.ML_Models.Catboost.oblivious_trees import load_matching
+
+# Determine absolute path to model files
+BASE_DIR = os.path.dirname(__file__)  # Catboost folder
+MODEL_PATH = os.path.join(BASE_DIR, "slope_stability_catboost.cbm")
+# Exported from MODEL_PATH at build time and committed with it:
+#   python -m Master_LLM.ML_Models.Catboost.oblivious_trees export
+TREES_PATH = os.getenv("SLOPE_TREES_PATH", os.path.join(BASE_DIR, "slope_stability_trees.npz"))
+LE_PATH = os.path.join(BASE_DIR, "label_encoder.pkl")
+
+# "catboost" uses the native runtime (fastest per batch). "numpy" evaluates the trees
+# exported from the same .cbm without catboost/pandas on the request path: a faster cold
+# start, roughly 2x slower batches. Either way the .cbm is the file that is watched.
+SLOPE_MODEL_BACKEND = os.getenv("SLOPE_MODEL_BACKEND", "catboost").lower()
+
+# Column order the model was trained on
+FEATURE_NAMES = [
+    "height", "cohesion", "friction_angle", "unit_weight", "slope_angle",
+    "water_depth_ratio", "rainfall_mm_7d", "temperature_c", "vibrations_ms2",
+]
+
+# Rows accepted by one batch request; larger payloads are rejected before conversion
+MAX_BATCH_ROWS = int(os.getenv("SLOPE_MAX_BATCH_ROWS", "50000"))
+
+# Encoded classes as shown on the PINN tab; class 2 is the "unstable" outcome
+RISK_LABELS = ["Low", "Medium", "High"]
+UNSTABLE_CLASS = 2
+
+
+class BatchTooLargeError(ValueError):
+    pass
 
-def predict_slope_stability(
-    height, cohesion, friction_angle, unit_weight, slope_angle,
-    water_depth_ratio, rainfall_mm_7d, temperature_c, vibrations_ms2
-):
-    # Determine absolute path to model file
-    base_dir = os.path.dirname(__file__)  # Catboost folder
-    model_path = os.path.join(base_dir, "slope_stability_catboost.cbm")
-    le_path = os.path.join(base_dir, "label_encoder.pkl")
 
-    # Load model
+def _load_catboost(path):
+    from catboost import CatBoostClassifier
+
     cat_model = CatBoostClassifier()
-    cat_model.load_model(model_path)
+    cat_model.load_model(path)
+    return cat_model
 
-    # Load LabelEncoder if exists
-    try:
-        le = joblib.load(le_path)
-    except:
-        le = None
 
-    # Prepare input
-    user_df = pd.DataFrame([{
-        "height": height,
-        "cohesion": cohesion,
-        "friction_angle": friction_angle,
-        "unit_weight": unit_weight,
-        "slope_angle": slope_angle,
-        "water_depth_ratio": water_depth_ratio,
-        "rainfall_mm_7d": rainfall_mm_7d,
-        "temperature_c": temperature_c,
-        "vibrations_ms2": vibrations_ms2
-    }])
-
-    # Predict
-    prediction_encoded = cat_model.predict(user_df)
-    prediction_proba = cat_model.predict_proba(user_df).tolist()
-
-    if le:
-        prediction_label = le.inverse_transform(prediction_encoded)[0]
+def _load_trees(path):
+    # Read-only at runtime: a missing or stale export falls back to the native model
+    ensemble = load_matching(path, TREES_PATH)
+    if ensemble is None:
+        print(f"⚠️ {os.path.basename(TREES_PATH)} is missing or not exported from this .cbm; "
+              "serving native CatBoost. Re-run the oblivious_trees export.")
+        return _load_catboost(path)
+    return ensemble
+
+
+def _load_label_encoder(path):
+    import joblib
+
+    return joblib.load(path)
+
+
+# ---- Process-wide model registry (loaded once, hot-reloaded on file change) ----
+model_registry = ModelRegistry()
+model_registry.register(
+    "slope_model", MODEL_PATH, _load_trees if SLOPE_MODEL_BACKEND == "numpy" else _load_catboost
+)
+model_registry.register("slope_label_encoder", LE_PATH, _load_label_encoder, optional=True)
+
+
+# ---------------- Vectorized Scoring ----------------
+def _check_batch_size(count: int, max_rows):
+    if max_rows is not None and count > max_rows:
+        raise BatchTooLargeError(f"{count} rows exceeds the limit of {max_rows} per request")
+
+
+def build_feature_matrix(rows=None, columns=None, max_rows=None) -> np.ndarray:
+    """
+    Build an (N, 9) float matrix in FEATURE_NAMES order from either
+    row arrays (each row in FEATURE_NAMES order) or a columnar dict.
+    More than max_rows rows raises BatchTooLargeError; any other invalid
+    payload (ragged rows, unknown columns, non-finite values) raises ValueError.
+    """
+    if rows is not None:
+        _check_batch_size(len(rows), max_rows)
+        try:
+            X = np.asarray(rows, dtype=np.float64)
+        except (TypeError, ValueError):
+            raise ValueError(f"Each row must have {len(FEATURE_NAMES)} numbers in order {FEATURE_NAMES}")
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.ndim != 2 or X.shape[1] != len(FEATURE_NAMES):
+            raise ValueError(f"Each row must have {len(FEATURE_NAMES)} values in order {FEATURE_NAMES}")
+    elif columns is not None:
+        missing = [name for name in FEATURE_NAMES if name not in columns]
+        if missing:
+            raise ValueError(f"Missing feature columns: {missing}")
+        unknown = [name for name in columns if name not in FEATURE_NAMES]
+        if unknown:
+            raise ValueError(f"Unknown feature columns: {unknown}")
+        lengths = {len(columns[name]) for name in FEATURE_NAMES}
+        if len(lengths) != 1:
+            raise ValueError("All feature columns must have the same length")
+        _check_batch_size(lengths.pop(), max_rows)
+        X = np.column_stack([np.asarray(columns[name], dtype=np.float64) for name in FEATURE_NAMES])
     else:
-        prediction_label = int(prediction_encoded[0])
+        raise ValueError("Provide either rows or columns")
+
+    if not np.isfinite(X).all():
+        raise ValueError("Feature values must be finite numbers")
+    return X
+
+
+def slope_models():
+    """(model, label encoder, version) for one request, read from the registry once."""
+    model, model_version = model_registry.get_versioned("slope_model")
+    le, le_version = model_registry.get_versioned("slope_label_encoder")
+    return model, le, (model_version, le_version)
+
+
+def predict_slope_proba(X: np.ndarray, model=None) -> np.ndarray:
+    """Class probabilities for every row of X in a single model pass."""
+    cat_model = model if model is not None else model_registry.get("slope_model")
+    return cat_model.predict_proba(X)
+
+
+def labels_from_proba(proba: np.ndarray, model=None, label_encoder=None):
+    """
+    Derive encoded classes and labels from probabilities (no second model pass).
+    Pass the model/encoder the probabilities came from to skip the registry.
+    """
+    if model is None:
+        model, label_encoder, _ = slope_models()
+
+    prediction_encoded = np.asarray(model.classes_)[proba.argmax(axis=1)].astype(int)
+    if label_encoder:
+        prediction_label = label_encoder.inverse_transform(prediction_encoded)
+    else:
+        prediction_label = prediction_encoded
+    return prediction_encoded, prediction_label
+
+
+def predict_slope_batch(X: np.ndarray):
+    """Score N rows with one predict_proba call and return columnar results."""
+    model, le, _ = slope_models()
+    proba = predict_slope_proba(X, model)
+    prediction_encoded, prediction_label = labels_from_proba(proba, model, le)
+    classes = [int(c) for c in model.classes_]
 
     return {
-        "prediction_label": prediction_label,
+        "count": int(X.shape[0]),
+        "classes": classes,
+        "prediction_label": np.asarray(prediction_label).tolist(),
+        "prediction_encoded": prediction_encoded.tolist(),
+        "probabilities": {str(c): proba[:, i].tolist() for i, c in enumerate(classes)},
+    }
+
+
+def score_slope_row(X: np.ndarray, model, label_encoder) -> dict:
+    """predict_slope_stability's result for a single (1, 9) row with the given model."""
+    prediction_proba = predict_slope_proba(X, model)
+    prediction_encoded, prediction_label = labels_from_proba(prediction_proba, model, label_encoder)
+
+    label = prediction_label[0]
+    return {
+        "prediction_label": label.item() if hasattr(label, "item") else label,
         "prediction_encoded": int(prediction_encoded[0]),
-        "probabilities": prediction_proba
+        "probabilities": prediction_proba.tolist()
     }
+
+
+def predict_slope_stability(
+    height, cohesion, friction_angle, unit_weight, slope_angle,
+    water_depth_ratio, rainfall_mm_7d, temperature_c, vibrations_ms2
+):
+    # Prepare input
+    X = np.array([[
+        height, cohesion, friction_angle, unit_weight, slope_angle,
+        water_depth_ratio, rainfall_mm_7d, temperature_c, vibrations_ms2
+    ]], dtype=np.float64)
+
+    # Predict (one pass; the label comes from the probabilities)
+    model, le, _ = slope_models()
+    return score_slope_row(X, model, le)
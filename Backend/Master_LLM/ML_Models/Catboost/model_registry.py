@@ -0,0 +1,170 @@
+import os
+import time
+import hashlib
+import threading
+from typing import Any, Callable, Dict, Optional
+
+
+def file_hash(path: str) -> str:
+    """Short sha256 of a file, used as the model version."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+# ---------------- Registry Entry ----------------
+class _ModelEntry:
+    """One registered artifact: where it lives, how to load it, and what is loaded now."""
+
+    def __init__(self, name: str, path: str, loader: Callable[[str], Any], optional: bool):
+        self.name = name
+        self.path = path
+        self.loader = loader
+        self.optional = optional
+
+        self.obj = None
+        self.current = (None, None)  # (obj, version), replaced together on reload
+        self.signature = None       # (mtime_ns, size) of the file currently loaded
+        self.version = None         # short sha256 of the file currently loaded
+        self.loaded_at = None
+        self.load_time_ms = None
+        self.loads = 0
+        self.hits = 0
+        self.last_error = None
+        self.last_check = 0.0
+        self._hits_lock = threading.Lock()
+
+    def count_hit(self):
+        # Requests hit the same entry from many threads at once
+        with self._hits_lock:
+            self.hits += 1
+
+
+# ---------------- Model Registry ----------------
+class ModelRegistry:
+    """
+    Process-wide cache of model artifacts.
+    Each artifact is loaded once, served from memory, and swapped atomically
+    when the file on disk changes (mtime/size first, then content hash).
+    """
+
+    def __init__(self, check_interval: float = 1.0):
+        self.check_interval = check_interval
+        self._entries: Dict[str, _ModelEntry] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, path: str, loader: Callable[[str], Any], optional: bool = False):
+        """Register an artifact. Nothing is read from disk until the first get()."""
+        with self._lock:
+            self._entries[name] = _ModelEntry(name, path, loader, optional)
+
+    def get(self, name: str) -> Any:
+        """Return the in-memory artifact, (re)loading it only if the file changed."""
+        return self.get_versioned(name)[0]
+
+    def get_versioned(self, name: str):
+        """(artifact, version) from one consistent load; counts as a single hit."""
+        entry = self._entries[name]
+        now = time.monotonic()
+
+        if entry.signature is not None and now - entry.last_check < self.check_interval:
+            entry.count_hit()
+            return entry.current
+
+        signature = self._file_signature(entry.path)
+        if entry.loads and signature == entry.signature:
+            entry.last_check = now
+            entry.count_hit()
+            return entry.current
+
+        with self._lock:
+            # Another thread may have reloaded while we waited for the lock
+            if entry.loads and self._file_signature(entry.path) == entry.signature:
+                entry.last_check = now
+                entry.count_hit()
+                return entry.current
+            self._load(entry, signature)
+            entry.last_check = time.monotonic()
+            return entry.current
+
+    def version(self, name: str) -> Optional[str]:
+        """Version (content hash) of the artifact currently served, loading it if needed."""
+        return self.get_versioned(name)[1]
+
+    def warm_up(self):
+        """Load every registered artifact now so no request pays the load cost."""
+        for name in list(self._entries):
+            try:
+                self.get(name)
+            except Exception as e:
+                print(f"⚠️ Could not warm up model '{name}': {e}")
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {
+                "path": os.path.basename(entry.path),
+                "loaded": entry.obj is not None,
+                "version": entry.version,
+                "loaded_at": entry.loaded_at,
+                "load_time_ms": entry.load_time_ms,
+                "loads": entry.loads,
+                "hits": entry.hits,
+                "last_error": entry.last_error,
+            }
+            for name, entry in self._entries.items()
+        }
+
+    # ---- Internals ----
+    @staticmethod
+    def _file_signature(path: str):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return ("missing",)
+        return (st.st_mtime_ns, st.st_size)
+
+    def _load(self, entry: _ModelEntry, signature):
+        if signature == ("missing",):
+            if not entry.optional:
+                raise FileNotFoundError(f"Model file not found: {entry.path}")
+            entry.obj, entry.version = None, None
+            entry.current = (None, None)
+            entry.signature = signature
+            entry.loads += 1
+            return
+
+        version = file_hash(entry.path)
+        if entry.obj is not None and version == entry.version:
+            # Touched but not modified: keep the loaded object
+            entry.signature = signature
+            entry.count_hit()
+            return
+
+        start = time.perf_counter()
+        try:
+            obj = entry.loader(entry.path)
+        except Exception as e:
+            entry.last_error = str(e)
+            if entry.obj is not None:
+                # Keep serving the previous model if the new file is unreadable
+                print(f"⚠️ Reload of '{entry.name}' failed, keeping version {entry.version}: {e}")
+                entry.signature = signature
+                return
+            if entry.optional:
+                entry.signature = signature
+                entry.loads += 1
+                return
+            raise
+
+        # Swap everything in one go so readers never see a half-updated entry
+        entry.obj = obj
+        entry.version = version
+        entry.current = (obj, version)
+        entry.signature = signature
+        entry.loaded_at = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        entry.load_time_ms = round((time.perf_counter() - start) * 1000, 2)
+        entry.loads += 1
+        entry.last_error = None
+        print(f"🟢 Loaded model '{entry.name}' version {version} in {entry.load_time_ms} ms")
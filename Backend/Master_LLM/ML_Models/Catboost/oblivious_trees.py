@@ -0,0 +1,262 @@
+import os
+import sys
+import json
+import time
+import tempfile
+import subprocess
+import numpy as np
+
+# ---------------- Oblivious-Tree Ensemble (pure NumPy) ----------------
+# A CatBoost model is a sum of oblivious trees: every level of a tree uses the
+# same (feature, border) split, so a row's leaf is just the bit pattern of
+# depth comparisons. Exported as arrays, the whole ensemble evaluates with a
+# handful of NumPy gathers and needs neither catboost nor pandas at runtime.
+
+BASE_DIR = os.path.dirname(__file__)  # Catboost folder
+CBM_PATH = os.path.join(BASE_DIR, "slope_stability_catboost.cbm")
+NPZ_PATH = os.path.join(BASE_DIR, "slope_stability_trees.npz")
+
+
+def export_oblivious_trees(cbm_path: str = CBM_PATH, out_path: str = NPZ_PATH) -> str:
+    """Convert a CatBoost .cbm into the compact .npz array format used by ObliviousTreeEnsemble."""
+    from catboost import CatBoostClassifier
+    from Master_LLM.ML_Models.Catboost.model_registry import file_hash
+
+    cat_model = CatBoostClassifier()
+    cat_model.load_model(cbm_path)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "model.json")
+        cat_model.save_model(json_path, format="json")
+        with open(json_path) as f:
+            dump = json.load(f)
+
+    # Flat list of every (feature, border) pair; tree splits index into it
+    split_feature, split_border = [], []
+    for feature in dump["features_info"]["float_features"]:
+        for border in feature["borders"]:
+            split_feature.append(feature["flat_feature_index"])
+            split_border.append(border)
+
+    trees = dump["oblivious_trees"]
+    depths = {len(tree["splits"]) for tree in trees}
+    if len(depths) != 1:
+        raise ValueError(f"Expected trees of equal depth, got depths {sorted(depths)}")
+    depth = depths.pop()
+    n_classes = len(trees[0]["leaf_values"]) >> depth
+
+    for tree in trees:
+        for split in tree["splits"]:
+            if split["split_type"] != "FloatFeature":
+                raise ValueError(f"Unsupported split type: {split['split_type']}")
+
+    split_index = np.array([[s["split_index"] for s in tree["splits"]] for tree in trees], dtype=np.int32)
+    leaf_values = np.array([tree["leaf_values"] for tree in trees], dtype=np.float64)
+    leaf_values = leaf_values.reshape(len(trees), 1 << depth, n_classes)
+
+    scale, bias = dump.get("scale_and_bias", [1.0, [0.0] * n_classes])
+    class_names = dump["model_info"]["class_params"]["class_names"]
+
+    np.savez_compressed(
+        out_path,
+        split_feature=np.array(split_feature, dtype=np.int32),
+        split_border=np.array(split_border, dtype=np.float32),
+        split_index=split_index,
+        leaf_values=leaf_values,
+        scale=np.float64(scale),
+        bias=np.array(bias, dtype=np.float64).reshape(-1),
+        classes=np.array(class_names),
+        feature_names=np.array(cat_model.feature_names_),
+        source_version=np.array(file_hash(cbm_path)),
+    )
+    return out_path
+
+
+def load_matching(cbm_path: str = CBM_PATH, npz_path: str = NPZ_PATH):
+    """The exported ensemble if it was built from this exact .cbm (by content hash), else None. Never writes."""
+    from Master_LLM.ML_Models.Catboost.model_registry import file_hash
+
+    if not os.path.exists(npz_path):
+        return None
+    ensemble = ObliviousTreeEnsemble.load(npz_path)
+    return ensemble if ensemble.source_version == file_hash(cbm_path) else None
+
+
+def load_or_export(cbm_path: str = CBM_PATH, npz_path: str = NPZ_PATH):
+    """
+    The ensemble for this exact .cbm: the .npz when it was exported from the
+    same file (by content hash), else a fresh export. For the build step and
+    tooling; the server only reads the export (load_matching).
+    """
+    ensemble = load_matching(cbm_path, npz_path)
+    if ensemble is not None:
+        return ensemble
+    if os.path.exists(npz_path):
+        print(f"🟡 {os.path.basename(npz_path)} was exported from another .cbm; re-exporting")
+    export_oblivious_trees(cbm_path, npz_path)
+    return ObliviousTreeEnsemble.load(npz_path)
+
+
+class ObliviousTreeEnsemble:
+    """Vectorized evaluator for an exported oblivious-tree ensemble (MultiClass)."""
+
+    def __init__(self, split_feature, split_border, split_index, leaf_values, scale, bias,
+                 classes, feature_names=None, source_version=None, chunk_size: int = 128):
+        self.split_feature = split_feature
+        self.split_border = split_border
+        self.split_index = split_index
+        self.scale = float(scale)
+        self.bias = bias
+        self.classes_ = classes
+        self.feature_names_ = list(feature_names) if feature_names is not None else None
+        self.source_version = source_version
+        self.chunk_size = chunk_size
+
+        n_trees, n_leaves, n_classes = leaf_values.shape
+        self.tree_count_ = n_trees
+        self.depth = split_index.shape[1]
+        if self.depth > 8:
+            raise ValueError(f"Tree depth {self.depth} > 8 is not supported")
+        # Per class, one flat table so a (tree, leaf) pair is a single gather
+        self._leaf_tables = [np.ascontiguousarray(leaf_values[:, :, c]).ravel() for c in range(n_classes)]
+        self._tree_offsets = (np.arange(n_trees, dtype=np.intp) * n_leaves)[:, None]
+        self._level_splits = [np.ascontiguousarray(split_index[:, d]) for d in range(self.depth)]
+
+    @classmethod
+    def load(cls, path: str = NPZ_PATH, **kwargs):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                split_feature=data["split_feature"],
+                split_border=data["split_border"],
+                split_index=data["split_index"],
+                leaf_values=data["leaf_values"],
+                scale=data["scale"],
+                bias=data["bias"],
+                classes=data["classes"],
+                feature_names=data["feature_names"],
+                source_version=str(data["source_version"]),
+                **kwargs,
+            )
+
+    def _raw_chunk(self, X: np.ndarray) -> np.ndarray:
+        n = X.shape[0]
+        padded = -n % 8
+        if padded:
+            X = np.vstack([X, np.zeros((padded, X.shape[1]))])
+
+        # CatBoost compares float32 features against float32 borders; binarize every split once
+        binarized = X.T.astype(np.float32)[self.split_feature] > self.split_border[:, None]   # (n_splits, N)
+
+        # Assemble leaf indices 8 rows at a time: bits never cross byte boundaries for depth <= 8
+        lanes = binarized.view(np.uint8).view(np.uint64)
+        leaf = np.take(lanes, self._level_splits[0], axis=0)
+        for d in range(1, self.depth):
+            leaf |= np.take(lanes, self._level_splits[d], axis=0) << np.uint64(d)
+        flat = leaf.view(np.uint8).astype(np.intp) + self._tree_offsets               # (n_trees, N)
+
+        raw = np.column_stack([np.take(table, flat).sum(axis=0) for table in self._leaf_tables])
+        return raw[:n] * self.scale + self.bias
+
+    def predict_raw(self, X) -> np.ndarray:
+        """Raw per-class scores, evaluated in fixed-size chunks to bound memory."""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        out = np.empty((X.shape[0], len(self._leaf_tables)), dtype=np.float64)
+        for start in range(0, X.shape[0], self.chunk_size):
+            out[start:start + self.chunk_size] = self._raw_chunk(X[start:start + self.chunk_size])
+        return out
+
+    def predict_proba(self, X) -> np.ndarray:
+        raw = self.predict_raw(X)
+        raw -= raw.max(axis=1, keepdims=True)
+        np.exp(raw, out=raw)
+        raw /= raw.sum(axis=1, keepdims=True)
+        return raw
+
+
+# ---------------- Parity Check & Benchmark ----------------
+def _random_inputs(n: int, seed: int = 0) -> np.ndarray:
+    """Inputs spread over the ranges seen in the mine registry and the PINN tab sliders."""
+    rng = np.random.default_rng(seed)
+    low = np.array([10, 5, 20, 15, 20, 0.0, 0, 0, 0.0])
+    high = np.array([80, 50, 45, 28, 60, 1.0, 400, 45, 3.0])
+    return rng.uniform(low, high, size=(n, len(low)))
+
+
+def check_parity(n: int = 20000, atol: float = 1e-9, cbm_path: str = CBM_PATH, npz_path: str = NPZ_PATH) -> float:
+    """Compare NumPy and native CatBoost probabilities on random inputs; returns max abs diff."""
+    from catboost import CatBoostClassifier
+
+    native = CatBoostClassifier()
+    native.load_model(cbm_path)
+    ensemble = load_or_export(cbm_path, npz_path)
+
+    X = _random_inputs(n)
+    diff = float(np.abs(native.predict_proba(X) - ensemble.predict_proba(X)).max())
+    same_labels = bool((native.predict_proba(X).argmax(1) == ensemble.predict_proba(X).argmax(1)).all())
+    status = "✅" if diff <= atol and same_labels else "❌"
+    print(f"{status} Parity on {n} rows: max |Δp| = {diff:.3e}, identical labels: {same_labels}")
+    if status == "❌":
+        raise AssertionError(f"NumPy evaluator diverges from CatBoost (max |Δp| = {diff})")
+    return diff
+
+
+_COLD_START_SNIPPETS = {
+    "catboost": (
+        "from catboost import CatBoostClassifier; import numpy as np; "
+        f"m = CatBoostClassifier(); m.load_model({CBM_PATH!r}); m.predict_proba(np.zeros((1, 9)))"
+    ),
+    "numpy": (
+        "from Master_LLM.ML_Models.Catboost.oblivious_trees import ObliviousTreeEnsemble; import numpy as np; "
+        f"m = ObliviousTreeEnsemble.load({NPZ_PATH!r}); m.predict_proba(np.zeros((1, 9)))"
+    ),
+}
+
+
+def benchmark(batch_sizes=(1, 100, 10000), repeats: int = 5):
+    """Cold start (fresh interpreter: import + load + first predict) and per-batch latency for both paths."""
+    from catboost import CatBoostClassifier
+
+    backend_dir = os.path.abspath(os.path.join(BASE_DIR, "..", "..", ".."))
+    print("🧊 Cold start (fresh process):")
+    for name, snippet in _COLD_START_SNIPPETS.items():
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", snippet], check=True, cwd=backend_dir)
+        print(f"   {name:<9} {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+    load_or_export()   # the cold-start snippet reads the cached export
+    native = CatBoostClassifier()
+    native.load_model(CBM_PATH)
+    models = {"catboost": native, "numpy": load_or_export()}
+
+    print("🔥 Warm predict_proba latency (best of %d):" % repeats)
+    for n in batch_sizes:
+        X = _random_inputs(n)
+        timings = []
+        for name, model in models.items():
+            best = min(_timed(model.predict_proba, X) for _ in range(repeats))
+            timings.append(f"{name} {best * 1000:8.2f} ms")
+        print(f"   N={n:<6} " + " | ".join(timings))
+
+
+def _timed(fn, X) -> float:
+    start = time.perf_counter()
+    fn(X)
+    return time.perf_counter() - start
+
+
+# Usage (from Backend/):
+#   python -m Master_LLM.ML_Models.Catboost.oblivious_trees export
+#   python -m Master_LLM.ML_Models.Catboost.oblivious_trees check
+#   python -m Master_LLM.ML_Models.Catboost.oblivious_trees bench
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "check"
+    if command == "export":
+        print(f"📦 Exported {export_oblivious_trees()}")
+    elif command == "check":
+        check_parity()
+    elif command == "bench":
+        benchmark()
+    else:
+        print("Usage: oblivious_trees.py [export|check|bench]")
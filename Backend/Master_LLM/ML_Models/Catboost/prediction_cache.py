@@ -0,0 +1,123 @@
+import os
+import math
+import time
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from Master_LLM.ML_Models.Catboost.catboost import FEATURE_NAMES, slope_models, score_slope_row
+
+SLOPE_CACHE_MAX_ENTRIES = int(os.getenv("SLOPE_CACHE_MAX_ENTRIES", "4096"))
+SLOPE_CACHE_TTL_SECONDS = float(os.getenv("SLOPE_CACHE_TTL_SECONDS", "3600"))
+
+# Step each feature is snapped to before lookup (finer than the sensors report)
+DEFAULT_RESOLUTION = {
+    "height": 0.1,
+    "cohesion": 0.1,
+    "friction_angle": 0.1,
+    "unit_weight": 0.01,
+    "slope_angle": 0.1,
+    "water_depth_ratio": 0.001,
+    "rainfall_mm_7d": 0.1,
+    "temperature_c": 0.1,
+    "vibrations_ms2": 0.01,
+}
+
+
+# ---------------- Quantized Prediction Cache ----------------
+class SlopePredictionCache:
+    """
+    LRU of predict_slope_stability results keyed by the quantized inputs.
+    Entries expire after ttl seconds; the whole cache is dropped when the
+    model or label encoder version served by the registry changes.
+    """
+
+    def __init__(self, max_entries: int = SLOPE_CACHE_MAX_ENTRIES, ttl: float = SLOPE_CACHE_TTL_SECONDS,
+                 resolution: dict = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.resolution = {**DEFAULT_RESOLUTION, **(resolution or {})}
+        self._entries = OrderedDict()  # key -> (stored_monotonic, result)
+        self._lock = threading.Lock()
+        self._model_version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def quantize(self, features: dict) -> tuple:
+        """Snap every feature to its grid step; the integer steps are the cache key."""
+        key = []
+        for name in FEATURE_NAMES:
+            step = features[name] / self.resolution[name]
+            # NaN/inf (and values so large the step overflows) have no grid cell
+            if not math.isfinite(step):
+                raise ValueError(f"{name} must be a finite number, got {features[name]}")
+            key.append(int(round(step)))
+        return tuple(key)
+
+    def predict(self, **features) -> dict:
+        """
+        predict_slope_stability on the quantized inputs, served from the cache
+        when possible. Raises ValueError for non-finite inputs.
+        """
+        key = self.quantize(features)
+        # Model, encoder and version from one registry read, used for the whole request
+        model, le, version = slope_models()
+        now = time.monotonic()
+
+        with self._lock:
+            if version != self._model_version:
+                if self._entries:
+                    self.invalidations += 1
+                    print(f"🟢 Slope model changed to {version[0]}, cleared {len(self._entries)} cached predictions")
+                self._entries.clear()
+                self._model_version = version
+
+            entry = self._entries.get(key)
+            if entry is not None:
+                if now - entry[0] < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return dict(entry[1])
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+
+        # Score the snapped values so every request in the bucket gets the same answer
+        snapped = {name: step * self.resolution[name] for name, step in zip(FEATURE_NAMES, key)}
+        X = np.array([[snapped[name] for name in FEATURE_NAMES]], dtype=np.float64)
+        result = score_slope_row(X, model, le)
+
+        with self._lock:
+            if version == self._model_version:
+                self._entries[key] = (now, result)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return dict(result)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_s": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "model_version": self._model_version[0] if self._model_version else None,
+        }
+
+
+slope_prediction_cache = SlopePredictionCache()
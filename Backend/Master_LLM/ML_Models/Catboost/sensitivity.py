@@ -0,0 +1,168 @@
+import time
+import numpy as np
+
+from Master_LLM.ML_Models.Catboost.catboost import (
+    FEATURE_NAMES, UNSTABLE_CLASS, predict_slope_proba, labels_from_proba, slope_models
+)
+
+# Upper bound on grid size so one request cannot monopolise a threadpool worker
+MAX_SWEEP_POINTS = 250_000
+
+
+# ---------------- Parameter Sensitivity Sweep ----------------
+def build_sweep_grid(base: dict, axes: list):
+    """
+    Tile the base feature row over a 1-D or 2-D grid of the swept features.
+    Returns the (N, 9) feature matrix, the value array of each axis and the grid shape.
+    """
+    if not 1 <= len(axes) <= 2:
+        raise ValueError("Provide one or two sweep axes")
+
+    for axis in axes:
+        if axis["feature"] not in FEATURE_NAMES:
+            raise ValueError(f"Unknown feature '{axis['feature']}', expected one of {FEATURE_NAMES}")
+        if int(axis["steps"]) < 2:
+            raise ValueError("Each axis needs at least 2 steps")
+    if len(axes) == 2 and axes[0]["feature"] == axes[1]["feature"]:
+        raise ValueError("Sweep axes must be different features")
+
+    # Size check before anything is allocated (Python ints: no overflow)
+    shape = tuple(int(axis["steps"]) for axis in axes)
+    n_points = 1
+    for steps in shape:
+        n_points *= steps
+    if n_points > MAX_SWEEP_POINTS:
+        raise ValueError(f"Grid of {n_points} points exceeds the limit of {MAX_SWEEP_POINTS}")
+
+    axis_values = [np.linspace(axis["start"], axis["stop"], steps) for axis, steps in zip(axes, shape)]
+
+    X = np.tile(np.array([base[name] for name in FEATURE_NAMES], dtype=np.float64), (n_points, 1))
+    mesh = np.meshgrid(*axis_values, indexing="ij")
+    for axis, grid in zip(axes, mesh):
+        X[:, FEATURE_NAMES.index(axis["feature"])] = grid.ravel()
+    return X, axis_values, shape
+
+
+def _crossings_1d(surface: np.ndarray, x: np.ndarray, threshold: float) -> list:
+    a, b = surface[:-1] - threshold, surface[1:] - threshold
+    # <= 0 keeps grid points lying exactly on the threshold; flat runs at the threshold are skipped
+    i = np.nonzero((a * b <= 0) & (a != b))[0]
+    t = a[i] / (a[i] - b[i])
+    return np.unique(x[i] + t * (x[i + 1] - x[i])).tolist()
+
+
+# Marching squares. Cell corners c0=(i,j) c1=(i+1,j) c2=(i+1,j+1) c3=(i,j+1);
+# edge k joins corner k and corner k+1, and a corner k cut off alone is
+# bounded by edges k-1 and k.
+_CORNER_OFFSETS = ((0, 0), (1, 0), (1, 1), (0, 1))
+
+
+def _edge_key(i: int, j: int, k: int):
+    """Grid-wide id of edge k of cell (i, j), shared with the neighbouring cell."""
+    if k == 0:
+        return ("x", i, j)
+    if k == 1:
+        return ("y", i + 1, j)
+    if k == 2:
+        return ("x", i, j + 1)
+    return ("y", i, j)
+
+
+def _contour_2d(surface: np.ndarray, x: np.ndarray, y: np.ndarray, threshold: float) -> list:
+    above = surface >= threshold
+    cases = (above[:-1, :-1].astype(np.uint8) | above[1:, :-1] << 1
+             | above[1:, 1:] << 2 | above[:-1, 1:] << 3)
+    points = {}
+    links = {}
+
+    def edge_point(i, j, k):
+        key = _edge_key(i, j, k)
+        if key not in points:
+            (pi, pj), (qi, qj) = _CORNER_OFFSETS[k], _CORNER_OFFSETS[(k + 1) % 4]
+            va, vb = surface[i + pi, j + pj], surface[i + qi, j + qj]
+            t = (threshold - va) / (vb - va)
+            px, qx = x[i + pi], x[i + qi]
+            py, qy = y[j + pj], y[j + qj]
+            points[key] = [float(px + t * (qx - px)), float(py + t * (qy - py))]
+        return key
+
+    def link(a, b):
+        links.setdefault(a, []).append(b)
+        links.setdefault(b, []).append(a)
+
+    # Only cells the boundary passes through (corners on both sides)
+    for i, j in zip(*np.nonzero((cases != 0) & (cases != 15))):
+        case = int(cases[i, j])
+        states = [bool(case >> c & 1) for c in range(4)]
+        cut = [k for k in range(4) if states[k] != states[(k + 1) % 4]]
+        if len(cut) == 2:
+            link(edge_point(i, j, cut[0]), edge_point(i, j, cut[1]))
+            continue
+        # Saddle: the cell centre decides which pair of opposite corners is joined
+        centre = surface[i:i + 2, j:j + 2].mean() >= threshold
+        for c in range(4):
+            if states[c] != centre:
+                link(edge_point(i, j, (c - 1) % 4), edge_point(i, j, c))
+
+    # Chain segments into polylines: open ones start at the grid border, the rest are loops
+    lines = []
+    visited = set()
+    starts = [key for key, nbrs in links.items() if len(nbrs) == 1] + list(links)
+    for start in starts:
+        if start in visited:
+            continue
+        line = [start]
+        visited.add(start)
+        current = start
+        while True:
+            nxt = next((n for n in links[current] if n not in visited), None)
+            if nxt is None:
+                if len(line) > 2 and start in links[current]:
+                    line.append(start)   # closed loop
+                break
+            line.append(nxt)
+            visited.add(nxt)
+            current = nxt
+        # Edges meeting at a grid point that lies on the threshold share one point
+        polyline = [points[line[0]]]
+        for key in line[1:]:
+            if points[key] != polyline[-1]:
+                polyline.append(points[key])
+        lines.append(polyline)
+    return lines
+
+
+def failure_boundary(surface: np.ndarray, axis_values: list, threshold: float) -> list:
+    """
+    Where the unstable-probability surface crosses the threshold, linearly
+    interpolated along grid edges. 1-D: sorted x values. 2-D: ordered polylines
+    of [x, y] points (marching squares), each drawable as one line; a closed
+    loop repeats its first point at the end.
+    """
+    if surface.ndim == 1:
+        return _crossings_1d(surface, axis_values[0], threshold)
+    return _contour_2d(surface, axis_values[0], axis_values[1], threshold)
+
+
+def sweep_slope_stability(base: dict, axes: list, threshold: float = 0.5):
+    """Evaluate the whole sweep grid in one vectorized model pass."""
+    start = time.perf_counter()
+    X, axis_values, shape = build_sweep_grid(base, axes)
+
+    model, le, _ = slope_models()
+    proba = predict_slope_proba(X, model)
+    prediction_encoded, _ = labels_from_proba(proba, model, le)
+    surface = proba[:, UNSTABLE_CLASS].reshape(shape)
+
+    return {
+        "axes": [
+            {"feature": axis["feature"], "values": values.tolist()}
+            for axis, values in zip(axes, axis_values)
+        ],
+        "threshold": threshold,
+        "unstable_probability": surface.tolist(),
+        "prediction_encoded": prediction_encoded.reshape(shape).tolist(),
+        "failure_boundary": failure_boundary(surface, axis_values, threshold),
+        "points": int(X.shape[0]),
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+    }
@@ -0,0 +1,151 @@
+import time
+import numpy as np
+
+from Master_LLM.ML_Models.Catboost.catboost import (
+    FEATURE_NAMES, UNSTABLE_CLASS, RISK_LABELS, predict_slope_proba, model_registry
+)
+
+MAX_SAMPLES = 1_000_000
+# Rows scored per chunk: bounds memory per request whatever n_samples is
+MAX_CHUNK_SIZE = 16384
+HISTOGRAM_BINS = 2000  # percentile resolution of 0.0005 on P(unstable)
+
+# Field-measurement uncertainty used when the request does not specify any
+DEFAULT_DISTRIBUTIONS = {
+    "cohesion": {"dist": "lognormal", "cv": 0.25},
+    "friction_angle": {"dist": "normal", "std": 2.0},
+    "water_depth_ratio": {"dist": "normal", "std": 0.05},
+}
+
+# Physical limits applied after sampling
+FEATURE_BOUNDS = {
+    "height": (0.0, None),
+    "cohesion": (0.0, None),
+    "friction_angle": (0.0, 90.0),
+    "unit_weight": (0.0, None),
+    "slope_angle": (0.0, 90.0),
+    "water_depth_ratio": (0.0, 1.0),
+    "rainfall_mm_7d": (0.0, None),
+    "vibrations_ms2": (0.0, None),
+}
+
+
+# ---------------- Sampling ----------------
+def _sample(rng, spec: dict, base_value: float, n: int) -> np.ndarray:
+    dist = spec.get("dist", "normal").lower()
+    mean = spec.get("mean", base_value)
+
+    if dist == "normal":
+        std = spec.get("std", abs(mean) * spec.get("cv", 0.0))
+        return rng.normal(mean, std, n)
+    if dist == "lognormal":
+        if mean <= 0:
+            raise ValueError("lognormal needs a positive mean")
+        std = spec.get("std", mean * spec.get("cv", 0.0))
+        sigma2 = np.log1p((std / mean) ** 2)
+        return rng.lognormal(np.log(mean) - sigma2 / 2, np.sqrt(sigma2), n)
+    if dist == "uniform":
+        return rng.uniform(spec["low"], spec["high"], n)
+    if dist == "triangular":
+        return rng.triangular(spec["low"], spec.get("mode", mean), spec["high"], n)
+    raise ValueError(f"Unknown distribution '{dist}' (normal, lognormal, uniform, triangular)")
+
+
+def _validate(distributions: dict):
+    for name, spec in distributions.items():
+        if name not in FEATURE_NAMES:
+            raise ValueError(f"Unknown feature '{name}', expected one of {FEATURE_NAMES}")
+        dist = spec.get("dist", "normal").lower()
+        if dist in ("uniform", "triangular") and ("low" not in spec or "high" not in spec):
+            raise ValueError(f"'{name}': {dist} needs low and high")
+
+
+def _percentiles_from_histogram(counts: np.ndarray, edges: np.ndarray, qs) -> list:
+    cumulative = np.cumsum(counts)
+    total = cumulative[-1]
+    out = []
+    for q in qs:
+        target = q / 100 * total
+        i = int(np.searchsorted(cumulative, target))
+        i = min(i, len(counts) - 1)
+        below = cumulative[i - 1] if i else 0
+        frac = (target - below) / counts[i] if counts[i] else 0.0
+        out.append(float(edges[i] + frac * (edges[i + 1] - edges[i])))
+    return out
+
+
+# ---------------- Monte Carlo Propagation ----------------
+def monte_carlo_slope_stability(base: dict, distributions: dict = None, n_samples: int = 10000,
+                                chunk_size: int = MAX_CHUNK_SIZE, threshold: float = 0.5, seed: int = None,
+                                percentiles=(5, 25, 50, 75, 95)):
+    """
+    Propagate input uncertainty to the slope failure probability.
+    Samples are drawn and scored chunk by chunk, so memory stays at
+    O(chunk_size) regardless of n_samples; only running sums and a
+    fixed-size histogram of P(unstable) are kept. Each uncertain input has
+    its own random stream, so a seeded run gives the same result at any
+    chunk size.
+    """
+    start = time.perf_counter()
+    distributions = DEFAULT_DISTRIBUTIONS if distributions is None else distributions
+    _validate(distributions)
+    if not 1 <= n_samples <= MAX_SAMPLES:
+        raise ValueError(f"n_samples must be between 1 and {MAX_SAMPLES}")
+    chunk_size = max(1, min(chunk_size, MAX_CHUNK_SIZE, n_samples))
+
+    base_row = np.array([base[name] for name in FEATURE_NAMES], dtype=np.float64)
+    uncertain = [(FEATURE_NAMES.index(name), name, spec) for name, spec in distributions.items()]
+    rngs = [np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(len(uncertain))]
+
+    edges = np.linspace(0.0, 1.0, HISTOGRAM_BINS + 1)
+    counts = np.zeros(HISTOGRAM_BINS, dtype=np.int64)
+    proba_sum = np.zeros(len(RISK_LABELS))
+    class_counts = np.zeros(len(RISK_LABELS), dtype=np.int64)
+    p_sum = p_sq_sum = 0.0
+    exceed = 0
+
+    # One model for every chunk, even if a reload lands mid-run
+    model = model_registry.get("slope_model")
+    X = np.empty((chunk_size, len(FEATURE_NAMES)))
+    done = 0
+    while done < n_samples:
+        n = min(chunk_size, n_samples - done)
+        chunk = X[:n]
+        chunk[:] = base_row
+        for rng, (col, name, spec) in zip(rngs, uncertain):
+            values = _sample(rng, spec, base_row[col], n)
+            low, high = FEATURE_BOUNDS.get(name, (None, None))
+            low, high = spec.get("min", low), spec.get("max", high)
+            if low is not None or high is not None:
+                np.clip(values, low, high, out=values)
+            chunk[:, col] = values
+
+        proba = predict_slope_proba(chunk, model)
+        p_unstable = proba[:, UNSTABLE_CLASS]
+
+        proba_sum += proba.sum(axis=0)
+        class_counts += np.bincount(proba.argmax(axis=1), minlength=len(RISK_LABELS))
+        p_sum += p_unstable.sum()
+        p_sq_sum += np.square(p_unstable).sum()
+        exceed += int((p_unstable >= threshold).sum())
+        counts += np.histogram(p_unstable, bins=edges)[0]
+        done += n
+
+    mean = p_sum / n_samples
+    return {
+        "n_samples": n_samples,
+        "uncertain_inputs": {name: spec for _, name, spec in uncertain},
+        "unstable_probability": {
+            "mean": float(mean),
+            "std": float(np.sqrt(max(p_sq_sum / n_samples - mean ** 2, 0.0))),
+            "percentiles": dict(zip(
+                [f"p{q}" for q in percentiles],
+                _percentiles_from_histogram(counts, edges, percentiles),
+            )),
+        },
+        "threshold": threshold,
+        "exceedance_probability": exceed / n_samples,
+        "mean_class_probabilities": dict(zip(RISK_LABELS, (proba_sum / n_samples).tolist())),
+        "predicted_class_frequency": dict(zip(RISK_LABELS, (class_counts / n_samples).tolist())),
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+    }
@@ -0,0 +1,193 @@
+import time
+import numpy as np
+
+# ---------------- Limit-Equilibrium Factor of Safety ----------------
+# Physics-based FoS for the same geotechnical fields the CatBoost model uses
+# (height_m, cohesion_kpa, friction_angle_deg, unit_weight_kn_m3,
+# slope_angle_deg, water_depth_ratio). Units: m, kPa, degrees, kN/m³.
+#
+# Slope geometry (2-D section): toe at (0, 0), face rising at slope_angle to the
+# crest at (H / tan(beta), H), flat ground in front of the toe and behind the crest.
+
+GAMMA_W = 9.81                      # unit weight of water, kN/m³
+DEFAULT_INFINITE_SLOPE_DEPTH_M = 5.0  # typical shallow translational slip depth
+
+
+def infinite_slope_fos(cohesion_kpa, friction_angle_deg, unit_weight_kn_m3, slope_angle_deg,
+                       water_depth_ratio, depth_m=DEFAULT_INFINITE_SLOPE_DEPTH_M):
+    """
+    Infinite-slope FoS for a slip plane parallel to the face at depth_m,
+    with the water table at water_depth_ratio * depth_m above the plane.
+    Works on scalars or NumPy arrays (e.g. the whole fleet at once).
+    """
+    beta = np.radians(slope_angle_deg)
+    phi = np.radians(friction_angle_deg)
+    cos2 = np.cos(beta) ** 2
+
+    normal_stress = unit_weight_kn_m3 * depth_m * cos2
+    pore_pressure = GAMMA_W * water_depth_ratio * depth_m * cos2
+    shear_stress = unit_weight_kn_m3 * depth_m * np.sin(beta) * np.cos(beta)
+
+    resisting = cohesion_kpa + np.maximum(normal_stress - pore_pressure, 0.0) * np.tan(phi)
+    return resisting / shear_stress
+
+
+def _ground_level(x, height_m, crest_x):
+    return np.clip(x * (height_m / crest_x), 0.0, height_m)
+
+
+def _ground_intersections(xc, yc, r, height_m, crest_x):
+    """
+    x of the outermost intersections of each circle's lower arc with the ground
+    (toe floor y=0, face y=kx, crest y=H). Centres lie above the crest, so every
+    intersection is on the lower arc. ±inf where a circle never cuts the ground.
+    """
+    k = height_m / crest_x
+    candidates = []
+
+    # Toe floor, x <= 0
+    d = np.sqrt(np.maximum(r ** 2 - yc ** 2, 0.0))
+    ok = r > yc
+    for x in (xc - d, xc + d):
+        candidates.append(np.where(ok & (x <= 0.0), x, np.nan))
+
+    # Crest, x >= crest_x
+    d = np.sqrt(np.maximum(r ** 2 - (yc - height_m) ** 2, 0.0))
+    ok = r > yc - height_m
+    for x in (xc - d, xc + d):
+        candidates.append(np.where(ok & (x >= crest_x), x, np.nan))
+
+    # Face, 0 <= x <= crest_x: (1 + k²)x² - 2(xc + k·yc)x + (xc² + yc² - r²) = 0
+    a = 1.0 + k ** 2
+    bq = -2.0 * (xc + k * yc)
+    cq = xc ** 2 + yc ** 2 - r ** 2
+    disc = bq ** 2 - 4 * a * cq
+    sq = np.sqrt(np.maximum(disc, 0.0))
+    for x in ((-bq - sq) / (2 * a), (-bq + sq) / (2 * a)):
+        candidates.append(np.where((disc >= 0) & (x >= 0.0) & (x <= crest_x), x, np.nan))
+
+    candidates = np.column_stack(candidates)
+    missing = np.isnan(candidates)
+    x_exit = np.where(missing, np.inf, candidates).min(axis=1)
+    x_entry = np.where(missing, -np.inf, candidates).max(axis=1)
+    return x_exit, x_entry
+
+
+def trial_circles(height_m, slope_angle_deg, n_x=25, n_y=20, n_r=12):
+    """
+    Grid of trial circle centres above the slope and, per centre, radii from a
+    face exit just above the toe to a deep base circle. Returns (xc, yc, r) arrays.
+    """
+    crest_x = height_m / np.tan(np.radians(slope_angle_deg))
+    xc = np.linspace(-0.5 * height_m, crest_x + 0.5 * height_m, n_x)
+    yc = np.linspace(1.05 * height_m, 3.0 * height_m, n_y)
+    XC, YC = np.meshgrid(xc, yc, indexing="ij")
+
+    # Radius that passes through the toe, then scaled for face and base circles
+    r_toe = np.hypot(XC, YC)
+    scale = np.linspace(0.85, 1.25, n_r)
+    R = r_toe[..., None] * scale
+    XC = np.broadcast_to(XC[..., None], R.shape)
+    YC = np.broadcast_to(YC[..., None], R.shape)
+    return XC.ravel(), YC.ravel(), R.ravel()
+
+
+def bishop_simplified_search(height_m, cohesion_kpa, friction_angle_deg, unit_weight_kn_m3,
+                             slope_angle_deg, water_depth_ratio, n_slices=40,
+                             max_iterations=50, tolerance=1e-4, circles=None):
+    """
+    Bishop simplified method over a grid of trial slip circles.
+    Every circle and every slice is evaluated as one (n_circles, n_slices)
+    array; the FoS fixed-point iteration runs for all circles at once.
+    """
+    start = time.perf_counter()
+    crest_x = height_m / np.tan(np.radians(slope_angle_deg))
+    tan_phi = np.tan(np.radians(friction_angle_deg))
+    xc, yc, r = circles if circles is not None else trial_circles(height_m, slope_angle_deg)
+
+    # --- Where each circle leaves / re-enters the ground (closed form, per ground segment) ---
+    x_exit, x_entry = _ground_intersections(xc, yc, r, height_m, crest_x)
+    has_mass = np.isfinite(x_exit) & np.isfinite(x_entry) & (x_entry > x_exit)
+    x_exit = np.where(has_mass, x_exit, 0.0)
+    x_entry = np.where(has_mass, x_entry, 1.0)
+
+    # --- Slices between exit and entry ---
+    b = (x_entry - x_exit) / n_slices
+    x_mid = x_exit[:, None] + b[:, None] * (np.arange(n_slices) + 0.5)
+    dx = np.clip((x_mid - xc[:, None]) / r[:, None], -1.0, 1.0)
+    y_base = yc[:, None] - r[:, None] * np.sqrt(1.0 - dx ** 2)
+    h = np.maximum(_ground_level(x_mid, height_m, crest_x) - y_base, 0.0)
+
+    weight = unit_weight_kn_m3 * h * b[:, None]
+    sin_a = dx
+    cos_a = np.sqrt(1.0 - dx ** 2)
+    pore = GAMMA_W * water_depth_ratio * h
+    effective = np.maximum(weight - pore * b[:, None], 0.0)
+    resisting_num = cohesion_kpa * b[:, None] + effective * tan_phi
+    driving = (weight * sin_a).sum(axis=1)
+
+    valid = has_mass & (driving > 0) & (x_entry - x_exit > 0.05 * height_m) & (h.max(axis=1) > 0.1)
+
+    # --- Fixed-point iteration, all circles together ---
+    fos = np.full(xc.shape, 1.5)
+    safe_driving = np.where(valid, driving, 1.0)
+    for iteration in range(max_iterations):
+        # Cohesionless, low-friction circles can reach FoS 0: floor it before dividing
+        m_alpha = np.maximum(cos_a + sin_a * tan_phi / np.maximum(fos, 1e-6)[:, None], 0.2)
+        new_fos = (resisting_num / m_alpha).sum(axis=1) / safe_driving
+        converged = np.abs(new_fos - fos) < tolerance
+        fos = new_fos
+        if converged[valid].all():
+            break
+
+    fos = np.where(valid, fos, np.inf)
+    i = int(np.argmin(fos))
+    return {
+        "fos": float(fos[i]) if np.isfinite(fos[i]) else None,
+        "critical_circle": {
+            "center_x_m": float(xc[i]), "center_y_m": float(yc[i]), "radius_m": float(r[i]),
+            "exit_x_m": float(x_exit[i]), "entry_x_m": float(x_entry[i]),
+        },
+        "circles_evaluated": int(valid.sum()),
+        "iterations": iteration + 1,
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+    }
+
+
+def validate_section(height_m, slope_angle_deg, unit_weight_kn_m3, depth_m):
+    """Raise ValueError for a section both methods are undefined for."""
+    if not 0 < slope_angle_deg < 90:
+        raise ValueError("slope_angle must be between 0 and 90 degrees (exclusive)")
+    if not height_m > 0:
+        raise ValueError("height must be greater than 0")
+    if not unit_weight_kn_m3 > 0:
+        raise ValueError("unit_weight must be greater than 0")
+    if not depth_m > 0:
+        raise ValueError("depth_m must be greater than 0")
+
+
+def _finite_or_none(value):
+    value = float(value)
+    return value if np.isfinite(value) else None
+
+
+def factor_of_safety(height_m, cohesion_kpa, friction_angle_deg, unit_weight_kn_m3,
+                     slope_angle_deg, water_depth_ratio, depth_m=DEFAULT_INFINITE_SLOPE_DEPTH_M):
+    """Both methods for one slope section; a non-finite FoS is reported as None."""
+    validate_section(height_m, slope_angle_deg, unit_weight_kn_m3, depth_m)
+    return {
+        "infinite_slope": {
+            "fos": _finite_or_none(infinite_slope_fos(cohesion_kpa, friction_angle_deg, unit_weight_kn_m3,
+                                                      slope_angle_deg, water_depth_ratio, depth_m)),
+            "depth_m": depth_m,
+        },
+        "bishop_simplified": bishop_simplified_search(
+            height_m, cohesion_kpa, friction_angle_deg, unit_weight_kn_m3,
+            slope_angle_deg, water_depth_ratio,
+        ),
+    }
+
+
+if __name__ == "__main__":
+    # Mine 1 from Realtime_API/data/mines.csv (static fos 1.45)
+    print(factor_of_safety(42, 23, 31, 21, 37, 0.14))
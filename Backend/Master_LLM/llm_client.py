@@ -0,0 +1,195 @@
+import os
+import time
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Gemini calls running at once per client; each holds one dedicated thread
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+# Callers allowed to wait for a slot before new ones are turned away
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "64"))
+# Deadline per call (whole stream for streaming calls), queueing included
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+LATENCY_WINDOW = 500  # recent calls kept for percentiles
+
+# Every client by name, so /metrics can report all of them
+_CLIENTS = {}
+_DONE = object()
+
+
+class LLMTimeoutError(TimeoutError):
+    pass
+
+
+class LLMOverloadedError(RuntimeError):
+    pass
+
+
+def _percentile(values, q: float):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 2)
+
+
+# ---------------- Async LLM Client ----------------
+class LLMClient:
+    """
+    Runs the blocking Gemini SDK on its own bounded thread pool so a slow
+    generation never occupies the event loop or the shared FastAPI threadpool.
+    At most max_concurrency calls run, up to max_queue more wait, and every
+    call has a deadline; latency and outcome counters feed /metrics.
+    """
+
+    def __init__(self, name: str, max_concurrency: int = LLM_MAX_CONCURRENCY,
+                 max_queue: int = LLM_MAX_QUEUE, timeout: float = LLM_TIMEOUT_SECONDS):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix=f"llm-{name}")
+        self._semaphore = None
+        self.in_flight = 0
+        self.waiting = 0
+        self.counters = {"calls": 0, "ok": 0, "errors": 0, "timeouts": 0, "cancelled": 0, "rejected": 0}
+        self._latency_ms = deque(maxlen=LATENCY_WINDOW)
+        self._wait_ms = deque(maxlen=LATENCY_WINDOW)
+        _CLIENTS[name] = self
+
+    def _slots(self) -> asyncio.Semaphore:
+        # Created lazily so it belongs to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def _acquire(self, deadline: float):
+        slots = self._slots()
+        start = time.perf_counter()
+        if not slots.locked():
+            # Free slot: taken without suspending
+            await slots.acquire()
+        else:
+            if self.waiting >= self.max_queue:
+                self.counters["rejected"] += 1
+                raise LLMOverloadedError(f"{self.name}: {self.waiting} calls already waiting")
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(slots.acquire(), max(deadline - time.monotonic(), 0.001))
+            except asyncio.TimeoutError:
+                self.counters["calls"] += 1
+                self.counters["timeouts"] += 1
+                raise LLMTimeoutError(f"{self.name}: no free slot within {self.timeout}s")
+            finally:
+                self.waiting -= 1
+        self.counters["calls"] += 1
+        self._wait_ms.append((time.perf_counter() - start) * 1000)
+        self.in_flight += 1
+
+    def _release(self, start: float, outcome: str):
+        self.in_flight -= 1
+        self._slots().release()
+        self.counters[outcome] += 1
+        self._latency_ms.append((time.perf_counter() - start) * 1000)
+
+    async def run(self, fn, *args, timeout: float = None, **kwargs):
+        """Await fn(*args, **kwargs) run on the client's pool, within the deadline."""
+        deadline = time.monotonic() + (timeout or self.timeout)
+        await self._acquire(deadline)
+        start = time.perf_counter()
+        outcome = "errors"
+        loop = asyncio.get_running_loop()
+        future = self._pool.submit(fn, *args, **kwargs)
+        waiter = asyncio.wrap_future(future)
+        # An abandoned call's late error is not "never retrieved"
+        waiter.add_done_callback(lambda f: f.cancelled() or f.exception())
+        try:
+            try:
+                # Shielded: giving up on the result must not detach it from the slot
+                result = await asyncio.wait_for(asyncio.shield(waiter), max(deadline - time.monotonic(), 0.001))
+            except asyncio.TimeoutError:
+                outcome = "timeouts"
+                raise LLMTimeoutError(f"{self.name}: no response within {timeout or self.timeout}s")
+            outcome = "ok"
+            return result
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        finally:
+            # The slot stays taken until the call has actually finished on its thread
+            future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release, start, outcome))
+
+    async def send_message(self, chat, content, timeout: float = None, **kwargs):
+        """chat.send_message off the event loop; the SDK request carries the same deadline."""
+        timeout = timeout or self.timeout
+        return await self.run(chat.send_message, content, timeout=timeout,
+                              request_options={"timeout": timeout}, **kwargs)
+
+    async def stream(self, gen_fn, *args, timeout: float = None, **kwargs):
+        """
+        Async iterator over a blocking generator gen_fn(*args, **kwargs), which
+        runs on the client's pool for the whole stream (one slot, one deadline).
+        Stopping early closes the generator.
+        """
+        deadline = time.monotonic() + (timeout or self.timeout)
+        await self._acquire(deadline)
+        start = time.perf_counter()
+        outcome = "errors"
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        stop = threading.Event()
+
+        def produce():
+            gen = gen_fn(*args, **kwargs)
+            try:
+                for item in gen:
+                    if stop.is_set():
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, item)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                gen.close()
+                loop.call_soon_threadsafe(queue.put_nowait, _DONE)
+
+        producer = loop.run_in_executor(self._pool, produce)
+        try:
+            while True:
+                try:
+                    item = await asyncio.wait_for(queue.get(), max(deadline - time.monotonic(), 0.001))
+                except asyncio.TimeoutError:
+                    outcome = "timeouts"
+                    raise LLMTimeoutError(f"{self.name}: stream not finished within {timeout or self.timeout}s")
+                if item is _DONE:
+                    outcome = "ok"
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        except (GeneratorExit, asyncio.CancelledError):
+            # Consumer stopped early (e.g. client disconnected)
+            outcome = "cancelled"
+            raise
+        finally:
+            stop.set()
+            # The slot stays taken until the generator has actually stopped
+            producer.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release, start, outcome))
+
+    def stats(self) -> dict:
+        latency = list(self._latency_ms)
+        wait = list(self._wait_ms)
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "timeout_s": self.timeout,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            **self.counters,
+            "latency_ms_p50": _percentile(latency, 0.5),
+            "latency_ms_p95": _percentile(latency, 0.95),
+            "queue_wait_ms_p95": _percentile(wait, 0.95),
+        }
+
+
+def llm_client_stats() -> dict:
+    return {name: client.stats() for name, client in _CLIENTS.items()}
@@ -1,9 +1,15 @@
 # Realtime_API.py
 import requests
+import aiohttp
+import asyncio
 import os
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from datetime import datetime
 
+from Realtime_API.mine_registry import MineRegistry
+from Realtime_API.single_flight import SingleFlight, AsyncSingleFlight, request_key
+
 # Load environment variables from .env
 load_dotenv()
 
@@ -11,152 +17,250 @@ API_KEY = os.getenv("OWM_API_KEY")
 if not API_KEY:
     raise ValueError("❌ Missing OWM_API_KEY in .env file")
 
-# --- Mine Data (with Geotechnical Parameters) ---
-MINE_DATA = [
-    {
-        "id": 1, "latitude": 18.7100, "longitude": 81.0500,
-        "area_acres": 400, "sensors": 315, "active_sensors": 315,
-        "sync_accuracy": "97.8%", "update_rate": "2.4 ms",
-        "vertices": "1.9M", "triangles": "1.4M", "resolution": "1.1 cm³",
-        "last_update": "2 min ago", "render_time": "15.9 ms",
-        "memory_usage": "720 MB", "gpu_load": "31%",
-        "height_m": 42, "cohesion_kpa": 23, "friction_angle_deg": 31,
-        "unit_weight_kn_m3": 21, "slope_angle_deg": 37,
-        "water_depth_ratio": 0.14, "fos": 1.45
-    },
-    {
-        "id": 2, "latitude": 20.5610, "longitude": 81.0700,
-        "area_acres": 250, "sensors": 240, "active_sensors": 237,
-        "sync_accuracy": "96.3%", "update_rate": "3.2 ms",
-        "vertices": "1.4M", "triangles": "1.1M", "resolution": "1.3 cm³",
-        "last_update": "5 min ago", "render_time": "14.8 ms",
-        "memory_usage": "640 MB", "gpu_load": "27%",
-        "height_m": 35, "cohesion_kpa": 22, "friction_angle_deg": 30,
-        "unit_weight_kn_m3": 20, "slope_angle_deg": 36,
-        "water_depth_ratio": 0.13, "fos": 1.38
-    },
-    {
-        "id": 3, "latitude": 20.6697, "longitude": 79.2964,
-        "area_acres": 1000, "sensors": 480, "active_sensors": 472,
-        "sync_accuracy": "98.6%", "update_rate": "2.1 ms",
-        "vertices": "3.2M", "triangles": "2.5M", "resolution": "0.9 cm³",
-        "last_update": "1 min ago", "render_time": "18.2 ms",
-        "memory_usage": "980 MB", "gpu_load": "41%",
-        "height_m": 55, "cohesion_kpa": 28, "friction_angle_deg": 33,
-        "unit_weight_kn_m3": 22, "slope_angle_deg": 39,
-        "water_depth_ratio": 0.16, "fos": 1.62
-    },
-    {
-        "id": 4, "latitude": 16.1972, "longitude": 76.6602,
-        "area_acres": 460, "sensors": 350, "active_sensors": 345,
-        "sync_accuracy": "95.9%", "update_rate": "3.9 ms",
-        "vertices": "2.0M", "triangles": "1.5M", "resolution": "1.2 cm³",
-        "last_update": "7 min ago", "render_time": "16.3 ms",
-        "memory_usage": "760 MB", "gpu_load": "32%",
-        "height_m": 44, "cohesion_kpa": 24, "friction_angle_deg": 32,
-        "unit_weight_kn_m3": 21, "slope_angle_deg": 38,
-        "water_depth_ratio": 0.15, "fos": 1.49
-    },
-    {
-        "id": 5, "latitude": 22.6500, "longitude": 86.3500,
-        "area_acres": 950, "sensors": 470, "active_sensors": 466,
-        "sync_accuracy": "98.1%", "update_rate": "1.8 ms",
-        "vertices": "3.1M", "triangles": "2.4M", "resolution": "1.0 cm³",
-        "last_update": "3 min ago", "render_time": "17.1 ms",
-        "memory_usage": "940 MB", "gpu_load": "39%",
-        "height_m": 53, "cohesion_kpa": 27, "friction_angle_deg": 33,
-        "unit_weight_kn_m3": 22, "slope_angle_deg": 39,
-        "water_depth_ratio": 0.15, "fos": 1.58
-    },
-    {
-        "id": 6, "latitude": 23.7406, "longitude": 86.4146,
-        "area_acres": 390, "sensors": 300, "active_sensors": 296,
-        "sync_accuracy": "96.7%", "update_rate": "2.9 ms",
-        "vertices": "1.8M", "triangles": "1.3M", "resolution": "1.2 cm³",
-        "last_update": "6 min ago", "render_time": "15.5 ms",
-        "memory_usage": "710 MB", "gpu_load": "30%",
-        "height_m": 41, "cohesion_kpa": 23, "friction_angle_deg": 31,
-        "unit_weight_kn_m3": 21, "slope_angle_deg": 37,
-        "water_depth_ratio": 0.14, "fos": 1.42
-    },
-    {
-        "id": 7, "latitude": 27.9833, "longitude": 75.7833,
-        "area_acres": 250, "sensors": 230, "active_sensors": 227,
-        "sync_accuracy": "97.2%", "update_rate": "4.3 ms",
-        "vertices": "1.5M", "triangles": "1.2M", "resolution": "1.3 cm³",
-        "last_update": "8 min ago", "render_time": "14.9 ms",
-        "memory_usage": "650 MB", "gpu_load": "28%",
-        "height_m": 34, "cohesion_kpa": 21, "friction_angle_deg": 30,
-        "unit_weight_kn_m3": 20, "slope_angle_deg": 36,
-        "water_depth_ratio": 0.13, "fos": 1.36
-    },
-    {
-        "id": 8, "latitude": 22.3545, "longitude": 82.6872,
-        "area_acres": 700, "sensors": 420, "active_sensors": 415,
-        "sync_accuracy": "99.1%", "update_rate": "1.6 ms",
-        "vertices": "2.6M", "triangles": "2.0M", "resolution": "1.0 cm³",
-        "last_update": "4 min ago", "render_time": "17.6 ms",
-        "memory_usage": "880 MB", "gpu_load": "36%",
-        "height_m": 49, "cohesion_kpa": 26, "friction_angle_deg": 32,
-        "unit_weight_kn_m3": 22, "slope_angle_deg": 38,
-        "water_depth_ratio": 0.15, "fos": 1.55
-    },
-    {
-        "id": 9, "latitude": 20.0681, "longitude": 79.3583,
-        "area_acres": 450, "sensors": 340, "active_sensors": 336,
-        "sync_accuracy": "95.8%", "update_rate": "3.5 ms",
-        "vertices": "2.0M", "triangles": "1.5M", "resolution": "1.2 cm³",
-        "last_update": "9 min ago", "render_time": "16.1 ms",
-        "memory_usage": "750 MB", "gpu_load": "33%",
-        "height_m": 43, "cohesion_kpa": 24, "friction_angle_deg": 31,
-        "unit_weight_kn_m3": 21, "slope_angle_deg": 37,
-        "water_depth_ratio": 0.14, "fos": 1.47
-    },
-    {
-        "id": 10, "latitude": 24.4766, "longitude": 74.8726,
-        "area_acres": 400, "sensors": 310, "active_sensors": 307,
-        "sync_accuracy": "96.9%", "update_rate": "2.7 ms",
-        "vertices": "1.9M", "triangles": "1.4M", "resolution": "1.1 cm³",
-        "last_update": "10 min ago", "render_time": "15.7 ms",
-        "memory_usage": "725 MB", "gpu_load": "31%",
-        "height_m": 42, "cohesion_kpa": 23, "friction_angle_deg": 31,
-        "unit_weight_kn_m3": 21, "slope_angle_deg": 37,
-        "water_depth_ratio": 0.14, "fos": 1.44
+# --- Mine Registry (Realtime_API/data/mines.csv, hot-reloaded on change) ---
+mine_registry = MineRegistry()
+# A request within this distance of a mine is treated as that mine
+MINE_MATCH_RADIUS_KM = float(os.getenv("MINE_MATCH_RADIUS_KM", "5"))
+
+
+def list_mines() -> list:
+    """Every registered mine as a record dict."""
+    return mine_registry.records()
+
+
+def find_mine_by_id(mine_id: int):
+    """Return the mine with this id, or None."""
+    return mine_registry.by_id(mine_id)
+
+
+def find_mine_data(lat: float, lon: float, max_km: float = MINE_MATCH_RADIUS_KM):
+    """Return the nearest mine within max_km of lat/lon, else placeholders."""
+    match = mine_registry.nearest(lat, lon, max_km)
+    if match is None:
+        return mine_registry.empty_record()
+    return match[0]
+
+
+def find_mines_near(lat: float, lon: float, radius_km: float) -> list:
+    """Mines within radius_km, nearest first, each with its distance_km."""
+    return [{**mine, "distance_km": round(d, 3)} for mine, d in mine_registry.within_radius(lat, lon, radius_km)]
+
+
+def find_mines_in_bbox(min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> list:
+    return mine_registry.in_bbox(min_lat, min_lon, max_lat, max_lon)
+
+
+# Shared pool so the three upstream calls of get_weather run concurrently
+_UPSTREAM_POOL = ThreadPoolExecutor(max_workers=12, thread_name_prefix="realtime-upstream")
+
+UPSTREAM_TIMEOUT_SECONDS = 5
+# Open connections the async client keeps to upstream hosts
+UPSTREAM_MAX_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", "32"))
+
+
+# --- Upstream requests (one source each): (url, params) + response parser ---
+def _current_weather_request(lat: float, lon: float):
+    """OpenWeatherMap: current weather."""
+    owm_url = "https://api.openweathermap.org/data/2.5/weather"
+    owm_params = {
+        "lat": lat,
+        "lon": lon,
+        "appid": API_KEY,
+        "units": "metric"
     }
-]
+    return owm_url, owm_params
 
 
-def find_mine_data(lat: float, lon: float):
-    """Return mine data if lat/lon matches, else placeholders."""
-    for mine in MINE_DATA:
-        if round(mine["latitude"], 4) == round(lat, 4) and round(mine["longitude"], 4) == round(lon, 4):
-            return mine
-    return {key: None for key in MINE_DATA[0].keys()}
+def _daily_rainfall_request(lat: float, lon: float):
+    """Open-Meteo: 7-day daily precipitation_sum forecast."""
+    om_url = "https://api.open-meteo.com/v1/forecast"
+    om_params = {
+        "latitude": lat,
+        "longitude": lon,
+        "daily": "precipitation_sum",
+        "forecast_days": 7,
+        "timezone": "auto"
+    }
+    return om_url, om_params
 
 
-def get_weather(lat: float = None, lon: float = None):
+def _parse_daily_rainfall(om_data: dict) -> list:
+    return om_data.get("daily", {}).get("precipitation_sum", [])
+
+
+def _earthquakes_request(lat: float, lon: float):
+    """Open-Meteo: earthquakes in the past day."""
+    eq_url = "https://earthquake-api.open-meteo.com/v1/earthquakes"
+    eq_params = {
+        "latitude": lat,
+        "longitude": lon,
+        "past_days": 1,
+        "min_magnitude": 2
+    }
+    return eq_url, eq_params
+
+
+def _parse_earthquakes(eq_data: dict) -> list:
+    return eq_data.get("earthquakes", [])
+
+
+# Identical lookups issued while one is in flight share its response (e.g. a shift
+# opening dozens of dashboards on the same mine at once)
+upstream_flight = SingleFlight("realtime_upstream")
+upstream_flight_async = AsyncSingleFlight("realtime_upstream_async")
+
+
+def _get_json_uncoalesced(url: str, params: dict) -> dict:
+    resp = requests.get(url, params=params, timeout=UPSTREAM_TIMEOUT_SECONDS)
+    resp.raise_for_status()
+    return resp.json()
+
+
+def _get_json(url: str, params: dict) -> dict:
+    return upstream_flight.do(request_key("GET", url, params), _get_json_uncoalesced, url, params)
+
+
+def _fetch_current_weather(lat: float, lon: float) -> dict:
+    return _get_json(*_current_weather_request(lat, lon))
+
+
+def _fetch_daily_rainfall(lat: float, lon: float) -> list:
+    return _parse_daily_rainfall(_get_json(*_daily_rainfall_request(lat, lon)))
+
+
+def _fetch_earthquakes(lat: float, lon: float) -> list:
+    return _parse_earthquakes(_get_json(*_earthquakes_request(lat, lon)))
+
+
+# --- Shared async HTTP client (one connection pool per process) ---
+_http_session = None
+
+
+def get_http_session() -> aiohttp.ClientSession:
+    """Lazily create the pooled aiohttp session; must be called inside the event loop."""
+    global _http_session
+    if _http_session is None or _http_session.closed:
+        _http_session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=UPSTREAM_TIMEOUT_SECONDS),
+            connector=aiohttp.TCPConnector(limit=UPSTREAM_MAX_CONNECTIONS, ttl_dns_cache=300),
+        )
+    return _http_session
+
+
+async def close_http_session():
+    global _http_session
+    if _http_session is not None and not _http_session.closed:
+        await _http_session.close()
+    _http_session = None
+
+
+async def _get_json_async_uncoalesced(url: str, params: dict) -> dict:
+    async with get_http_session().get(url, params=params) as resp:
+        resp.raise_for_status()
+        return await resp.json(content_type=None)
+
+
+async def _get_json_async(url: str, params: dict) -> dict:
+    return await upstream_flight_async.do(request_key("GET", url, params), _get_json_async_uncoalesced, url, params)
+
+
+async def _fetch_current_weather_async(lat: float, lon: float) -> dict:
+    return await _get_json_async(*_current_weather_request(lat, lon))
+
+
+async def _fetch_daily_rainfall_async(lat: float, lon: float) -> list:
+    return _parse_daily_rainfall(await _get_json_async(*_daily_rainfall_request(lat, lon)))
+
+
+async def _fetch_earthquakes_async(lat: float, lon: float) -> list:
+    return _parse_earthquakes(await _get_json_async(*_earthquakes_request(lat, lon)))
+
+
+def _daily_forecast_request(lat, lon, past_days: int = 6, forecast_days: int = 7):
+    """Open-Meteo: daily rainfall and mean temperature, past_days of history + forecast_days ahead."""
+    om_url = "https://api.open-meteo.com/v1/forecast"
+    om_params = {
+        "latitude": lat,
+        "longitude": lon,
+        "daily": "precipitation_sum,temperature_2m_mean",
+        "past_days": past_days,
+        "forecast_days": forecast_days,
+        "timezone": "auto"
+    }
+    return om_url, om_params
+
+
+def _parse_daily_forecast(om_data: dict) -> dict:
+    daily = om_data.get("daily", {})
+    return {
+        "dates": daily.get("time", []),
+        "precipitation_sum": daily.get("precipitation_sum", []),
+        "temperature_2m_mean": daily.get("temperature_2m_mean", []),
+    }
+
+
+# --- Open-Meteo multi-location requests (comma-separated coordinates) ---
+# Locations per request; keeps the URL well under upstream limits
+OPEN_METEO_BULK_CHUNK = int(os.getenv("OPEN_METEO_BULK_CHUNK", "100"))
+
+
+async def _fetch_open_meteo_bulk_async(request_fn, parse_fn, points: list, chunk_size: int = OPEN_METEO_BULK_CHUNK,
+                                       **request_kwargs) -> list:
+    """
+    One parsed result per (lat, lon) in points, in the same order, fetched with
+    ceil(len(points) / chunk_size) concurrent requests. Points of a chunk whose
+    request failed get that exception in their slot.
+    """
+    chunks = [points[i:i + chunk_size] for i in range(0, len(points), chunk_size)]
+
+    async def fetch_chunk(chunk):
+        lats = ",".join(f"{lat:.4f}" for lat, _ in chunk)
+        lons = ",".join(f"{lon:.4f}" for _, lon in chunk)
+        data = await _get_json_async(*request_fn(lats, lons, **request_kwargs))
+        # A single location comes back as an object, several as a list
+        locations = data if isinstance(data, list) else [data]
+        if len(locations) != len(chunk):
+            raise ValueError(f"Open-Meteo returned {len(locations)} locations for {len(chunk)}")
+        return [parse_fn(location) for location in locations]
+
+    responses = await asyncio.gather(*(fetch_chunk(chunk) for chunk in chunks), return_exceptions=True)
+    results = []
+    for chunk, response in zip(chunks, responses):
+        results.extend(response if not isinstance(response, Exception) else [response] * len(chunk))
+    return results
+
+
+async def fetch_daily_rainfall_bulk_async(points: list) -> list:
+    """7-day daily precipitation_sum per (lat, lon)."""
+    return await _fetch_open_meteo_bulk_async(_daily_rainfall_request, _parse_daily_rainfall, points)
+
+
+async def fetch_daily_forecast_bulk_async(points: list, past_days: int = 6, forecast_days: int = 7) -> list:
+    """Daily rainfall and mean temperature for many (lat, lon) points in chunked multi-location requests."""
+    return await _fetch_open_meteo_bulk_async(
+        _daily_forecast_request, _parse_daily_forecast, points,
+        past_days=past_days, forecast_days=forecast_days,
+    )
+
+
+def _resolve_location(lat: float = None, lon: float = None):
     # Default to Gokul Open Pit Mine, Nagpur
     default_lat, default_lon = 20.6697222, 79.2963889
     if lat is None or lon is None:
-        lat, lon = default_lat, default_lon
-        location_name = "Gokul Open Pit Mine, Nagpur"
-    else:
-        location_name = f"{lat}, {lon}"
+        return default_lat, default_lon, "Gokul Open Pit Mine, Nagpur"
+    return lat, lon, f"{lat}, {lon}"
+
 
+def _merge_weather(lat: float, lon: float, location_name: str, owm_result, rain_result, eq_result) -> dict:
+    """
+    Combine the three upstream results (each a value or the exception it raised)
+    with the mine record. OWM is required; rainfall and earthquakes degrade.
+    eq_result may also be a ready vibration estimate from the regional earthquake feed.
+    """
     # --- OpenWeatherMap: Current Weather ---
-    try:
-        owm_url = "https://api.openweathermap.org/data/2.5/weather"
-        owm_params = {
-            "lat": lat,
-            "lon": lon,
-            "appid": API_KEY,
-            "units": "metric"
-        }
-        owm_resp = requests.get(owm_url, params=owm_params, timeout=5)
-        owm_resp.raise_for_status()
-        owm_data = owm_resp.json()
-    except Exception as e:
-        raise RuntimeError(f"❌ Failed to fetch weather data from OpenWeatherMap: {e}")
+    if isinstance(owm_result, Exception):
+        raise RuntimeError(f"❌ Failed to fetch weather data from OpenWeatherMap: {owm_result}")
+    owm_data = owm_result
 
     main = owm_data.get("main", {})
     wind = owm_data.get("wind", {})
@@ -171,38 +275,21 @@ def get_weather(lat: float = None, lon: float = None):
     # --- Open-Meteo: 7-day Rainfall Forecast ---
     total_rain_7d = 0.0
     try:
-        om_url = "https://api.open-meteo.com/v1/forecast"
-        om_params = {
-            "latitude": lat,
-            "longitude": lon,
-            "daily": "precipitation_sum",
-            "forecast_days": 7,
-            "timezone": "auto"
-        }
-        om_resp = requests.get(om_url, params=om_params, timeout=5)
-        om_resp.raise_for_status()
-        om_data = om_resp.json()
-        daily_rain = om_data.get("daily", {}).get("precipitation_sum", [])
-        total_rain_7d = round(sum(daily_rain), 2) if daily_rain else 0.0
+        if isinstance(rain_result, Exception):
+            raise rain_result
+        total_rain_7d = round(sum(rain_result), 2) if rain_result else 0.0
     except Exception as e:
         print(f"⚠️ Could not fetch rainfall data: {e}")
 
-    # --- Open-Meteo: Earthquake Data ---
+    # --- Earthquake Data: regional-feed estimate (a number) or the per-point event list ---
     vibration = 0.0
     try:
-        eq_url = "https://earthquake-api.open-meteo.com/v1/earthquakes"
-        eq_params = {
-            "latitude": lat,
-            "longitude": lon,
-            "past_days": 1,
-            "min_magnitude": 2
-        }
-        eq_resp = requests.get(eq_url, params=eq_params, timeout=5)
-        eq_resp.raise_for_status()
-        eq_data = eq_resp.json()
-        earthquakes = eq_data.get("earthquakes", [])
-        if earthquakes:
-            nearest_eq = earthquakes[0]
+        if isinstance(eq_result, Exception):
+            raise eq_result
+        if isinstance(eq_result, (int, float)):
+            vibration = round(float(eq_result), 3)
+        elif eq_result:
+            nearest_eq = eq_result[0]
             magnitude = nearest_eq.get("magnitude", 0)
             distance = nearest_eq.get("distance", 100)
             vibration = round(magnitude / (max(1, (distance + 1) ** 0.5)), 3)
@@ -228,6 +315,41 @@ def get_weather(lat: float = None, lon: float = None):
     }
 
 
+def _result_or_exception(future):
+    try:
+        return future.result()
+    except Exception as e:
+        return e
+
+
+def get_weather(lat: float = None, lon: float = None):
+    lat, lon, location_name = _resolve_location(lat, lon)
+
+    # Issue all three upstream calls at once: latency is the slowest source, not the sum
+    owm_future = _UPSTREAM_POOL.submit(_fetch_current_weather, lat, lon)
+    rain_future = _UPSTREAM_POOL.submit(_fetch_daily_rainfall, lat, lon)
+    eq_future = _UPSTREAM_POOL.submit(_fetch_earthquakes, lat, lon)
+
+    return _merge_weather(
+        lat, lon, location_name,
+        _result_or_exception(owm_future),
+        _result_or_exception(rain_future),
+        _result_or_exception(eq_future),
+    )
+
+
+async def get_weather_async(lat: float = None, lon: float = None):
+    """Same result as get_weather, fetched with non-blocking I/O over the shared aiohttp session."""
+    lat, lon, location_name = _resolve_location(lat, lon)
+    owm_result, rain_result, eq_result = await asyncio.gather(
+        _fetch_current_weather_async(lat, lon),
+        _fetch_daily_rainfall_async(lat, lon),
+        _fetch_earthquakes_async(lat, lon),
+        return_exceptions=True,
+    )
+    return _merge_weather(lat, lon, location_name, owm_result, rain_result, eq_result)
+
+
 def main():
     data = get_weather()
     print("\n📡 Realtime Weather + Mine Data:\n" + "-"*30)
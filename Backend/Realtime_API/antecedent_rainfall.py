@@ -0,0 +1,191 @@
+import os
+import time
+import asyncio
+from datetime import date, datetime, timezone
+
+from Realtime_API.Realtime_API import list_mines, fetch_daily_forecast_bulk_async, OPEN_METEO_BULK_CHUNK
+
+# Antecedent windows (days, ending today) kept per mine; 7 is the model's rainfall_mm_7d
+ANTECEDENT_WINDOWS = (7, 14, 30, 90)
+# Seconds between refreshes (0 disables the task); only days not yet held are fetched
+ANTECEDENT_REFRESH_SECONDS = float(os.getenv("ANTECEDENT_REFRESH_SECONDS", "3600"))
+# Open-Meteo serves at most 92 past days
+OPEN_METEO_MAX_PAST_DAYS = 92
+
+
+# ---------------- Per-mine Accumulator ----------------
+class RainfallAccumulator:
+    """
+    Daily rainfall totals for consecutive days in a ring of max(windows) slots,
+    with a running sum per window. Appending a day or revising one already held
+    (today's partial total, late corrections) updates every sum in O(1).
+    """
+
+    def __init__(self, windows=ANTECEDENT_WINDOWS):
+        self.windows = tuple(sorted(windows))
+        self.capacity = self.windows[-1]
+        self._ring = [0.0] * self.capacity
+        self._count = 0         # days ever pushed; day k lives at k % capacity
+        self.last_date = None   # date of the newest day held
+        self.sums = {w: 0.0 for w in self.windows}
+        self.gap_days = 0       # days upstream skipped, counted as 0 mm
+
+    def days_held(self) -> int:
+        return min(self._count, self.capacity)
+
+    def _push(self, mm: float):
+        c = self._count
+        for w in self.windows:
+            if c >= w:
+                # The day sliding out of this window
+                self.sums[w] -= self._ring[(c - w) % self.capacity]
+            self.sums[w] += mm
+        self._ring[c % self.capacity] = mm
+        self._count += 1
+        if self._count % self.capacity == 0:
+            self._resync()
+
+    def _revise(self, age: int, mm: float):
+        """Replace the total of the day `age` days before last_date."""
+        slot = (self._count - 1 - age) % self.capacity
+        delta = mm - self._ring[slot]
+        self._ring[slot] = mm
+        for w in self.windows:
+            if age < w:
+                self.sums[w] += delta
+
+    def _resync(self):
+        # Recompute once per ring cycle so float add/subtract drift cannot build up
+        held = self.days_held()
+        newest_first = [self._ring[(self._count - 1 - i) % self.capacity] for i in range(held)]
+        self.sums = {w: float(sum(newest_first[:w])) for w in self.windows}
+
+    def update(self, dates: list, values: list) -> int:
+        """Merge an ascending daily series (ISO dates); returns the number of new days."""
+        added = 0
+        for day_str, value in zip(dates, values):
+            day = date.fromisoformat(day_str)
+            mm = 0.0 if value is None else float(value)
+            if self.last_date is None:
+                self._push(mm)
+                self.last_date = day
+                added += 1
+                continue
+            offset = (day - self.last_date).days
+            if offset <= 0:
+                if -offset < self.days_held():
+                    self._revise(-offset, mm)
+                continue
+            for _ in range(offset - 1):
+                self._push(0.0)
+                self.gap_days += 1
+            self._push(mm)
+            self.last_date = day
+            added += 1
+        return added
+
+    def past_days_needed(self, today: date) -> int:
+        """past_days to request so the series reaches today and re-reads the last (partial) day."""
+        if self.last_date is None:
+            return self.capacity - 1
+        # +1: the mine's local date may be ahead of UTC, and the newest held day was partial
+        return max(0, min((today - self.last_date).days + 1, self.capacity - 1, OPEN_METEO_MAX_PAST_DAYS))
+
+    def features(self) -> dict:
+        return {
+            **{f"rainfall_mm_{w}d": round(self.sums[w], 2) for w in self.windows},
+            "as_of": self.last_date.isoformat() if self.last_date else None,
+            "days_held": self.days_held(),
+        }
+
+
+# ---------------- Fleet Index ----------------
+class AntecedentRainfallIndex:
+    """
+    One RainfallAccumulator per registered mine, topped up on a schedule.
+    Mines that need the same number of past days are fetched together in
+    multi-location Open-Meteo requests, so a steady-state refresh asks for
+    one or two days per mine in a handful of calls.
+    """
+
+    def __init__(self, interval: float = ANTECEDENT_REFRESH_SECONDS, windows=ANTECEDENT_WINDOWS):
+        self.interval = interval
+        self.windows = windows
+        self._accumulators = {}
+        self._task = None
+        self.refreshes = 0
+        self.requests = 0
+        self.days_fetched = 0
+        self.errors = 0
+        self.last_refresh_ms = None
+
+    def features(self, mine_id: int):
+        """rainfall_mm_<w>d for every window, or None before the mine's first fetch."""
+        accumulator = self._accumulators.get(mine_id)
+        if accumulator is None or accumulator.last_date is None:
+            return None
+        return accumulator.features()
+
+    async def refresh(self):
+        start = time.perf_counter()
+        mines = list_mines()
+        registered = {m["id"] for m in mines}
+        for mine_id in list(self._accumulators):
+            if mine_id not in registered:
+                del self._accumulators[mine_id]
+
+        today = datetime.now(timezone.utc).date()
+        groups = {}
+        for mine in mines:
+            accumulator = self._accumulators.setdefault(mine["id"], RainfallAccumulator(self.windows))
+            groups.setdefault(accumulator.past_days_needed(today), []).append(mine)
+
+        for past_days, group in groups.items():
+            points = [(m["latitude"], m["longitude"]) for m in group]
+            results = await fetch_daily_forecast_bulk_async(points, past_days=past_days, forecast_days=1)
+            self.requests += -(-len(points) // OPEN_METEO_BULK_CHUNK)
+            for mine, result in zip(group, results):
+                if isinstance(result, Exception):
+                    self.errors += 1
+                    continue
+                self._accumulators[mine["id"]].update(result["dates"], result["precipitation_sum"])
+                self.days_fetched += len(result["dates"])
+
+        self.refreshes += 1
+        self.last_refresh_ms = round((time.perf_counter() - start) * 1000, 2)
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"⚠️ Antecedent rainfall refresh failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "interval_s": self.interval,
+            "windows_days": list(self.windows),
+            "mines": len(self._accumulators),
+            "refreshes": self.refreshes,
+            "requests": self.requests,
+            "days_fetched": self.days_fetched,
+            "errors": self.errors,
+            "last_refresh_ms": self.last_refresh_ms,
+        }
+
+
+antecedent_rainfall = AntecedentRainfallIndex()
@@ -0,0 +1,274 @@
+import os
+import time
+import asyncio
+import threading
+from datetime import datetime, timedelta, timezone
+import numpy as np
+
+from Realtime_API.Realtime_API import mine_registry, _get_json_async
+from Realtime_API.spatial_index import haversine_km, KM_PER_DEG_LAT
+
+# USGS FDSN event service: one bounding-box query covers every registered mine
+USGS_EVENTS_URL = "https://earthquake.usgs.gov/fdsnws/event/1/query"
+
+EARTHQUAKE_REFRESH_SECONDS = float(os.getenv("EARTHQUAKE_REFRESH_SECONDS", "300"))
+EARTHQUAKE_LOOKBACK_HOURS = float(os.getenv("EARTHQUAKE_LOOKBACK_HOURS", "24"))
+EARTHQUAKE_MIN_MAGNITUDE = float(os.getenv("EARTHQUAKE_MIN_MAGNITUDE", "2"))
+# Events this far outside the fleet's bounding box can still shake a mine
+EARTHQUAKE_REGION_PAD_KM = float(os.getenv("EARTHQUAKE_REGION_PAD_KM", "500"))
+
+# ---- Attenuation: log10 PGV[mm/s] = A + B*M - C*log10(R), R = sqrt(epi² + depth² + H²) ----
+PGV_A = 0.0
+PGV_B = 0.6
+PGV_C = 1.4
+PGV_NEAR_SOURCE_KM = 6.0   # H: saturation term so PGV stays finite at the epicentre
+
+
+def peak_ground_velocity(magnitude, epicentral_km, depth_km):
+    """Estimated peak ground velocity in mm/s; broadcasts over arrays (e.g. mines x events)."""
+    r = np.sqrt(epicentral_km ** 2 + depth_km ** 2 + PGV_NEAR_SOURCE_KM ** 2)
+    return 10.0 ** (PGV_A + PGV_B * magnitude - PGV_C * np.log10(r))
+
+
+def _parse_usgs_events(data: dict) -> dict:
+    features = data.get("features", [])
+    mags, lats, lons, depths, times, places = [], [], [], [], [], []
+    for feature in features:
+        props = feature.get("properties") or {}
+        coords = (feature.get("geometry") or {}).get("coordinates") or []
+        if props.get("mag") is None or len(coords) < 2:
+            continue
+        mags.append(props["mag"])
+        lons.append(coords[0])
+        lats.append(coords[1])
+        depths.append(coords[2] if len(coords) > 2 and coords[2] is not None else 10.0)
+        times.append(props.get("time"))
+        places.append(props.get("place"))
+    return {
+        "magnitude": np.array(mags, dtype=np.float64),
+        "latitude": np.array(lats, dtype=np.float64),
+        "longitude": np.array(lons, dtype=np.float64),
+        "depth_km": np.array(depths, dtype=np.float64),
+        "time_ms": times,
+        "place": places,
+    }
+
+
+# ---------------- Regional Earthquake Feed ----------------
+class _FeedState:
+    """One refresh worth of data; replaced wholesale, never modified."""
+
+    def __init__(self, events: dict, region, snapshot, vibration, dominant):
+        self.events = events
+        self.region = region      # (min_lat, min_lon, max_lat, max_lon) the events cover
+        self.snapshot = snapshot  # registry snapshot the fleet arrays were scored against
+        self.vibration = vibration
+        self.dominant = dominant
+
+
+def _vibration_matrix(events: dict, lats, lons):
+    """Worst-event PGV per point and that event's index, from (points x events) blocks."""
+    lats, lons = np.asarray(lats, dtype=np.float64), np.asarray(lons, dtype=np.float64)
+    n_events = events["magnitude"].size
+    if n_events == 0:
+        return np.zeros(lats.size), np.full(lats.size, -1)
+
+    vibration = np.empty(lats.size)
+    dominant = np.empty(lats.size, dtype=np.int64)
+    # Bound each block to ~1M distances regardless of fleet and event count
+    step = max(1, 1_000_000 // n_events)
+    for start in range(0, lats.size, step):
+        rows = slice(start, start + step)
+        distances = haversine_km(
+            lats[rows, None], lons[rows, None], events["latitude"][None, :], events["longitude"][None, :]
+        )
+        pgv = peak_ground_velocity(events["magnitude"][None, :], distances, events["depth_km"][None, :])
+        dominant[rows] = pgv.argmax(axis=1)
+        vibration[rows] = np.take_along_axis(pgv, dominant[rows, None], axis=1)[:, 0]
+    return vibration, dominant
+
+
+def _score_fleet(events: dict, region, snapshot) -> _FeedState:
+    vibration, dominant = _vibration_matrix(events, snapshot.columns["latitude"], snapshot.columns["longitude"])
+    return _FeedState(events, region, snapshot, vibration, dominant)
+
+
+class RegionalEarthquakeFeed:
+    """
+    Pulls every event around the fleet once per interval and keeps them as
+    arrays. Vibration for all mines is one (mines x events) haversine +
+    attenuation pass, computed in a worker thread and swapped in as a whole;
+    per-mine lookups are then array indexing with no network call. After a
+    registry reload, lookups keep using the previous arrays while the fleet
+    is rescored in the background.
+    """
+
+    def __init__(self, interval: float = EARTHQUAKE_REFRESH_SECONDS):
+        self.interval = interval
+        self._state = None        # _FeedState, swapped in one assignment
+        self._task = None
+        self._loop = None
+        self._rescore_task = None
+        self._rescore_lock = threading.Lock()
+        self.updated_at = None
+        self.refreshes = 0
+        self.rescores = 0
+        self.errors = 0
+        self.last_error = None
+
+    def ready(self) -> bool:
+        return self._state is not None
+
+    def _fleet_region(self):
+        lats, lons = mine_registry.column("latitude"), mine_registry.column("longitude")
+        pad_lat = EARTHQUAKE_REGION_PAD_KM / KM_PER_DEG_LAT
+        pad_lon = pad_lat / max(float(np.cos(np.radians(min(np.abs(lats).max() + pad_lat, 89.0)))), 0.1)
+        return (
+            max(float(lats.min()) - pad_lat, -90.0), max(float(lons.min()) - pad_lon, -180.0),
+            min(float(lats.max()) + pad_lat, 90.0), min(float(lons.max()) + pad_lon, 180.0),
+        )
+
+    async def refresh(self):
+        region = self._fleet_region()
+        start = datetime.now(timezone.utc) - timedelta(hours=EARTHQUAKE_LOOKBACK_HOURS)
+        params = {
+            "format": "geojson",
+            "starttime": start.strftime("%Y-%m-%dT%H:%M:%S"),
+            "minmagnitude": EARTHQUAKE_MIN_MAGNITUDE,
+            "minlatitude": region[0],
+            "minlongitude": region[1],
+            "maxlatitude": region[2],
+            "maxlongitude": region[3],
+            "orderby": "time",
+        }
+        events = _parse_usgs_events(await _get_json_async(USGS_EVENTS_URL, params))
+        # Score the whole fleet off the event loop; lookups keep the previous state until the swap
+        self._state = await asyncio.to_thread(_score_fleet, events, region, mine_registry.snapshot())
+        self.updated_at = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        self.refreshes += 1
+
+    async def _rescore(self):
+        try:
+            state = self._state
+            fresh = await asyncio.to_thread(_score_fleet, state.events, state.region, mine_registry.snapshot())
+            # A refresh that finished meanwhile already scored newer events
+            if self._state is state:
+                self._state = fresh
+                self.rescores += 1
+        except Exception as e:
+            self.errors += 1
+            self.last_error = str(e)
+            print(f"⚠️ Rescoring the fleet for earthquake vibration failed: {e}")
+        finally:
+            self._rescore_task = None
+
+    def _start_rescore(self):
+        if self._rescore_task is None:
+            self._rescore_task = asyncio.create_task(self._rescore())
+
+    def _current(self):
+        """The state to serve; asks for a background rescore if the registry reloaded since."""
+        state = self._state
+        if state is not None and state.snapshot is not mine_registry.snapshot() and self._loop is not None:
+            # Lookups also run in threadpool workers, so hand the rescore to the loop
+            with self._rescore_lock:
+                if self._rescore_task is None:
+                    self._loop.call_soon_threadsafe(self._start_rescore)
+        return state
+
+    # ---- Lookups (no network) ----
+    @staticmethod
+    def _covers(state, lat: float, lon: float) -> bool:
+        if state is None:
+            return False
+        min_lat, min_lon, max_lat, max_lon = state.region
+        return min_lat <= lat <= max_lat and min_lon <= lon <= max_lon
+
+    def covers(self, lat: float, lon: float) -> bool:
+        return self._covers(self._state, lat, lon)
+
+    def vibration_for_mine(self, mine_id: int):
+        """Estimated PGV (mm/s) at a registered mine, or None if the feed does not know it yet."""
+        state = self._current()
+        if state is None:
+            return None
+        i = state.snapshot.position(mine_id)
+        return None if i is None else float(state.vibration[i])
+
+    def vibration_at(self, lat: float, lon: float):
+        """Estimated PGV (mm/s) at any point inside the feed region, else None."""
+        state = self._state
+        if not self._covers(state, lat, lon):
+            return None
+        return float(_vibration_matrix(state.events, [lat], [lon])[0][0])
+
+    def dominant_event(self, mine_id: int):
+        """The event driving a mine's vibration estimate (for explanations), or None."""
+        state = self._current()
+        if state is None:
+            return None
+        i = state.snapshot.position(mine_id)
+        if i is None or state.dominant[i] < 0:
+            return None
+        ev, j = state.events, int(state.dominant[i])
+        return {
+            "magnitude": float(ev["magnitude"][j]),
+            "latitude": float(ev["latitude"][j]),
+            "longitude": float(ev["longitude"][j]),
+            "depth_km": float(ev["depth_km"][j]),
+            "time_ms": ev["time_ms"][j],
+            "place": ev["place"][j],
+            "pgv_mm_s": float(state.vibration[i]),
+        }
+
+    # ---- Background refresh ----
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                # Keep the previous events; lookups fall back to the per-point API until the first success
+                self.errors += 1
+                self.last_error = str(e)
+                print(f"⚠️ Regional earthquake feed refresh failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self.interval > 0 and self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._loop = None
+
+    def stats(self) -> dict:
+        state = self._state
+        return {
+            "interval_s": self.interval,
+            "updated_at": self.updated_at,
+            "events": int(state.events["magnitude"].size) if state is not None else None,
+            "region": state.region if state is not None else None,
+            "refreshes": self.refreshes,
+            "rescores": self.rescores,
+            "errors": self.errors,
+            "last_error": self.last_error,
+        }
+
+
+earthquake_feed = RegionalEarthquakeFeed()
+
+
+def vibration_estimate(lat: float, lon: float, mine_id: int = None):
+    """Feed-based vibration for a mine or point; None means use the per-point earthquake API."""
+    if mine_id is not None:
+        estimate = earthquake_feed.vibration_for_mine(mine_id)
+        if estimate is not None:
+            return estimate
+    return earthquake_feed.vibration_at(lat, lon)
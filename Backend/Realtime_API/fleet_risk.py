@@ -0,0 +1,217 @@
+import os
+import time
+import asyncio
+import numpy as np
+
+from Realtime_API.Realtime_API import list_mines, find_mine_by_id
+from Realtime_API.weather_cache import get_weather_cached
+from Realtime_API.earthquake_feed import earthquake_feed
+from Realtime_API.antecedent_rainfall import antecedent_rainfall
+from Master_LLM.ML_Models.Catboost.catboost import (
+    FEATURE_NAMES, RISK_LABELS, predict_slope_proba, labels_from_proba, slope_models
+)
+
+# Seconds between fleet-wide scoring runs (0 disables the background task)
+FLEET_REFRESH_SECONDS = float(os.getenv("FLEET_REFRESH_SECONDS", "600"))
+# Upstream weather lookups in flight at once during a refresh
+FLEET_FETCH_CONCURRENCY = int(os.getenv("FLEET_FETCH_CONCURRENCY", "4"))
+
+# ---- Model feature <- mine registry column ----
+MINE_FEATURE_FIELDS = {
+    "height": "height_m",
+    "cohesion": "cohesion_kpa",
+    "friction_angle": "friction_angle_deg",
+    "unit_weight": "unit_weight_kn_m3",
+    "slope_angle": "slope_angle_deg",
+    "water_depth_ratio": "water_depth_ratio",
+}
+
+# ---- Model feature <- get_weather() field ----
+WEATHER_FEATURE_FIELDS = {
+    "rainfall_mm_7d": "rainfall_7d_mm",
+    "temperature_c": "temperature_C",
+    "vibrations_ms2": "vibration_mm_s",
+}
+
+
+def mine_feature_row(mine: dict, weather: dict, antecedent: dict = None) -> dict:
+    """
+    Map a mine's geotechnical fields plus its latest weather onto the model features.
+    rainfall_mm_7d is the observed antecedent total when the rainfall index has the
+    mine, else the 7-day forecast sum from the weather payload.
+    """
+    row = {feature: mine[field] for feature, field in MINE_FEATURE_FIELDS.items()}
+    row.update({feature: weather.get(field) or 0.0 for feature, field in WEATHER_FEATURE_FIELDS.items()})
+    if antecedent is not None:
+        row["rainfall_mm_7d"] = antecedent["rainfall_mm_7d"]
+    return row
+
+
+def score_feature_rows(rows: list) -> list:
+    """Score many feature dicts in one model pass; one result dict per row."""
+    if not rows:
+        return []
+    X = np.array([[row[name] for name in FEATURE_NAMES] for row in rows], dtype=np.float64)
+    model, le, _ = slope_models()
+    proba = predict_slope_proba(X, model)
+    prediction_encoded, prediction_label = labels_from_proba(proba, model, le)
+    return [
+        {
+            "prediction_label": np.asarray(prediction_label)[i].item(),
+            "prediction_encoded": int(prediction_encoded[i]),
+            "risk": RISK_LABELS[int(prediction_encoded[i])],
+            "probabilities": proba[i].tolist(),
+        }
+        for i in range(len(rows))
+    ]
+
+
+# ---------------- Fleet Scorer ----------------
+class FleetRiskScorer:
+    """
+    Periodically scores every registered mine in one batch and keeps the
+    latest results in memory; readers get the snapshot without model work.
+    """
+
+    def __init__(self, interval: float = FLEET_REFRESH_SECONDS, concurrency: int = FLEET_FETCH_CONCURRENCY):
+        self.interval = interval
+        self.concurrency = concurrency
+        self._snapshot = {"updated_at": None, "mines": {}, "errors": {}}
+        self._task = None
+        self._updated_monotonic = None
+        self.runs = 0
+        self.last_duration_ms = None
+
+    # ---- Read side: O(1) ----
+    def snapshot(self) -> dict:
+        return self._snapshot
+
+    def mine(self, mine_id: int, max_age: float = None):
+        """Latest result for one mine; None if missing or older than max_age seconds."""
+        if max_age is not None and (
+            self._updated_monotonic is None or time.monotonic() - self._updated_monotonic > max_age
+        ):
+            return None
+        return self._snapshot["mines"].get(mine_id)
+
+    # ---- Write side ----
+    async def _fetch_weather(self, mine: dict, semaphore: asyncio.Semaphore):
+        async with semaphore:
+            # Shares the grid cache the weather prefetcher keeps warm
+            return await get_weather_cached(mine["latitude"], mine["longitude"])
+
+    async def refresh(self):
+        start = time.perf_counter()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        fleet = list_mines()
+        weathers = await asyncio.gather(
+            *(self._fetch_weather(mine, semaphore) for mine in fleet),
+            return_exceptions=True,
+        )
+
+        mines, rows, errors = [], [], {}
+        for mine, weather in zip(fleet, weathers):
+            if isinstance(weather, Exception):
+                errors[mine["id"]] = str(weather)
+                continue
+            antecedent = antecedent_rainfall.features(mine["id"])
+            mines.append((mine, weather, antecedent))
+            rows.append(mine_feature_row(mine, weather, antecedent))
+
+        results = await asyncio.to_thread(score_feature_rows, rows)
+
+        scored = {}
+        for (mine, weather, antecedent), row, result in zip(mines, rows, results):
+            scored[mine["id"]] = {
+                "mine_id": mine["id"],
+                "latitude": mine["latitude"],
+                "longitude": mine["longitude"],
+                "weather_time": weather.get("time"),
+                "inputs": row,
+                "antecedent_rainfall": antecedent,
+                **result,
+            }
+
+        # Keep the last good result for mines whose weather could not be fetched this round
+        for mine_id in errors:
+            if mine_id in self._snapshot["mines"]:
+                scored[mine_id] = self._snapshot["mines"][mine_id]
+
+        # Swap in one assignment so readers never see a partial refresh
+        self._snapshot = {
+            "updated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "mines": scored,
+            "errors": errors,
+        }
+        self._updated_monotonic = time.monotonic()
+        self.runs += 1
+        self.last_duration_ms = round((time.perf_counter() - start) * 1000, 2)
+        return self._snapshot
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"⚠️ Fleet slope scoring failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "interval_s": self.interval,
+            "runs": self.runs,
+            "last_duration_ms": self.last_duration_ms,
+            "updated_at": self._snapshot["updated_at"],
+            "mines_scored": len(self._snapshot["mines"]),
+            "errors": len(self._snapshot["errors"]),
+        }
+
+
+fleet_scorer = FleetRiskScorer()
+
+
+# ---------------- Single Mine, Server-side Feature Assembly ----------------
+async def mine_slope_risk(mine_id: int, max_age: float = 300):
+    """
+    Slope risk for one registered mine: reuse the fleet snapshot if it is
+    fresh enough, otherwise fetch the mine's weather and score it now.
+    """
+    mine = find_mine_by_id(mine_id)
+    if mine is None:
+        return None
+
+    # Event behind the vibration input, when the regional feed supplied it
+    dominant_earthquake = earthquake_feed.dominant_event(mine_id)
+
+    cached = fleet_scorer.mine(mine_id, max_age=max_age)
+    if cached is not None:
+        return {**cached, "dominant_earthquake": dominant_earthquake, "source": "fleet_snapshot"}
+
+    weather = await get_weather_cached(mine["latitude"], mine["longitude"])
+    antecedent = antecedent_rainfall.features(mine_id)
+    row = mine_feature_row(mine, weather, antecedent)
+    result = score_feature_rows([row])[0]
+    return {
+        "mine_id": mine["id"],
+        "latitude": mine["latitude"],
+        "longitude": mine["longitude"],
+        "weather_time": weather.get("time"),
+        "inputs": row,
+        "antecedent_rainfall": antecedent,
+        **result,
+        "dominant_earthquake": dominant_earthquake,
+        "source": "live",
+    }
@@ -0,0 +1,233 @@
+import os
+import csv
+import time
+import threading
+import numpy as np
+
+from Realtime_API.spatial_index import SpatialIndex
+
+MINES_CSV = os.getenv("MINES_CSV", os.path.join(os.path.dirname(__file__), "data", "mines.csv"))
+
+# ---- CSV schema: column -> dtype (all numeric, parsed once at load) ----
+MINE_COLUMNS = {
+    "id": np.int64,
+    "latitude": np.float64,
+    "longitude": np.float64,
+    "area_acres": np.int64,
+    "sensors": np.int64,
+    "active_sensors": np.int64,
+    "sync_accuracy_pct": np.float32,
+    "update_rate_ms": np.float32,
+    "vertices": np.int64,
+    "triangles": np.int64,
+    "resolution_cm3": np.float32,
+    "last_update_min": np.int64,
+    "render_time_ms": np.float32,
+    "memory_usage_mb": np.int64,
+    "gpu_load_pct": np.int64,
+    "height_m": np.float64,
+    "cohesion_kpa": np.float64,
+    "friction_angle_deg": np.float64,
+    "unit_weight_kn_m3": np.float64,
+    "slope_angle_deg": np.float64,
+    "water_depth_ratio": np.float64,
+    "fos": np.float64,
+}
+
+# ---- Display strings the dashboard expects, derived from the numeric columns ----
+DISPLAY_FIELDS = {
+    "sync_accuracy": lambda c, i: f"{c['sync_accuracy_pct'][i]:.1f}%",
+    "update_rate": lambda c, i: f"{c['update_rate_ms'][i]:.1f} ms",
+    "vertices": lambda c, i: f"{c['vertices'][i] / 1e6:.1f}M",
+    "triangles": lambda c, i: f"{c['triangles'][i] / 1e6:.1f}M",
+    "resolution": lambda c, i: f"{c['resolution_cm3'][i]:.1f} cm³",
+    "last_update": lambda c, i: f"{c['last_update_min'][i]} min ago",
+    "render_time": lambda c, i: f"{c['render_time_ms'][i]:.1f} ms",
+    "memory_usage": lambda c, i: f"{c['memory_usage_mb'][i]} MB",
+    "gpu_load": lambda c, i: f"{c['gpu_load_pct'][i]}%",
+}
+
+# Stored as float64 for the vectorized paths, but whole numbers in the CSV
+# (height 42, cohesion 23, ...) are served as ints, exactly as the old MINE_DATA
+WHOLE_NUMBER_FIELDS = {"height_m", "cohesion_kpa", "friction_angle_deg", "unit_weight_kn_m3", "slope_angle_deg"}
+
+# Field order of a mine record as returned by /realtimedata
+RECORD_FIELDS = [
+    "id", "latitude", "longitude", "area_acres", "sensors", "active_sensors",
+    "sync_accuracy", "update_rate", "vertices", "triangles", "resolution",
+    "last_update", "render_time", "memory_usage", "gpu_load",
+    "height_m", "cohesion_kpa", "friction_angle_deg", "unit_weight_kn_m3",
+    "slope_angle_deg", "water_depth_ratio", "fos",
+]
+
+
+def load_mine_columns(path: str) -> dict:
+    """Parse the registry CSV into one typed NumPy array per column."""
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        missing = [name for name in MINE_COLUMNS if name not in header]
+        if missing:
+            raise ValueError(f"{os.path.basename(path)} is missing columns: {missing}")
+        rows = [row for row in reader if row]
+
+    columns = {}
+    for name, dtype in MINE_COLUMNS.items():
+        j = header.index(name)
+        values = [row[j] for row in rows]
+        columns[name] = np.array(values, dtype=np.float64).astype(dtype)
+
+    ids = columns["id"]
+    if np.unique(ids).size != ids.size:
+        raise ValueError("Duplicate mine ids in registry")
+    return columns
+
+
+def _record_value(name: str, value):
+    value = value.item()
+    if name in WHOLE_NUMBER_FIELDS and float(value).is_integer():
+        return int(value)
+    return value
+
+
+class _Snapshot:
+    """One loaded version of the registry; replaced wholesale on reload."""
+
+    def __init__(self, columns: dict, signature):
+        self.columns = columns
+        self.signature = signature
+        self.size = int(columns["id"].size)
+        self._id_order = np.argsort(columns["id"])
+        self._sorted_ids = columns["id"][self._id_order]
+        self.index = SpatialIndex(columns["latitude"], columns["longitude"])
+        self._record_cache = {}  # position -> record dict, built on first access
+
+    def position(self, mine_id: int):
+        i = int(np.searchsorted(self._sorted_ids, mine_id))
+        if i < self.size and self._sorted_ids[i] == mine_id:
+            return int(self._id_order[i])
+        return None
+
+    def positions(self, mine_ids) -> np.ndarray:
+        """Row positions for many ids; -1 where the id is unknown."""
+        mine_ids = np.asarray(mine_ids, dtype=np.int64)
+        if not self.size:
+            return np.full(mine_ids.shape, -1, dtype=np.int64)
+        i = np.clip(np.searchsorted(self._sorted_ids, mine_ids), 0, self.size - 1)
+        return np.where(self._sorted_ids[i] == mine_ids, self._id_order[i], -1)
+
+    def record(self, i: int) -> dict:
+        record = self._record_cache.get(i)
+        if record is None:
+            c = self.columns
+            record = {
+                name: DISPLAY_FIELDS[name](c, i) if name in DISPLAY_FIELDS else _record_value(name, c[name][i])
+                for name in RECORD_FIELDS
+            }
+            self._record_cache[i] = record
+        return record
+
+    def records(self) -> list:
+        return [self.record(i) for i in range(self.size)]
+
+
+# ---------------- Mine Registry ----------------
+class MineRegistry:
+    """
+    Mines loaded from a CSV into typed columns, with id and spatial indexes.
+    The file is re-checked at most every check_interval seconds and reloaded
+    when its mtime/size changes; a file that fails to parse keeps the old data.
+    """
+
+    def __init__(self, path: str = MINES_CSV, check_interval: float = 2.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._last_check = 0.0
+        self.loads = 0
+        self.last_error = None
+        self.loaded_at = None
+        self._snapshot = self._load(self._signature())
+
+    def _signature(self):
+        st = os.stat(self.path)
+        return (st.st_mtime_ns, st.st_size)
+
+    def _load(self, signature) -> _Snapshot:
+        start = time.perf_counter()
+        snapshot = _Snapshot(load_mine_columns(self.path), signature)
+        self.loads += 1
+        self.last_error = None
+        self.loaded_at = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        print(f"🟢 Loaded {snapshot.size} mines from {os.path.basename(self.path)} "
+              f"in {round((time.perf_counter() - start) * 1000, 2)} ms")
+        return snapshot
+
+    def snapshot(self) -> _Snapshot:
+        """Current data, reloading first if the file changed."""
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return self._snapshot
+        with self._lock:
+            self._last_check = now
+            try:
+                signature = self._signature()
+                if signature != self._snapshot.signature:
+                    self._snapshot = self._load(signature)
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"⚠️ Mine registry reload failed, keeping {self._snapshot.size} mines: {e}")
+        return self._snapshot
+
+    # ---- Record access (dicts in RECORD_FIELDS order) ----
+    def records(self) -> list:
+        return self.snapshot().records()
+
+    def by_id(self, mine_id: int):
+        snap = self.snapshot()
+        i = snap.position(mine_id)
+        return None if i is None else snap.record(i)
+
+    def empty_record(self) -> dict:
+        return {name: None for name in RECORD_FIELDS}
+
+    # ---- Location queries ----
+    def nearest(self, lat: float, lon: float, max_km: float):
+        """(record, distance_km) of the closest mine within max_km, or None."""
+        snap = self.snapshot()
+        match = snap.index.nearest(lat, lon, max_km)
+        return None if match is None else (snap.record(match[0]), match[1])
+
+    def within_radius(self, lat: float, lon: float, radius_km: float) -> list:
+        snap = self.snapshot()
+        positions, distances = snap.index.within_radius(lat, lon, radius_km)
+        return [(snap.record(int(i)), float(d)) for i, d in zip(positions, distances)]
+
+    def in_bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> list:
+        snap = self.snapshot()
+        return [snap.record(int(i)) for i in snap.index.in_bbox(min_lat, min_lon, max_lat, max_lon)]
+
+    # ---- Vectorized accessors ----
+    def column(self, name: str) -> np.ndarray:
+        return self.snapshot().columns[name]
+
+    def matrix(self, names: list, mine_ids=None) -> np.ndarray:
+        """(N, len(names)) float matrix of numeric columns, for all mines or the given ids."""
+        snap = self.snapshot()
+        rows = slice(None)
+        if mine_ids is not None:
+            rows = snap.positions(mine_ids)
+            if (rows < 0).any():
+                raise KeyError(f"Unknown mine ids: {np.asarray(mine_ids)[rows < 0].tolist()}")
+        return np.column_stack([snap.columns[name][rows].astype(np.float64) for name in names])
+
+    def stats(self) -> dict:
+        snap = self._snapshot
+        return {
+            "path": os.path.basename(self.path),
+            "mines": snap.size,
+            "loads": self.loads,
+            "loaded_at": self.loaded_at,
+            "memory_kb": round(sum(col.nbytes for col in snap.columns.values()) / 1024, 1),
+            "last_error": self.last_error,
+        }
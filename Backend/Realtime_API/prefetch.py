@@ -0,0 +1,327 @@
+import os
+import json
+import time
+import asyncio
+
+from Realtime_API.Realtime_API import (
+    list_mines, find_mine_by_id, _merge_weather,
+    fetch_daily_rainfall_bulk_async, OPEN_METEO_BULK_CHUNK,
+)
+from Realtime_API.weather_cache import weather_cache
+from Realtime_API.earthquake_feed import vibration_estimate
+from Realtime_API.timeseries_store import timeseries_store
+
+# Seconds between refresh cycles over every registered mine (0 disables the task)
+PREFETCH_INTERVAL_SECONDS = float(os.getenv("PREFETCH_INTERVAL_SECONDS", "300"))
+# Upstream request budget; each mine costs up to one call per weather source
+PREFETCH_REQUESTS_PER_SECOND = float(os.getenv("PREFETCH_REQUESTS_PER_SECOND", "2"))
+# Idle SSE connections get a comment line this often so proxies keep them open
+SSE_KEEPALIVE_SECONDS = float(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+SUBSCRIBER_QUEUE_SIZE = 100
+# A cell is re-fetched once it is this fraction of the interval old, so a cycle that
+# starts a little early still refreshes everything fetched by the previous one
+PREFETCH_WARM_FRACTION = 0.9
+
+WEATHER_SOURCES = ("current", "rainfall", "earthquakes")
+# Sources still fetched one point per call: rainfall is fetched for the whole fleet in bulk
+# and vibration comes from the regional earthquake feed
+PER_MINE_SOURCES = ("current",)
+
+
+# ---------------- Update Broadcaster ----------------
+class _Subscriber:
+    def __init__(self, mine_ids):
+        self.mine_ids = None if mine_ids is None else set(mine_ids)
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.dropped = 0
+
+    def wants(self, mine_id: int) -> bool:
+        return self.mine_ids is None or mine_id in self.mine_ids
+
+
+class UpdateBroadcaster:
+    """Fan-out of per-mine updates to connected dashboards (one queue each)."""
+
+    def __init__(self):
+        self._subscribers = set()
+        self._active = None   # asyncio.Event, set while anyone is subscribed
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    def _active_event(self) -> asyncio.Event:
+        # Created lazily so it belongs to the running event loop
+        if self._active is None:
+            self._active = asyncio.Event()
+            if self._subscribers:
+                self._active.set()
+        return self._active
+
+    def subscribe(self, mine_ids=None) -> _Subscriber:
+        subscriber = _Subscriber(mine_ids)
+        self._subscribers.add(subscriber)
+        self._active_event().set()
+        return subscriber
+
+    def unsubscribe(self, subscriber: _Subscriber):
+        self._subscribers.discard(subscriber)
+        if not self._subscribers:
+            self._active_event().clear()
+
+    async def wait_for_subscribers(self):
+        """Return once at least one client is subscribed."""
+        await self._active_event().wait()
+
+    def publish(self, mine_id: int, event: dict):
+        self.published += 1
+        for subscriber in list(self._subscribers):
+            if not subscriber.wants(mine_id):
+                continue
+            if subscriber.queue.full():
+                # Slow client: drop its oldest update rather than block the prefetcher
+                subscriber.queue.get_nowait()
+                subscriber.dropped += 1
+                self.dropped += 1
+            subscriber.queue.put_nowait(event)
+            self.delivered += 1
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
+
+
+# ---------------- Weather Prefetcher ----------------
+class WeatherPrefetcher:
+    """
+    Walks every registered mine on a schedule, keeping its weather cells warm
+    in weather_cache and the merged /realtimedata payload in memory.
+    Mines are spaced out to stay within the upstream request budget, and
+    changed payloads are published to the broadcaster. Cycles only run
+    while a dashboard is subscribed; /realtimedata reads through the cache.
+    Mines passed to request_refresh() jump the queue but keep the spacing.
+    """
+
+    def __init__(self, broadcaster: UpdateBroadcaster, interval: float = PREFETCH_INTERVAL_SECONDS,
+                 requests_per_second: float = PREFETCH_REQUESTS_PER_SECOND):
+        self.broadcaster = broadcaster
+        self.interval = interval
+        self.spacing = len(PER_MINE_SOURCES) / requests_per_second if requests_per_second > 0 else 0.0
+        # Cells older than this are re-fetched each cycle, so the schedule is the interval
+        self.max_age = interval * PREFETCH_WARM_FRACTION
+        self._latest = {}   # mine_id -> (refreshed_monotonic, payload)
+        self._requested = {}   # mine ids to refresh next, in request order
+        self._wake = None      # asyncio.Event, set when a refresh is requested
+        self._last_refresh_at = float("-inf")
+        self._task = None
+        self.cycles = 0
+        self.refreshes = 0
+        self.changes = 0
+        self.errors = 0
+        self.bulk_requests = 0
+        self.bulk_cells = 0
+        self.last_cycle_ms = None
+        self.pauses = 0
+        self.requested_refreshes = 0
+
+    def latest(self, mine_id: int):
+        entry = self._latest.get(mine_id)
+        return None if entry is None else entry[1]
+
+    def _wake_event(self) -> asyncio.Event:
+        # Created lazily so it belongs to the running event loop
+        if self._wake is None:
+            self._wake = asyncio.Event()
+        return self._wake
+
+    def request_refresh(self, mine_id: int):
+        """Refresh this mine before the rest of the cycle; the payload is published when it arrives."""
+        self._requested[mine_id] = None
+        self._wake_event().set()
+
+    async def _paced(self):
+        """Keep consecutive mine refreshes `spacing` apart (the upstream request budget)."""
+        wait = self._last_refresh_at + self.spacing - time.monotonic()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        self._last_refresh_at = time.monotonic()
+
+    async def _refresh_requested(self) -> set:
+        """Refresh every requested mine, paced; returns the ids refreshed."""
+        done = set()
+        while self._requested:
+            mine_id = next(iter(self._requested))
+            del self._requested[mine_id]
+            mine = find_mine_by_id(mine_id)
+            if mine is None:
+                continue
+            await self._paced()
+            await self.refresh_mine(mine)
+            self.requested_refreshes += 1
+            done.add(mine_id)
+        return done
+
+    async def refresh_mine(self, mine: dict):
+        lat, lon = mine["latitude"], mine["longitude"]
+        vibration = vibration_estimate(lat, lon, mine["id"])
+        sources = WEATHER_SOURCES if vibration is None else ("current", "rainfall")
+        results = await asyncio.gather(
+            *(weather_cache.warm(source, lat, lon, max_age=self.max_age) for source in sources),
+            return_exceptions=True,
+        )
+        eq_result = vibration if vibration is not None else results[2]
+        try:
+            payload = _merge_weather(lat, lon, f"{lat}, {lon}", results[0], results[1], eq_result)
+        except Exception as e:
+            # Keep the last good payload; the dashboard keeps showing it
+            self.errors += 1
+            print(f"⚠️ Prefetch for mine {mine['id']} failed: {e}")
+            return None
+
+        self.refreshes += 1
+        previous = self.latest(mine["id"])
+        self._latest[mine["id"]] = (time.monotonic(), payload)
+        timeseries_store.record(mine["id"], payload)
+        if payload != previous:
+            self.changes += 1
+            self.broadcaster.publish(mine["id"], {"mine_id": mine["id"], "data": payload})
+        return payload
+
+    async def warm_rainfall_bulk(self, mines: list):
+        """Refresh every rainfall cell that is due with a few multi-location requests."""
+        cells = {
+            weather_cache.cell("rainfall", m["latitude"], m["longitude"]) for m in mines
+            if weather_cache.needs_warming("rainfall", m["latitude"], m["longitude"], max_age=self.max_age)
+        }
+        if not cells:
+            return
+        points = sorted(cells)
+        results = await fetch_daily_rainfall_bulk_async(points)
+        self.bulk_requests += -(-len(points) // OPEN_METEO_BULK_CHUNK)
+        for (lat, lon), result in zip(points, results):
+            if isinstance(result, Exception):
+                # warm() falls back to a per-cell request for this one
+                continue
+            weather_cache.put("rainfall", lat, lon, result)
+            self.bulk_cells += 1
+
+    async def run_cycle(self):
+        start = time.perf_counter()
+        mines = list_mines()
+        await self.warm_rainfall_bulk(mines)
+        done = set()
+        for mine in mines:
+            done |= await self._refresh_requested()
+            if mine["id"] in done:
+                continue
+            await self._paced()
+            await self.refresh_mine(mine)
+        self.cycles += 1
+        self.last_cycle_ms = round((time.perf_counter() - start) * 1000, 2)
+
+    async def _run(self):
+        while True:
+            if not self.broadcaster.stats()["subscribers"]:
+                # Nobody is watching: no upstream calls until a dashboard connects
+                self.pauses += 1
+                await self.broadcaster.wait_for_subscribers()
+            started = time.monotonic()
+            try:
+                await self.run_cycle()
+            except Exception as e:
+                print(f"⚠️ Weather prefetch cycle failed: {e}")
+            await self._serve_requests_until(started + self.interval)
+
+    async def _serve_requests_until(self, deadline: float):
+        """Sleep until the next cycle is due, refreshing requested mines as they come in."""
+        wake = self._wake_event()
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                await asyncio.wait_for(wake.wait(), remaining)
+            except asyncio.TimeoutError:
+                return
+            wake.clear()
+            try:
+                await self._refresh_requested()
+            except Exception as e:
+                print(f"⚠️ Requested weather refresh failed: {e}")
+
+    def start(self):
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        ages = [now - refreshed for refreshed, _ in self._latest.values()]
+        return {
+            "interval_s": self.interval,
+            "max_age_before_refresh_s": self.max_age,
+            "paused": bool(self._task) and not self.broadcaster.stats()["subscribers"],
+            "pauses": self.pauses,
+            "spacing_s": round(self.spacing, 3),
+            "cycles": self.cycles,
+            "last_cycle_ms": self.last_cycle_ms,
+            "mines_cached": len(self._latest),
+            "max_age_s": round(max(ages), 1) if ages else None,
+            "refreshes": self.refreshes,
+            "changes": self.changes,
+            "requested_refreshes": self.requested_refreshes,
+            "requests_pending": len(self._requested),
+            "errors": self.errors,
+            "bulk_requests": self.bulk_requests,
+            "bulk_cells": self.bulk_cells,
+        }
+
+
+weather_broadcaster = UpdateBroadcaster()
+weather_prefetcher = WeatherPrefetcher(weather_broadcaster)
+
+
+# ---------------- Server-Sent Events ----------------
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def weather_event_stream(mine_ids=None, is_disconnected=None):
+    """
+    SSE body for /realtimedata/stream: the cached payload of each requested
+    mine first, then one event per change pushed by the prefetcher. Mines not
+    cached yet are queued on the prefetcher and arrive as ordinary events.
+    """
+    subscriber = weather_broadcaster.subscribe(mine_ids)
+    try:
+        initial_ids = mine_ids if mine_ids is not None else [m["id"] for m in list_mines()]
+        for mine_id in initial_ids:
+            payload = weather_prefetcher.latest(mine_id)
+            if payload is not None:
+                yield _sse("weather", {"mine_id": mine_id, "data": payload})
+            else:
+                # Not prefetched yet (e.g. just onboarded): fetched on the paced schedule, then published
+                weather_prefetcher.request_refresh(mine_id)
+
+        while True:
+            if is_disconnected is not None and await is_disconnected():
+                break
+            try:
+                event = await asyncio.wait_for(subscriber.queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield _sse("weather", event)
+    finally:
+        weather_broadcaster.unsubscribe(subscriber)
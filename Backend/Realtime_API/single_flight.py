@@ -0,0 +1,159 @@
+import time
+import asyncio
+import functools
+import threading
+
+# Every flight group by name, so /metrics can report all of them
+_GROUPS = {}
+
+
+class _FlightStats:
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0          # lookups requested
+        self.executions = 0     # lookups that actually went upstream
+        self.coalesced = 0      # lookups that joined an in-flight call instead
+        self.errors = 0         # executions that raised (shared by every waiter)
+        self.max_waiters = 0    # most callers ever sharing one execution
+        self.saved_ms = 0.0     # upstream time the coalesced callers did not spend
+        _GROUPS[name] = self
+
+    def _base(self, inflight: int) -> dict:
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "coalesced_ratio": round(self.coalesced / self.calls, 4) if self.calls else None,
+            "errors": self.errors,
+            "max_waiters": self.max_waiters,
+            "saved_ms": round(self.saved_ms, 2),
+            "inflight": inflight,
+        }
+
+
+# ---------------- Single-flight (threads) ----------------
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 1
+
+
+class SingleFlight(_FlightStats):
+    """
+    Collapses concurrent identical blocking calls: the first caller for a key
+    runs fn, callers arriving while it runs wait and receive the same result
+    (or exception). Nothing is cached once the call returns.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._lock = threading.Lock()
+        self._calls = {}   # key -> _Call in flight
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            self.calls += 1
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        start = time.perf_counter()
+        try:
+            call.result = fn(*args, **kwargs)
+        except Exception as e:
+            call.error = e
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self._calls.pop(key, None)
+                self.max_waiters = max(self.max_waiters, call.waiters)
+                self.saved_ms += elapsed_ms * (call.waiters - 1)
+                if call.error is not None:
+                    self.errors += 1
+            call.done.set()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def wrap(self, fn):
+        """Decorator: coalesce calls to fn made with equal arguments."""
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            # repr so unhashable arguments (lists of points, dicts) still form a key
+            key = (fn.__qualname__, repr(args), repr(sorted(kwargs.items())))
+            return self.do(key, fn, *args, **kwargs)
+        return wrapper
+
+    def stats(self) -> dict:
+        return self._base(len(self._calls))
+
+
+# ---------------- Single-flight (asyncio) ----------------
+class AsyncSingleFlight(_FlightStats):
+    """
+    asyncio variant of SingleFlight: the call runs as its own task and every
+    caller awaits it shielded, so one caller cancelling (e.g. a client
+    disconnect) does not cancel the lookup for the others.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._tasks = {}   # key -> asyncio.Task in flight
+        self._waiters = {}
+
+    async def do(self, key, coro_fn, *args, **kwargs):
+        self.calls += 1
+        task = self._tasks.get(key)
+        if task is not None:
+            self._waiters[key] += 1
+            self.coalesced += 1
+        else:
+            task = asyncio.create_task(self._run(key, coro_fn, *args, **kwargs))
+            # Retrieve the exception even if every waiter was cancelled
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._tasks[key] = task
+            self._waiters[key] = 1
+            self.executions += 1
+        return await asyncio.shield(task)
+
+    async def _run(self, key, coro_fn, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await coro_fn(*args, **kwargs)
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            waiters = self._waiters.pop(key, 1)
+            self._tasks.pop(key, None)
+            self.max_waiters = max(self.max_waiters, waiters)
+            self.saved_ms += (time.perf_counter() - start) * 1000 * (waiters - 1)
+
+    def stats(self) -> dict:
+        return self._base(len(self._tasks))
+
+
+def request_key(method: str, url: str, params: dict = None):
+    """Hashable identity of an HTTP request (params in any order give the same key)."""
+    return (method, url, tuple(sorted((k, str(v)) for k, v in (params or {}).items())))
+
+
+def single_flight_stats() -> dict:
+    return {name: group.stats() for name, group in _GROUPS.items()}
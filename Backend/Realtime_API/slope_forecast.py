@@ -0,0 +1,146 @@
+import os
+import time
+import asyncio
+import numpy as np
+
+from Realtime_API.Realtime_API import list_mines, mine_registry, fetch_daily_forecast_bulk_async
+from Realtime_API.fleet_risk import fleet_scorer, MINE_FEATURE_FIELDS
+from Master_LLM.ML_Models.Catboost.catboost import (
+    FEATURE_NAMES, RISK_LABELS, UNSTABLE_CLASS, predict_slope_proba, labels_from_proba,
+    slope_models,
+)
+
+# Daily forecasts change a few times a day; refetch each mine at most this often
+FORECAST_REFRESH_SECONDS = float(os.getenv("FORECAST_REFRESH_SECONDS", "10800"))
+
+WINDOW_DAYS = 7     # the model's rainfall_mm_7d feature
+HORIZON_DAYS = 7    # projected days
+
+
+# ---------------- Per-mine Forecast Cache ----------------
+class DailyForecastCache:
+    """Daily rainfall/temperature arrays per mine, fetched once per refresh interval."""
+
+    def __init__(self, ttl: float = FORECAST_REFRESH_SECONDS):
+        self.ttl = ttl
+        self._entries = {}  # mine_id -> (fetched_monotonic, forecast dict)
+        self.fetches = 0
+        self.hits = 0
+
+    def _fresh(self, mine_id: int) -> bool:
+        entry = self._entries.get(mine_id)
+        return entry is not None and time.monotonic() - entry[0] < self.ttl
+
+    async def get_many(self, mines: list) -> dict:
+        """
+        Forecasts for the given mines; only missing or expired ones hit the
+        network, all of them in chunked multi-location requests.
+        """
+        stale = [mine for mine in mines if not self._fresh(mine["id"])]
+        self.hits += len(mines) - len(stale)
+        if stale:
+            results = await fetch_daily_forecast_bulk_async(
+                [(m["latitude"], m["longitude"]) for m in stale], WINDOW_DAYS - 1, HORIZON_DAYS,
+            )
+            now = time.monotonic()
+            for mine, result in zip(stale, results):
+                if isinstance(result, Exception):
+                    print(f"⚠️ Could not fetch daily forecast for mine {mine['id']}: {result}")
+                    continue
+                self._entries[mine["id"]] = (now, result)
+                self.fetches += 1
+        return {m["id"]: self._entries[m["id"]][1] for m in mines if m["id"] in self._entries}
+
+    def stats(self) -> dict:
+        return {"mines_cached": len(self._entries), "fetches": self.fetches, "hits": self.hits, "ttl_s": self.ttl}
+
+
+forecast_cache = DailyForecastCache()
+
+
+def _as_array(values, length: int) -> np.ndarray:
+    """Daily list -> float array of fixed length (missing days are NaN)."""
+    arr = np.array([v if v is not None else np.nan for v in values[:length]], dtype=np.float64)
+    if arr.size < length:
+        arr = np.concatenate([arr, np.full(length - arr.size, np.nan)])
+    return arr
+
+
+def _latest_input(mine_id: int, feature: str, default: float) -> float:
+    return (fleet_scorer.mine(mine_id) or {}).get("inputs", {}).get(feature, default)
+
+
+# ---------------- Fleet Risk Projection ----------------
+async def project_fleet_slope_risk(mine_ids: list = None) -> dict:
+    """
+    Per-mine slope risk timeline for the next HORIZON_DAYS days.
+    Each future day gets its own rolling 7-day rainfall total (6 past days +
+    forecast), and every (mine, day) row is scored in one model pass.
+    """
+    start = time.perf_counter()
+    wanted = None if mine_ids is None else set(mine_ids)
+    mines = [m for m in list_mines() if wanted is None or m["id"] in wanted]
+    forecasts = await forecast_cache.get_many(mines)
+    mines = [m for m in mines if m["id"] in forecasts]
+    if not mines:
+        return {"generated_at": None, "mines": {}, "elapsed_ms": 0.0}
+
+    span = WINDOW_DAYS - 1 + HORIZON_DAYS
+    rain = np.vstack([_as_array(forecasts[m["id"]]["precipitation_sum"], span) for m in mines])
+    temp = np.vstack([_as_array(forecasts[m["id"]]["temperature_2m_mean"], span) for m in mines])
+    rain = np.nan_to_num(rain, nan=0.0)
+
+    # Rolling 7-day sums ending on each future day: (M, HORIZON_DAYS)
+    csum = np.concatenate([np.zeros((len(mines), 1)), np.cumsum(rain, axis=1)], axis=1)
+    rolling = csum[:, WINDOW_DAYS:] - csum[:, :-WINDOW_DAYS]
+
+    # Vibration has no forecast: carry the latest value from the fleet snapshot
+    vibration = np.array([_latest_input(m["id"], "vibrations_ms2", 0.0) for m in mines])
+
+    # Days without a temperature forecast fall back to the mine's forecast mean, then its latest reading
+    daily_temp = temp[:, WINDOW_DAYS - 1:]
+    known = ~np.isnan(temp)
+    current = np.array([_latest_input(m["id"], "temperature_c", 25.0) for m in mines])
+    fallback = np.where(
+        known.any(axis=1),
+        np.where(known, temp, 0.0).sum(axis=1) / np.maximum(known.sum(axis=1), 1),
+        current,
+    )
+    daily_temp = np.where(np.isnan(daily_temp), fallback[:, None], daily_temp)
+
+    geo_names = list(MINE_FEATURE_FIELDS)
+    geotech = mine_registry.matrix([MINE_FEATURE_FIELDS[name] for name in geo_names], [m["id"] for m in mines])
+
+    # (M * HORIZON_DAYS, 9) feature matrix, mine-major
+    X = np.empty((len(mines) * HORIZON_DAYS, len(FEATURE_NAMES)))
+    X[:, [FEATURE_NAMES.index(name) for name in geo_names]] = np.repeat(geotech, HORIZON_DAYS, axis=0)
+    X[:, FEATURE_NAMES.index("rainfall_mm_7d")] = rolling.ravel()
+    X[:, FEATURE_NAMES.index("temperature_c")] = daily_temp.ravel()
+    X[:, FEATURE_NAMES.index("vibrations_ms2")] = np.repeat(vibration, HORIZON_DAYS)
+
+    model, le, _ = slope_models()
+    proba = await asyncio.to_thread(predict_slope_proba, X, model)
+    prediction_encoded, _ = labels_from_proba(proba, model, le)
+    encoded = prediction_encoded.reshape(len(mines), HORIZON_DAYS)
+    unstable = proba[:, UNSTABLE_CLASS].reshape(len(mines), HORIZON_DAYS)
+
+    timelines = {}
+    for i, mine in enumerate(mines):
+        dates = forecasts[mine["id"]]["dates"][WINDOW_DAYS - 1:WINDOW_DAYS - 1 + HORIZON_DAYS]
+        timelines[mine["id"]] = {
+            "mine_id": mine["id"],
+            "dates": dates,
+            "rainfall_mm_7d": np.round(rolling[i], 2).tolist(),
+            "temperature_c": np.round(daily_temp[i], 2).tolist(),
+            "prediction_encoded": encoded[i].tolist(),
+            "risk": [RISK_LABELS[c] for c in encoded[i]],
+            "unstable_probability": unstable[i].tolist(),
+            "peak_day": dates[int(unstable[i].argmax())] if dates else None,
+        }
+
+    return {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "horizon_days": HORIZON_DAYS,
+        "mines": timelines,
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+    }
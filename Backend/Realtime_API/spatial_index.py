@@ -0,0 +1,108 @@
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEG_LAT = np.pi * EARTH_RADIUS_KM / 180.0
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km; any argument may be a NumPy array (broadcast)."""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+# ---------------- Grid-bucket Spatial Index ----------------
+class SpatialIndex:
+    """
+    Static index over point sites (lat/lon in degrees).
+    Points are sorted by a cell_deg x cell_deg grid bucket so a query only
+    reads the buckets its search window overlaps, then filters them with
+    exact haversine distances. Results are positions into the input arrays.
+    """
+
+    def __init__(self, lats, lons, cell_deg: float = 0.5):
+        self.cell_deg = cell_deg
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self.n_cols = int(np.ceil(360.0 / cell_deg))
+
+        rows, cols = self._cell(self.lats, self.lons)
+        keys = rows * self.n_cols + cols
+        self._order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[self._order]
+        unique, starts, counts = np.unique(sorted_keys, return_index=True, return_counts=True)
+        # bucket key -> slice of self._order
+        self._buckets = {int(k): (int(s), int(s + c)) for k, s, c in zip(unique, starts, counts)}
+
+    def __len__(self):
+        return self.lats.size
+
+    def _cell(self, lat, lon):
+        row = np.floor((np.asarray(lat) + 90.0) / self.cell_deg).astype(np.int64)
+        col = np.floor(((np.asarray(lon) + 180.0) % 360.0) / self.cell_deg).astype(np.int64) % self.n_cols
+        return row, col
+
+    def _candidates(self, min_lat, max_lat, lon_cols) -> np.ndarray:
+        """Positions of every point whose bucket lies in the row range and given columns."""
+        row_lo, _ = self._cell(max(min_lat, -90.0), 0.0)
+        row_hi, _ = self._cell(min(max_lat, 90.0 - 1e-9), 0.0)
+        slices = []
+        for row in range(int(row_lo), int(row_hi) + 1):
+            base = row * self.n_cols
+            for col in lon_cols:
+                bucket = self._buckets.get(base + int(col))
+                if bucket is not None:
+                    slices.append(self._order[bucket[0]:bucket[1]])
+        return np.concatenate(slices) if slices else np.empty(0, dtype=np.int64)
+
+    def _lon_cols(self, min_lon: float, max_lon: float):
+        if max_lon - min_lon >= 360.0:
+            return range(self.n_cols)
+        _, col_lo = self._cell(0.0, min_lon)
+        _, col_hi = self._cell(0.0, max_lon)
+        col_lo, col_hi = int(col_lo), int(col_hi)
+        if col_lo <= col_hi:
+            return range(col_lo, col_hi + 1)
+        # Window crosses the antimeridian
+        return list(range(col_lo, self.n_cols)) + list(range(0, col_hi + 1))
+
+    # ---- Queries ----
+    def within_radius(self, lat: float, lon: float, radius_km: float):
+        """(positions, distances_km) of every point within radius_km, nearest first."""
+        dlat = radius_km / KM_PER_DEG_LAT
+        # Longitude span widens with latitude; near the poles scan every column
+        max_abs_lat = min(abs(lat) + dlat, 90.0)
+        cos_lat = np.cos(np.radians(max_abs_lat))
+        if cos_lat < 1e-6:
+            lon_cols = range(self.n_cols)
+        else:
+            dlon = dlat / cos_lat
+            lon_cols = self._lon_cols(lon - dlon, lon + dlon)
+
+        candidates = self._candidates(lat - dlat, lat + dlat, lon_cols)
+        if candidates.size == 0:
+            return candidates, np.empty(0)
+        distances = haversine_km(lat, lon, self.lats[candidates], self.lons[candidates])
+        keep = distances <= radius_km
+        candidates, distances = candidates[keep], distances[keep]
+        order = np.argsort(distances, kind="stable")
+        return candidates[order], distances[order]
+
+    def nearest(self, lat: float, lon: float, max_km: float):
+        """(position, distance_km) of the closest point within max_km, or None."""
+        positions, distances = self.within_radius(lat, lon, max_km)
+        if positions.size == 0:
+            return None
+        return int(positions[0]), float(distances[0])
+
+    def in_bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> np.ndarray:
+        """Positions of points inside the box (min_lon > max_lon means it crosses the antimeridian)."""
+        width = (max_lon - min_lon) % 360.0 if min_lon > max_lon else max_lon - min_lon
+        candidates = self._candidates(min_lat, max_lat, self._lon_cols(min_lon, min_lon + width))
+        lats, lons = self.lats[candidates], self.lons[candidates]
+        in_lat = (lats >= min_lat) & (lats <= max_lat)
+        if min_lon <= max_lon:
+            in_lon = (lons >= min_lon) & (lons <= max_lon)
+        else:
+            in_lon = (lons >= min_lon) | (lons <= max_lon)
+        return np.sort(candidates[in_lat & in_lon])
@@ -0,0 +1,348 @@
+import os
+import time
+import asyncio
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+# Directory of the per-mine sample files (mine_<id>.bin). Defaults to Backend/data/ (gitignored);
+# on Vercel only the temp directory is writable.
+_DATA_ROOT = tempfile.gettempdir() if os.getenv("VERCEL") else os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+TIMESERIES_DIR = os.getenv("TIMESERIES_DIR") or os.path.join(_DATA_ROOT, "timeseries")
+# Samples per mine kept in memory; older ones are read back from disk
+TIMESERIES_RING_CAPACITY = int(os.getenv("TIMESERIES_RING_CAPACITY", "4096"))
+# Ring slots allocated when a mine is first seen; doubled as samples arrive, up to the capacity
+TIMESERIES_RING_INITIAL = int(os.getenv("TIMESERIES_RING_INITIAL", "64"))
+# Seconds between flushes of new samples to disk (0 disables the task)
+TIMESERIES_FLUSH_SECONDS = float(os.getenv("TIMESERIES_FLUSH_SECONDS", "60"))
+# Samples closer together than this are dropped (many dashboards polling one mine)
+TIMESERIES_MIN_INTERVAL_SECONDS = float(os.getenv("TIMESERIES_MIN_INTERVAL_SECONDS", "60"))
+TIMESERIES_MAX_POINTS = 2000
+
+# /realtimedata fields recorded per sample
+SERIES_FIELDS = [
+    "temperature_C", "humidity_percent", "pressure_hPa",
+    "windspeed_m_s", "vibration_mm_s", "rainfall_7d_mm",
+]
+# Fixed-width on-disk record: 8-byte epoch seconds + one float32 per field (32 bytes)
+SAMPLE_DTYPE = np.dtype([("t", "<f8")] + [(name, "<f4") for name in SERIES_FIELDS])
+
+
+# ---- Downsampling ----
+def minmax_buckets(t: np.ndarray, values: np.ndarray, n_buckets: int) -> dict:
+    """Equal-time buckets with min/max/mean of values; empty buckets are left out."""
+    edges = np.linspace(t[0], t[-1], n_buckets + 1)
+    bucket = np.clip(np.searchsorted(edges, t, side="right") - 1, 0, n_buckets - 1)
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    counts = np.diff(np.r_[starts, t.size])
+    # NaN (missing reading) must not poison a whole bucket
+    filled_lo = np.where(np.isnan(values), np.inf, values)
+    filled_hi = np.where(np.isnan(values), -np.inf, values)
+    valid = np.add.reduceat(~np.isnan(values), starts)
+    sums = np.add.reduceat(np.nan_to_num(values), starts)
+    lo = np.minimum.reduceat(filled_lo, starts)
+    hi = np.maximum.reduceat(filled_hi, starts)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(valid > 0, sums / valid, np.nan)
+    return {
+        "t": np.add.reduceat(t, starts) / counts,
+        "min": np.where(valid > 0, lo, np.nan),
+        "max": np.where(valid > 0, hi, np.nan),
+        "mean": mean,
+    }
+
+
+def lttb(t: np.ndarray, values: np.ndarray, n_out: int) -> dict:
+    """Largest-Triangle-Three-Buckets: n_out points that keep the visual shape of the line."""
+    keep = ~np.isnan(values)
+    t, values = t[keep], values[keep]
+    if t.size <= n_out or n_out < 3:
+        return {"t": t, "value": values}
+
+    edges = np.linspace(1, t.size - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, t.size - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point) is the third triangle vertex
+        nxt_lo, nxt_hi = edges[i + 1], edges[i + 2] if i + 2 < edges.size else t.size
+        avg_t, avg_v = t[nxt_lo:nxt_hi].mean(), values[nxt_lo:nxt_hi].mean()
+        area = np.abs(
+            (t[a] - avg_t) * (values[lo:hi] - values[a]) - (t[a] - t[lo:hi]) * (avg_v - values[a])
+        )
+        a = lo + int(area.argmax())
+        selected[i + 1] = a
+    return {"t": t[selected], "value": values[selected]}
+
+
+# ---------------- Per-mine Series ----------------
+class MineSeries:
+    """
+    Append-only samples for one mine: the newest `capacity` in a ring buffer,
+    everything flushed appended to a binary file of SAMPLE_DTYPE records.
+    Timestamps only increase, so both parts are sorted by time. Neither the
+    constructor nor appends touch the disk; load(), flush() and range() are
+    meant to run in a worker thread.
+    """
+
+    def __init__(self, path: str, capacity: int):
+        self.path = path
+        self.capacity = capacity
+        # Grows by doubling; it only wraps once it has reached capacity
+        self._ring = np.zeros(min(capacity, TIMESERIES_RING_INITIAL), dtype=SAMPLE_DTYPE)
+        self._count = 0        # samples ever appended since load (ring position = count % ring size)
+        self._unflushed = 0    # newest samples not yet on disk
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()   # one writer at a time, so records land in order
+        self._loaded = False
+        self.flush_queued = False
+        self.dropped = 0
+        self.last_t = None     # the file's last sample is only known after load()
+
+    def load(self):
+        """Pick up the last timestamp on disk (cutting a torn record); runs once."""
+        if self._loaded:
+            return
+        with self._flush_lock:
+            if self._loaded:
+                return
+            last = self._last_on_disk()
+            with self._lock:
+                if last is not None and (self.last_t is None or last > self.last_t):
+                    self.last_t = last
+                self._loaded = True
+
+    def _disk_records(self):
+        """Whole records in the file; a partial record at the end (interrupted write) is ignored."""
+        try:
+            n = os.path.getsize(self.path) // SAMPLE_DTYPE.itemsize
+        except FileNotFoundError:
+            return None
+        return np.memmap(self.path, dtype=SAMPLE_DTYPE, mode="r", shape=(n,)) if n else None
+
+    def _last_on_disk(self):
+        try:
+            partial = os.path.getsize(self.path) % SAMPLE_DTYPE.itemsize
+            if partial:
+                # Cut the torn record so the next flush stays aligned
+                os.truncate(self.path, os.path.getsize(self.path) - partial)
+                print(f"⚠️ Dropped a partial record at the end of {self.path}")
+        except OSError:
+            pass
+        disk = self._disk_records()
+        return None if disk is None else float(disk["t"][-1])
+
+    def append(self, t: float, values: dict) -> bool:
+        with self._lock:
+            if self.last_t is not None and t - self.last_t < TIMESERIES_MIN_INTERVAL_SECONDS:
+                return False
+            if self._count == self._ring.size < self.capacity:
+                self._grow()
+            if self._unflushed == self.capacity:
+                # Flushes fell behind: the oldest unflushed sample is overwritten
+                self._unflushed -= 1
+                self.dropped += 1
+            row = self._ring[self._count % self._ring.size]
+            row["t"] = t
+            for name in SERIES_FIELDS:
+                value = values.get(name)
+                row[name] = np.nan if value is None else value
+            self._count += 1
+            self._unflushed += 1
+            self.last_t = t
+            return True
+
+    def _grow(self):
+        # Not wrapped yet, so the samples are already oldest-first at the front
+        ring = np.zeros(min(self._ring.size * 2, self.capacity), dtype=SAMPLE_DTYPE)
+        ring[:self._count] = self._ring[:self._count]
+        self._ring = ring
+
+    def _ring_rows(self, newest: int = None) -> np.ndarray:
+        """The ring's samples oldest-first (only the `newest` most recent if given)."""
+        capacity = self._ring.size
+        n = min(self._count, capacity) if newest is None else newest
+        start = self._count - n
+        idx = np.arange(start, self._count) % capacity
+        return self._ring[idx]
+
+    def needs_flush(self) -> bool:
+        """Half the ring is unflushed: flush before it wraps onto unsaved samples."""
+        return self._unflushed * 2 >= self.capacity
+
+    def flush(self) -> int:
+        """Append unflushed samples to the file; appends keep running while it writes."""
+        self.load()
+        with self._flush_lock:
+            with self._lock:
+                self.flush_queued = False
+                if not self._unflushed:
+                    return 0
+                rows = self._ring_rows(self._unflushed)
+                flushed_through = self._count
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "ab") as f:
+                rows.tofile(f)
+            with self._lock:
+                self._unflushed = min(self._count - flushed_through, self.capacity)
+            return rows.size
+
+    def range(self, start: float, end: float) -> np.ndarray:
+        """Samples with start <= t <= end, oldest first."""
+        self.load()
+        with self._lock:
+            ring = self._ring_rows()
+        # Everything older than the ring's oldest sample is only on disk
+        ring_oldest = ring["t"][0] if ring.size else np.inf
+        parts = []
+        disk = self._disk_records() if start < ring_oldest else None
+        if disk is not None:
+            lo = int(np.searchsorted(disk["t"], start, side="left"))
+            # Flushed ring samples are also the file's tail: stop before ring_oldest
+            if end < ring_oldest:
+                hi = int(np.searchsorted(disk["t"], end, side="right"))
+            else:
+                hi = int(np.searchsorted(disk["t"], ring_oldest, side="left"))
+            if hi > lo:
+                parts.append(np.array(disk[lo:hi]))
+        parts.append(ring[(ring["t"] >= start) & (ring["t"] <= end)])
+        return np.concatenate(parts) if len(parts) > 1 else parts[0]
+
+    def stats(self) -> dict:
+        return {
+            "in_memory": min(self._count, self._ring.size),
+            "unflushed": self._unflushed,
+            "dropped": self.dropped,
+            "on_disk": os.path.getsize(self.path) // SAMPLE_DTYPE.itemsize if os.path.exists(self.path) else 0,
+        }
+
+
+# ---------------- Time-series Store ----------------
+class TimeSeriesStore:
+    """Weather samples per mine, recorded from /realtimedata and the prefetcher."""
+
+    def __init__(self, directory: str = TIMESERIES_DIR, capacity: int = TIMESERIES_RING_CAPACITY,
+                 flush_interval: float = TIMESERIES_FLUSH_SECONDS):
+        self.directory = directory
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self._series = {}
+        self._lock = threading.Lock()
+        self._task = None
+        # Flushes triggered by a filling ring run here, never on the caller's thread
+        self._flusher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="timeseries-flush")
+        self.appended = 0
+        self.skipped = 0
+        self.last_flush_ms = None
+
+    def series(self, mine_id: int) -> MineSeries:
+        series = self._series.get(mine_id)
+        if series is None:
+            with self._lock:
+                series = self._series.get(mine_id)
+                if series is None:
+                    path = os.path.join(self.directory, f"mine_{int(mine_id)}.bin")
+                    series = self._series[mine_id] = MineSeries(path, self.capacity)
+                    # record() runs on the event loop: the file is read on the flush worker
+                    self._flusher.submit(series.load)
+        return series
+
+    def record(self, mine_id: int, payload: dict, t: float = None) -> bool:
+        """Append the fields of a /realtimedata payload; False if too soon after the last sample."""
+        if mine_id is None:
+            return False
+        series = self.series(mine_id)
+        added = series.append(time.time() if t is None else t, payload)
+        if added:
+            self.appended += 1
+            if series.needs_flush() and not series.flush_queued:
+                series.flush_queued = True
+                self._flusher.submit(series.flush)
+        else:
+            self.skipped += 1
+        return added
+
+    def query(self, mine_id: int, start: float = None, end: float = None, points: int = 500,
+              method: str = "minmax", fields: list = None) -> dict:
+        """
+        Samples of one mine in [start, end] (epoch seconds; default last 24 h),
+        downsampled to about `points` per field when there are more.
+        method: "minmax" (per-bucket min/max/mean) or "lttb" (shape-preserving points).
+        """
+        end = time.time() if end is None else end
+        start = end - 86400 if start is None else start
+        points = max(3, min(int(points), TIMESERIES_MAX_POINTS))
+        fields = [f for f in (fields or SERIES_FIELDS) if f in SERIES_FIELDS]
+        rows = self.series(mine_id).range(start, end)
+
+        result = {
+            "mine_id": mine_id,
+            "start": start,
+            "end": end,
+            "samples": int(rows.size),
+            "method": "raw" if rows.size <= points else method,
+            "series": {},
+        }
+        t = rows["t"]
+        for name in fields:
+            values = rows[name].astype(np.float64)
+            if rows.size <= points:
+                data = {"t": t, "value": values}
+            elif method == "lttb":
+                data = lttb(t, values, points)
+            else:
+                # Each bucket yields a min and a max, so half as many buckets as points
+                data = minmax_buckets(t, values, max(1, points // 2))
+            result["series"][name] = {
+                key: [None if np.isnan(v) else round(float(v), 3) for v in arr] if key != "t" else arr.tolist()
+                for key, arr in data.items()
+            }
+        return result
+
+    def flush(self) -> int:
+        start = time.perf_counter()
+        flushed = sum(series.flush() for series in list(self._series.values()))
+        self.last_flush_ms = round((time.perf_counter() - start) * 1000, 2)
+        return flushed
+
+    # ---- Background flush ----
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception as e:
+                print(f"⚠️ Time-series flush failed: {e}")
+
+    def start(self):
+        if self.flush_interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Samples still in memory go to disk before exit
+        await asyncio.to_thread(self.flush)
+
+    def stats(self) -> dict:
+        per_mine = [series.stats() for series in list(self._series.values())]
+        return {
+            "mines": len(per_mine),
+            "appended": self.appended,
+            "skipped": self.skipped,
+            "unflushed": sum(s["unflushed"] for s in per_mine),
+            "dropped": sum(s["dropped"] for s in per_mine),
+            "samples_on_disk": sum(s["on_disk"] for s in per_mine),
+            "last_flush_ms": self.last_flush_ms,
+            "ring_capacity": self.capacity,
+        }
+
+
+timeseries_store = TimeSeriesStore()
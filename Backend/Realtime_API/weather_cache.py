@@ -0,0 +1,206 @@
+import os
+import time
+import asyncio
+from collections import OrderedDict
+
+from Realtime_API.Realtime_API import (
+    _resolve_location, _merge_weather, find_mine_data,
+    _fetch_current_weather_async, _fetch_daily_rainfall_async, _fetch_earthquakes_async,
+)
+from Realtime_API.earthquake_feed import vibration_estimate
+
+WEATHER_CACHE_MAX_ENTRIES = int(os.getenv("WEATHER_CACHE_MAX_ENTRIES", "2048"))
+
+
+# ---- Per-source cache policy ----
+class SourcePolicy:
+    """
+    grid_deg: coordinates are snapped to this grid (upstream model resolution)
+    ttl: seconds an entry is served as fresh
+    max_stale: further seconds it may be served while a refresh runs in the background
+    """
+
+    def __init__(self, fetch, grid_deg: float, ttl: float, max_stale: float):
+        self.fetch = fetch
+        self.grid_deg = grid_deg
+        self.ttl = ttl
+        self.max_stale = max_stale
+
+    def snap(self, lat: float, lon: float):
+        """Centre of the grid cell containing (lat, lon)."""
+        g = self.grid_deg
+        return (round(round(lat / g) * g, 6), round(round(lon / g) * g, 6))
+
+
+# OWM current weather updates about every 10 min; Open-Meteo models run on ~0.1° grids
+# and refresh hourly; the earthquake feed is coarse in space but should stay recent.
+DEFAULT_POLICIES = {
+    "current": SourcePolicy(_fetch_current_weather_async, grid_deg=0.01, ttl=600, max_stale=1800),
+    "rainfall": SourcePolicy(_fetch_daily_rainfall_async, grid_deg=0.1, ttl=1800, max_stale=7200),
+    "earthquakes": SourcePolicy(_fetch_earthquakes_async, grid_deg=0.25, ttl=300, max_stale=900),
+}
+
+
+class _CacheEntry:
+    __slots__ = ("value", "fetched_at")
+
+    def __init__(self, value, fetched_at: float):
+        self.value = value
+        self.fetched_at = fetched_at
+
+
+# ---------------- Grid-snapped Weather Cache ----------------
+class WeatherCache:
+    """
+    Upstream results keyed by (source, snapped lat, snapped lon).
+    Fresh entries are returned directly, stale ones are returned while a
+    background task refetches the cell, and misses wait for one fetch that
+    concurrent callers for the same cell share. Failed fetches are not cached.
+    """
+
+    def __init__(self, policies: dict = None, max_entries: int = WEATHER_CACHE_MAX_ENTRIES):
+        self.policies = policies or DEFAULT_POLICIES
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # key -> _CacheEntry, LRU order
+        self._inflight = {}             # key -> asyncio.Task fetching that cell
+        self.counters = {
+            name: {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "prefetches": 0, "errors": 0}
+            for name in self.policies
+        }
+        self.evictions = 0
+
+    async def get(self, source: str, lat: float, lon: float):
+        policy = self.policies[source]
+        key = (source, *policy.snap(lat, lon))
+        counters = self.counters[source]
+        entry = self._entries.get(key)
+
+        if entry is not None:
+            age = time.monotonic() - entry.fetched_at
+            if age < policy.ttl:
+                self._entries.move_to_end(key)
+                counters["hits"] += 1
+                return entry.value
+            if age < policy.ttl + policy.max_stale:
+                self._entries.move_to_end(key)
+                counters["stale_hits"] += 1
+                if key not in self._inflight:
+                    counters["refreshes"] += 1
+                    self._start_fetch(key, policy)
+                return entry.value
+
+        counters["misses"] += 1
+        task = self._inflight.get(key) or self._start_fetch(key, policy)
+        return await asyncio.shield(task)
+
+    async def warm(self, source: str, lat: float, lon: float, refresh_ahead: float = 0.75, max_age: float = None):
+        """
+        Fetch the cell now if it is missing or past refresh_ahead of its TTL
+        (or older than max_age, if that is sooner), so readers keep getting
+        fresh hits; used by the background prefetcher.
+        """
+        policy = self.policies[source]
+        key = (source, *policy.snap(lat, lon))
+        if not self.needs_warming(source, lat, lon, refresh_ahead, max_age):
+            return self._entries[key].value
+        self.counters[source]["prefetches"] += 1
+        task = self._inflight.get(key) or self._start_fetch(key, policy)
+        return await asyncio.shield(task)
+
+    def cell(self, source: str, lat: float, lon: float):
+        """Snapped (lat, lon) this source caches the point under."""
+        return self.policies[source].snap(lat, lon)
+
+    def needs_warming(self, source: str, lat: float, lon: float, refresh_ahead: float = 0.75,
+                      max_age: float = None) -> bool:
+        policy = self.policies[source]
+        entry = self._entries.get((source, *policy.snap(lat, lon)))
+        threshold = policy.ttl * refresh_ahead
+        if max_age is not None:
+            threshold = min(threshold, max_age)
+        return entry is None or time.monotonic() - entry.fetched_at >= threshold
+
+    def put(self, source: str, lat: float, lon: float, value):
+        """Store a value fetched elsewhere (e.g. a multi-location request) for the cell of (lat, lon)."""
+        self.counters[source]["prefetches"] += 1
+        self._store((source, *self.policies[source].snap(lat, lon)), value)
+
+    def _start_fetch(self, key, policy: SourcePolicy) -> asyncio.Task:
+        task = asyncio.create_task(self._fetch(key, policy))
+        # Background refreshes may fail with nobody awaiting them; already logged in _fetch
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._inflight[key] = task
+        return task
+
+    async def _fetch(self, key, policy: SourcePolicy):
+        source, lat, lon = key
+        try:
+            value = await policy.fetch(lat, lon)
+        except Exception as e:
+            self.counters[source]["errors"] += 1
+            if key in self._entries:
+                print(f"⚠️ Refresh of {source} at ({lat}, {lon}) failed, serving cached value: {e}")
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        self._store(key, value)
+        return value
+
+    def _store(self, key, value):
+        self._entries[key] = _CacheEntry(value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def close(self):
+        """Cancel background refreshes (called on shutdown)."""
+        tasks = list(self._inflight.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._inflight.clear()
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        sources = {}
+        for name, policy in self.policies.items():
+            ages = [now - e.fetched_at for (source, _, _), e in self._entries.items() if source == name]
+            counters = self.counters[name]
+            lookups = counters["hits"] + counters["stale_hits"] + counters["misses"]
+            sources[name] = {
+                **counters,
+                "hit_ratio": round((counters["hits"] + counters["stale_hits"]) / lookups, 4) if lookups else None,
+                "cells": len(ages),
+                "mean_age_s": round(sum(ages) / len(ages), 1) if ages else None,
+                "max_age_s": round(max(ages), 1) if ages else None,
+                "grid_deg": policy.grid_deg,
+                "ttl_s": policy.ttl,
+                "max_stale_s": policy.max_stale,
+            }
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "evictions": self.evictions,
+            "refreshing": len(self._inflight),
+            "sources": sources,
+        }
+
+
+weather_cache = WeatherCache()
+
+
+async def get_weather_cached(lat: float = None, lon: float = None):
+    """
+    get_weather_async with every upstream source served through weather_cache.
+    Vibration comes from the regional earthquake feed when it covers the point.
+    """
+    lat, lon, location_name = _resolve_location(lat, lon)
+    vibration = vibration_estimate(lat, lon, find_mine_data(lat, lon)["id"])
+    lookups = [weather_cache.get("current", lat, lon), weather_cache.get("rainfall", lat, lon)]
+    if vibration is None:
+        lookups.append(weather_cache.get("earthquakes", lat, lon))
+    results = await asyncio.gather(*lookups, return_exceptions=True)
+    eq_result = vibration if vibration is not None else results[2]
+    return _merge_weather(lat, lon, location_name, results[0], results[1], eq_result)
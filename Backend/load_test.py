@@ -0,0 +1,74 @@
+"""
+Load test: /realtimedata latency with and without chats in flight.
+
+    python load_test.py --base-url http://localhost:8000 --chats 20 --duration 20
+
+Phase 1 probes /realtimedata alone; phase 2 probes it while `--chats`
+clients keep /chat busy. If LLM calls were blocking the event loop, the
+phase 2 percentiles would climb to the generation time.
+"""
+import time
+import asyncio
+import argparse
+import aiohttp
+
+
+def _summary(latencies: list) -> dict:
+    if not latencies:
+        return {"requests": 0}
+    ordered = sorted(latencies)
+    pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 1)
+    return {"requests": len(ordered), "p50_ms": pick(0.5), "p95_ms": pick(0.95), "max_ms": round(ordered[-1], 1)}
+
+
+async def probe(session, url: str, until: float, interval: float) -> list:
+    latencies = []
+    while time.monotonic() < until:
+        start = time.perf_counter()
+        async with session.get(url) as resp:
+            await resp.read()
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def chatter(session, url: str, until: float, user: int, results: list):
+    while time.monotonic() < until:
+        start = time.perf_counter()
+        payload = {"user_query": "Environmental status of Gokul Open Pit Mine", "user_id": f"load-{user}"}
+        async with session.post(url, json=payload) as resp:
+            await resp.read()
+        results.append((time.perf_counter() - start) * 1000)
+
+
+async def main(args):
+    timeout = aiohttp.ClientTimeout(total=None)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        probe_url = f"{args.base_url}{args.probe_path}"
+
+        # ---- Phase 1: baseline ----
+        baseline = await probe(session, probe_url, time.monotonic() + args.duration, args.interval)
+
+        # ---- Phase 2: same probe while chats are in flight ----
+        until = time.monotonic() + args.duration
+        chat_latencies = []
+        chats = [chatter(session, f"{args.base_url}/chat", until, i, chat_latencies) for i in range(args.chats)]
+        loaded, *_ = await asyncio.gather(probe(session, probe_url, until, args.interval), *chats)
+
+        async with session.get(f"{args.base_url}/metrics") as resp:
+            llm = (await resp.json()).get("llm")
+
+    print(f"🟢 {args.probe_path} alone:         {_summary(baseline)}")
+    print(f"🟢 {args.probe_path} during chats:  {_summary(loaded)}")
+    print(f"🟢 /chat ({args.chats} clients):     {_summary(chat_latencies)}")
+    print(f"🟢 llm metrics: {llm}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--probe-path", default="/realtimedata")
+    parser.add_argument("--chats", type=int, default=20, help="concurrent /chat clients")
+    parser.add_argument("--duration", type=float, default=20, help="seconds per phase")
+    parser.add_argument("--interval", type=float, default=0.1, help="seconds between probes")
+    asyncio.run(main(parser.parse_args()))
@@ -1,20 +1,45 @@
-from fastapi import FastAPI, UploadFile, File
+from fastapi import FastAPI, UploadFile, File, Request, HTTPException
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+import json
 import shutil
 import os
 import tempfile
 import subprocess
 import uuid
 from fastapi import Query
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
+from typing import Dict, List, Optional
 
 # Chatbot , ML imports and Realtime API
-from Chatbot.Chatbot import process_user_query
+from Chatbot.Chatbot import process_user_query_async, process_user_query_stream_async
+from Master_LLM.llm_client import llm_client_stats
+from Chatbot.tool_runner import tool_runner
+from Chatbot.response_cache import response_cache
+from Chatbot.session_store import session_store
 from Master_LLM.ML_Models.Single_frame.genai import check_frame_for_anomaly
 from Master_LLM.ML_Models.Video.genai import process_video_and_summarize
-from Master_LLM.ML_Models.Catboost.catboost import predict_slope_stability
-from Realtime_API.Realtime_API import get_weather
+from Master_LLM.ML_Models.Catboost.catboost import (
+    predict_slope_stability, predict_slope_batch, build_feature_matrix, model_registry,
+    BatchTooLargeError, MAX_BATCH_ROWS,
+)
+from Master_LLM.ML_Models.Catboost.prediction_cache import slope_prediction_cache
+from Master_LLM.ML_Models.Catboost.sensitivity import sweep_slope_stability, MAX_SWEEP_POINTS
+from Master_LLM.ML_Models.Catboost.uncertainty import monte_carlo_slope_stability
+from Master_LLM.ML_Models.Limit_Equilibrium.limit_equilibrium import (
+    factor_of_safety, DEFAULT_INFINITE_SLOPE_DEPTH_M
+)
+from Realtime_API.Realtime_API import close_http_session, find_mine_by_id
+from Realtime_API.single_flight import single_flight_stats
+from Realtime_API.weather_cache import get_weather_cached, weather_cache
+from Realtime_API.prefetch import weather_prefetcher, weather_broadcaster, weather_event_stream
+from Realtime_API.earthquake_feed import earthquake_feed
+from Realtime_API.antecedent_rainfall import antecedent_rainfall
+from Realtime_API.timeseries_store import timeseries_store, SERIES_FIELDS
+from Realtime_API.fleet_risk import fleet_scorer, mine_slope_risk
+from Realtime_API.slope_forecast import project_fleet_slope_risk, forecast_cache
 
 app = FastAPI(title="Gemini Mine Safety Bot API")
 
@@ -34,6 +59,26 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ---- Startup: load models once per process, start background scoring ----
+@app.on_event("startup")
+async def warm_up_models():
+    model_registry.warm_up()
+    earthquake_feed.start()
+    antecedent_rainfall.start()
+    fleet_scorer.start()
+    weather_prefetcher.start()
+    timeseries_store.start()
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    await fleet_scorer.stop()
+    await weather_prefetcher.stop()
+    await timeseries_store.stop()
+    await earthquake_feed.stop()
+    await antecedent_rainfall.stop()
+    await weather_cache.close()
+    await close_http_session()
+
 # ---- Request/Response Models ----
 class QueryRequest(BaseModel):
     user_query: str
@@ -53,11 +98,50 @@ class SlopePredictionRequest(BaseModel):
     temperature_c: float
     vibrations_ms2: float
 
+class SlopeFoSRequest(SlopePredictionRequest):
+    depth_m: float = DEFAULT_INFINITE_SLOPE_DEPTH_M  # infinite-slope slip depth
+
+class SlopeBatchRequest(BaseModel):
+    # Either rows (each in FEATURE_NAMES order) or one list per feature
+    rows: Optional[List[List[float]]] = None
+    columns: Optional[Dict[str, List[float]]] = None
+
+class SweepAxis(BaseModel):
+    feature: str  # one of the SlopePredictionRequest fields
+    start: float
+    stop: float
+    steps: int = Field(50, ge=2, le=MAX_SWEEP_POINTS)
+
+class SlopeSweepRequest(BaseModel):
+    base: SlopePredictionRequest
+    axes: List[SweepAxis]  # one or two axes
+    threshold: float = 0.5
+
+class InputDistribution(BaseModel):
+    dist: str = "normal"  # normal | lognormal | uniform | triangular
+    mean: Optional[float] = None  # defaults to the base value
+    std: Optional[float] = None
+    cv: Optional[float] = None
+    low: Optional[float] = None
+    high: Optional[float] = None
+    mode: Optional[float] = None
+    min: Optional[float] = None  # clip bounds
+    max: Optional[float] = None
+
+class SlopeMonteCarloRequest(BaseModel):
+    base: SlopePredictionRequest
+    # Keyed by SlopePredictionRequest field; omitted -> cohesion, friction angle, water depth ratio
+    distributions: Optional[Dict[str, InputDistribution]] = None
+    n_samples: int = 10000
+    threshold: float = 0.5
+    seed: Optional[int] = None
+
 # ---- Routes ----
 @app.post("/chat", response_model=QueryResponse)
 async def chat_with_bot(req: QueryRequest):
-    # Call your chatbot logic with the user query
-    result = process_user_query(req.user_query)
+    # Call your chatbot logic with the user query (history is kept per user_id);
+    # the blocking model call runs on the chatbot's own bounded pool, off the event loop
+    result = await process_user_query_async(req.user_query, req.user_id)
 
     # Ensure result contains "final" text
     if isinstance(result, dict) and "final" in result:
@@ -67,6 +151,25 @@ async def chat_with_bot(req: QueryRequest):
     else:
         return QueryResponse(response="⚠️ Unexpected response format from chatbot")
 
+@app.post("/chat/stream")
+async def chat_with_bot_stream(req: QueryRequest):
+    """
+    Streaming /chat over Server-Sent Events: "delta" events carry reply text as
+    the model generates it, then "done" has the full reply (or "error").
+    "tools" events name the tools being run before the answer; "reset" means
+    the text streamed so far is not the reply and should be cleared.
+    """
+    async def events():
+        async for event, text in process_user_query_stream_async(req.user_query, req.user_id):
+            key = {"delta": "text", "reset": "text", "done": "response", "error": "error", "tools": "tools"}[event]
+            yield f"event: {event}\ndata: {json.dumps({key: text}, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 # ---- Video Prediction Endpoint ----
 
 def convert_webm_to_mp4(webm_path: str) -> str:
@@ -144,13 +247,97 @@ async def real_time_data(lat: float = Query(None), lon: float = Query(None)):
     Get current temperature and 7-day rainfall forecast.
     If lat/lon not provided, defaults to Gokul Open Pit Mine, Nagpur.
     """
-    data = get_weather(lat, lon)
+    # Served from the grid-snapped cache; upstream is only hit per cell and TTL
+    data = await get_weather_cached(lat, lon)
+    # Keep a history for charts (no-op for points that are not a registered mine)
+    timeseries_store.record(data.get("id"), data)
     return data
 
+@app.get("/realtimedata/stream")
+async def real_time_data_stream(request: Request, mine_ids: Optional[List[int]] = Query(None)):
+    """
+    Server-Sent Events: current weather + mine data for each requested mine
+    (all mines if omitted), then a "weather" event whenever the prefetcher sees a change.
+    """
+    return StreamingResponse(
+        weather_event_stream(mine_ids, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 # ---- Predict Slope ----
 @app.post("/predict_slope")
 async def predict_slope(req: SlopePredictionRequest):
-    result = predict_slope_stability(
+    # Dashboards resend near-identical readings: memoized on the quantized inputs
+    try:
+        return slope_prediction_cache.predict(**req.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"❌ Invalid slope input: {e}")
+
+@app.post("/predict_slope/batch")
+async def predict_slope_batch_route(req: SlopeBatchRequest):
+    """Score N slope rows with a single predict_proba pass; results are columnar."""
+    try:
+        X = await run_in_threadpool(
+            build_feature_matrix, rows=req.rows, columns=req.columns, max_rows=MAX_BATCH_ROWS
+        )
+    except ValueError as e:
+        # BatchTooLargeError included: every invalid payload is a 422
+        raise HTTPException(status_code=422, detail=f"❌ Invalid batch payload: {e}")
+    # Tens of thousands of rows is real CPU time: keep it off the event loop
+    return await run_in_threadpool(predict_slope_batch, X)
+
+@app.post("/predict_slope/sweep")
+async def predict_slope_sweep(req: SlopeSweepRequest):
+    """Probability surface and failure boundary over a 1-D/2-D parameter grid, in one model pass."""
+    try:
+        # Up to MAX_SWEEP_POINTS model rows: keep it off the event loop
+        return await run_in_threadpool(
+            sweep_slope_stability,
+            base=req.base.model_dump(),
+            axes=[axis.model_dump() for axis in req.axes],
+            threshold=req.threshold,
+        )
+    except ValueError as e:
+        return {"success": False, "error": f"❌ Invalid sweep: {e}"}
+
+@app.post("/predict_slope/monte_carlo")
+async def predict_slope_monte_carlo(req: SlopeMonteCarloRequest):
+    """Failure probability under input uncertainty (chunked, fixed-memory sampling)."""
+    distributions = None
+    if req.distributions is not None:
+        distributions = {k: v.model_dump(exclude_none=True) for k, v in req.distributions.items()}
+    try:
+        # CPU-bound for large n_samples: keep it off the event loop
+        return await run_in_threadpool(
+            monte_carlo_slope_stability,
+            base=req.base.model_dump(),
+            distributions=distributions,
+            n_samples=req.n_samples,
+            threshold=req.threshold,
+            seed=req.seed,
+        )
+    except (ValueError, KeyError) as e:
+        return {"success": False, "error": f"❌ Invalid Monte Carlo request: {e}"}
+
+@app.post("/predict_slope/fos")
+async def predict_slope_fos(req: SlopeFoSRequest):
+    """Limit-equilibrium factor of safety (infinite slope + Bishop), next to the ML prediction."""
+    try:
+        fos = await run_in_threadpool(
+            factor_of_safety,
+            height_m=req.height,
+            cohesion_kpa=req.cohesion,
+            friction_angle_deg=req.friction_angle,
+            unit_weight_kn_m3=req.unit_weight,
+            slope_angle_deg=req.slope_angle,
+            water_depth_ratio=req.water_depth_ratio,
+            depth_m=req.depth_m,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"❌ Invalid slope section: {e}")
+    ml = await run_in_threadpool(
+        predict_slope_stability,
         height=req.height,
         cohesion=req.cohesion,
         friction_angle=req.friction_angle,
@@ -161,8 +348,75 @@ async def predict_slope(req: SlopePredictionRequest):
         temperature_c=req.temperature_c,
         vibrations_ms2=req.vibrations_ms2
     )
+    return {"fos": fos, "ml": ml}
+
+# ---- Fleet Slope Risk (precomputed in the background) ----
+@app.get("/mines/slope_risk")
+async def fleet_slope_risk():
+    """Latest slope risk for every registered mine, served from memory."""
+    return fleet_scorer.snapshot()
+
+@app.get("/mines/slope_risk/forecast")
+async def fleet_slope_risk_forecast(mine_ids: Optional[List[int]] = Query(None)):
+    """7-day slope risk timeline per mine from the daily rainfall forecast (one model pass)."""
+    return await project_fleet_slope_risk(mine_ids)
+
+@app.get("/mines/{mine_id}/slope_risk")
+async def slope_risk_by_mine(mine_id: int, max_age: float = Query(300)):
+    """
+    Look up the mine, assemble its features server-side (geotechnical fields +
+    latest weather/vibration) and return the prediction with the inputs used.
+    """
+    result = await mine_slope_risk(mine_id, max_age=max_age)
+    if result is None:
+        return {"success": False, "error": f"❌ Unknown mine id {mine_id}"}
     return result
 
+@app.get("/mines/{mine_id}/history")
+async def mine_weather_history(
+    mine_id: int,
+    start: float = Query(None),
+    end: float = Query(None),
+    points: int = Query(500),
+    method: str = Query("minmax"),
+    fields: Optional[List[str]] = Query(None),
+):
+    """
+    Recorded weather/vibration samples of a mine between start and end (epoch
+    seconds, default last 24 h), downsampled server-side to about `points` per field.
+    """
+    if find_mine_by_id(mine_id) is None:
+        return {"success": False, "error": f"❌ Unknown mine id {mine_id}"}
+    if method not in ("minmax", "lttb"):
+        return {"success": False, "error": f"❌ Unknown method {method!r}, use 'minmax' or 'lttb'"}
+    unknown = [f for f in fields or [] if f not in SERIES_FIELDS]
+    if unknown:
+        return {"success": False, "error": f"❌ Unknown fields {unknown}, available: {SERIES_FIELDS}"}
+    # Older ranges are read from disk
+    return await run_in_threadpool(timeseries_store.query, mine_id, start, end, points, method, fields)
+
+# ---- Metrics Endpoint ----
+@app.get("/metrics")
+async def metrics():
+    """Load/hit counters of the in-memory models, caches and background tasks."""
+    return {
+        "models": model_registry.stats(),
+        "slope_prediction_cache": slope_prediction_cache.stats(),
+        "fleet_scoring": fleet_scorer.stats(),
+        "forecast_cache": forecast_cache.stats(),
+        "weather_cache": weather_cache.stats(),
+        "weather_prefetch": weather_prefetcher.stats(),
+        "weather_stream": weather_broadcaster.stats(),
+        "earthquake_feed": earthquake_feed.stats(),
+        "antecedent_rainfall": antecedent_rainfall.stats(),
+        "timeseries": timeseries_store.stats(),
+        "single_flight": single_flight_stats(),
+        "chat_sessions": session_store.stats(),
+        "llm": llm_client_stats(),
+        "chat_tools": tool_runner.stats(),
+        "chat_cache": response_cache.stats(),
+    }
+
 # ---- Curl Endpoint ----
 items = ["apple", "banana", "cherry", "date"]
 counter = {"index": 0}  # keep track of current index
@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Import modules the way main.py does, from Backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Realtime_API and the chatbot tools refuse to import without keys; tests never call upstream
+os.environ.setdefault("OWM_API_KEY", "test")
+os.environ.setdefault("TAVILY_API_KEY", "test")
@@ -0,0 +1,78 @@
+import asyncio
+import threading
+import numpy as np
+
+from Realtime_API import earthquake_feed as feed_module
+from Realtime_API.earthquake_feed import RegionalEarthquakeFeed
+
+
+class _Snapshot:
+    def __init__(self, ids, lats, lons):
+        self.columns = {"id": np.array(ids), "latitude": np.array(lats, dtype=float),
+                        "longitude": np.array(lons, dtype=float)}
+
+    def position(self, mine_id):
+        hits = np.flatnonzero(self.columns["id"] == mine_id)
+        return int(hits[0]) if hits.size else None
+
+
+class _Registry:
+    def __init__(self, snapshot):
+        self.current = snapshot
+
+    def snapshot(self):
+        return self.current
+
+    def column(self, name):
+        return self.current.columns[name]
+
+
+def _geojson(mag):
+    return {"features": [{"properties": {"mag": mag, "time": 0, "place": "x"},
+                          "geometry": {"coordinates": [85.0, 23.0, 10.0]}}]}
+
+
+def test_refresh_swaps_state_without_scoring_on_lookups(monkeypatch):
+    registry = _Registry(_Snapshot([1], [23.1], [85.1]))
+    monkeypatch.setattr(feed_module, "mine_registry", registry)
+    magnitudes = iter([4.0, 6.0])
+
+    async def fake_get_json(url, params):
+        return _geojson(next(magnitudes))
+
+    monkeypatch.setattr(feed_module, "_get_json_async", fake_get_json)
+    scoring, release = threading.Event(), threading.Event()
+    score_fleet = feed_module._score_fleet
+
+    def slow_score(*args):
+        scoring.set()
+        release.wait(5)
+        return score_fleet(*args)
+
+    async def scenario():
+        feed = RegionalEarthquakeFeed(interval=0)
+        feed._loop = asyncio.get_running_loop()
+        release.set()
+        await feed.refresh()
+        old = feed.vibration_for_mine(1)
+
+        release.clear()
+        scoring.clear()
+        monkeypatch.setattr(feed_module, "_score_fleet", slow_score)
+        pending = asyncio.create_task(feed.refresh())
+        await asyncio.to_thread(scoring.wait, 5)
+        # While the new matrix is being built, lookups serve the previous one
+        assert feed.vibration_for_mine(1) == old
+        release.set()
+        await pending
+        assert feed.vibration_for_mine(1) > old
+
+        # A registry reload is rescored in the background; lookups keep the old arrays meanwhile
+        registry.current = _Snapshot([1, 2], [23.1, 23.2], [85.1, 85.2])
+        assert feed.vibration_for_mine(2) is None
+        await asyncio.sleep(0)
+        await feed._rescore_task
+        assert feed.vibration_for_mine(2) is not None
+        assert feed.rescores == 1
+
+    asyncio.run(scenario())
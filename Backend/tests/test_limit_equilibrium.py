@@ -0,0 +1,49 @@
+import json
+import warnings
+
+import numpy as np
+import pytest
+
+from Master_LLM.ML_Models.Limit_Equilibrium.limit_equilibrium import factor_of_safety, _finite_or_none
+
+# Mine 1 from Realtime_API/data/mines.csv
+MINE_1 = dict(height_m=42, cohesion_kpa=23, friction_angle_deg=31, unit_weight_kn_m3=21,
+              slope_angle_deg=37, water_depth_ratio=0.14)
+
+
+def test_registered_mine_has_finite_fos():
+    result = factor_of_safety(**MINE_1)
+    assert 0.5 < result["infinite_slope"]["fos"] < 5
+    assert 0.5 < result["bishop_simplified"]["fos"] < 5
+    json.dumps(result, allow_nan=False)
+
+
+@pytest.mark.parametrize("override", [
+    {"slope_angle_deg": 0}, {"slope_angle_deg": 90}, {"slope_angle_deg": -5},
+    {"height_m": 0}, {"unit_weight_kn_m3": 0}, {"depth_m": 0},
+])
+def test_undefined_sections_are_rejected(override):
+    with pytest.raises(ValueError):
+        factor_of_safety(**{**MINE_1, **override})
+
+
+def test_near_flat_slope_stays_json_safe():
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        result = factor_of_safety(**{**MINE_1, "slope_angle_deg": 0.5})
+    json.dumps(result, allow_nan=False)
+
+
+@pytest.mark.parametrize("friction_angle_deg", [0, 2])
+def test_cohesionless_low_friction_slope_has_no_divide_warnings(friction_angle_deg):
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        result = factor_of_safety(**{**MINE_1, "cohesion_kpa": 0, "friction_angle_deg": friction_angle_deg})
+    assert result["bishop_simplified"]["fos"] < 0.5
+    json.dumps(result, allow_nan=False)
+
+
+def test_non_finite_fos_maps_to_none():
+    assert _finite_or_none(np.inf) is None
+    assert _finite_or_none(np.nan) is None
+    assert _finite_or_none(np.float64(1.25)) == 1.25
@@ -0,0 +1,44 @@
+import os
+import sys
+import time
+import asyncio
+import threading
+import subprocess
+
+import pytest
+
+from Master_LLM.llm_client import LLMClient, LLMTimeoutError
+
+MASTER_LLM_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Master_LLM")
+
+
+def test_timed_out_call_keeps_its_slot_until_it_finishes():
+    async def scenario():
+        client = LLMClient("test_slot", max_concurrency=1, max_queue=4, timeout=0.05)
+        release = threading.Event()
+
+        with pytest.raises(LLMTimeoutError):
+            await client.run(release.wait, 5)
+        # The worker is still busy, so its slot is still taken
+        assert client.in_flight == 1
+        with pytest.raises(LLMTimeoutError):
+            await client.run(time.sleep, 0)
+
+        release.set()
+        for _ in range(100):
+            if client.in_flight == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert client.in_flight == 0
+        assert await client.run(lambda: "ok") == "ok"
+        assert client.counters["timeouts"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_shared_client_resolves_from_master_llm():
+    # Inside_LLM is run from Master_LLM/, where the Backend packages are not on the path
+    code = ("import importlib.util as u; "
+            "assert u.find_spec('llm_client') and u.find_spec('Inside_LLM.prompts'); "
+            "import llm_client")
+    subprocess.run([sys.executable, "-c", code], cwd=MASTER_LLM_DIR, check=True)
@@ -0,0 +1,32 @@
+import json
+
+from Realtime_API.mine_registry import MineRegistry, MINES_CSV
+
+# Mine 1 exactly as the hardcoded MINE_DATA served it before the CSV registry
+MINE_1 = {
+    "id": 1, "latitude": 18.71, "longitude": 81.05,
+    "area_acres": 400, "sensors": 315, "active_sensors": 315,
+    "sync_accuracy": "97.8%", "update_rate": "2.4 ms",
+    "vertices": "1.9M", "triangles": "1.4M", "resolution": "1.1 cm³",
+    "last_update": "2 min ago", "render_time": "15.9 ms",
+    "memory_usage": "720 MB", "gpu_load": "31%",
+    "height_m": 42, "cohesion_kpa": 23, "friction_angle_deg": 31,
+    "unit_weight_kn_m3": 21, "slope_angle_deg": 37, "water_depth_ratio": 0.14, "fos": 1.45,
+}
+
+
+def test_record_serializes_exactly_as_before():
+    record = MineRegistry(MINES_CSV).by_id(1)
+    assert json.dumps(record) == json.dumps(MINE_1)
+
+
+def test_fractional_geotechnical_values_are_kept(tmp_path):
+    header, row = open(MINES_CSV).read().splitlines()[:2]
+    fields = dict(zip(header.split(","), row.split(",")))
+    fields["height_m"] = "42.5"
+    path = tmp_path / "mines.csv"
+    path.write_text(",".join(fields) + "\n" + ",".join(fields.values()) + "\n")
+
+    record = MineRegistry(str(path)).by_id(int(fields["id"]))
+    assert record["height_m"] == 42.5
+    assert isinstance(record["cohesion_kpa"], int)
@@ -0,0 +1,65 @@
+import os
+import shutil
+
+import numpy as np
+
+from Master_LLM.ML_Models.Catboost.oblivious_trees import (
+    CBM_PATH, check_parity, load_or_export, _random_inputs,
+)
+from Master_LLM.ML_Models.Catboost.model_registry import ModelRegistry, file_hash
+
+
+def test_numpy_evaluator_matches_catboost(tmp_path):
+    assert check_parity(n=5000, atol=1e-9, npz_path=str(tmp_path / "trees.npz")) <= 1e-9
+
+
+def test_export_follows_the_cbm(tmp_path):
+    npz = str(tmp_path / "trees.npz")
+    ensemble = load_or_export(CBM_PATH, npz)
+    assert ensemble.source_version == file_hash(CBM_PATH)
+
+    # A cached export from a different model is replaced, not served
+    stale = np.load(npz)
+    np.savez(npz, **{**stale, "source_version": np.array("0" * 12)})
+    assert load_or_export(CBM_PATH, npz).source_version == file_hash(CBM_PATH)
+    assert str(np.load(npz)["source_version"]) == file_hash(CBM_PATH)
+
+
+def test_numpy_backend_hot_reloads_on_cbm_change(tmp_path):
+    cbm = str(tmp_path / "model.cbm")
+    npz = str(tmp_path / "trees.npz")
+    shutil.copy(CBM_PATH, cbm)
+    registry = ModelRegistry(check_interval=0)
+    registry.register("slope_model", cbm, lambda path: load_or_export(path, npz))
+    first = registry.get("slope_model")
+
+    with open(cbm, "ab") as f:
+        f.write(b"\0")   # new content, same model
+    os.utime(cbm, ns=(1, 1))
+    second = registry.get("slope_model")
+    assert second is not first
+    assert second.source_version == file_hash(cbm)
+    X = _random_inputs(100)
+    np.testing.assert_allclose(first.predict_proba(X), second.predict_proba(X))
+
+
+def test_numpy_backend_never_writes_the_export(tmp_path, monkeypatch, capsys):
+    from Master_LLM.ML_Models.Catboost import catboost as slope_catboost
+    from Master_LLM.ML_Models.Catboost.oblivious_trees import NPZ_PATH, ObliviousTreeEnsemble
+
+    # The committed export matches the committed model
+    monkeypatch.setattr(slope_catboost, "TREES_PATH", NPZ_PATH)
+    assert isinstance(slope_catboost._load_trees(CBM_PATH), ObliviousTreeEnsemble)
+
+    missing = tmp_path / "trees.npz"
+    monkeypatch.setattr(slope_catboost, "TREES_PATH", str(missing))
+    model = slope_catboost._load_trees(CBM_PATH)
+    assert not isinstance(model, ObliviousTreeEnsemble)
+    assert not missing.exists()
+
+    stale = np.load(NPZ_PATH)
+    np.savez(missing, **{**stale, "source_version": np.array("0" * 12)})
+    before = missing.read_bytes()
+    assert not isinstance(slope_catboost._load_trees(CBM_PATH), ObliviousTreeEnsemble)
+    assert missing.read_bytes() == before
+    assert "serving native CatBoost" in capsys.readouterr().out
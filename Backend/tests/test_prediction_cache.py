@@ -0,0 +1,37 @@
+import math
+
+import pytest
+
+from Master_LLM.ML_Models.Catboost.catboost import model_registry, predict_slope_stability
+from Master_LLM.ML_Models.Catboost.prediction_cache import SlopePredictionCache
+
+FEATURES = dict(height=40, cohesion=25, friction_angle=32, unit_weight=21, slope_angle=38,
+                water_depth_ratio=0.15, rainfall_mm_7d=20, temperature_c=30, vibrations_ms2=0.2)
+
+
+@pytest.mark.parametrize("value", [math.nan, math.inf, -math.inf, 1e308])
+def test_non_finite_inputs_are_rejected_before_keying(value):
+    cache = SlopePredictionCache()
+    with pytest.raises(ValueError):
+        cache.predict(**{**FEATURES, "cohesion": value})
+    assert cache.stats()["misses"] == 0
+
+
+def test_nearby_inputs_share_one_entry():
+    cache = SlopePredictionCache()
+    first = cache.predict(**FEATURES)
+    second = cache.predict(**{**FEATURES, "cohesion": 25.04})
+    assert first == second
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert first == predict_slope_stability(**FEATURES)
+
+
+def test_one_registry_read_per_model_per_request():
+    cache = SlopePredictionCache()
+    cache.predict(**FEATURES)
+    before = {name: s["hits"] for name, s in model_registry.stats().items()}
+    cache.predict(**FEATURES)              # hit
+    cache.predict(**{**FEATURES, "height": 41})   # miss, scored
+    after = {name: s["hits"] for name, s in model_registry.stats().items()}
+    assert after["slope_model"] - before["slope_model"] == 2
+    assert after["slope_label_encoder"] - before["slope_label_encoder"] == 2
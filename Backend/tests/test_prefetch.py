@@ -0,0 +1,94 @@
+import time
+import asyncio
+
+from Realtime_API.weather_cache import WeatherCache, SourcePolicy
+from Realtime_API.prefetch import UpdateBroadcaster, WeatherPrefetcher
+
+
+def _cache_with_entry(age: float) -> WeatherCache:
+    async def fetch(lat, lon):
+        return {"lat": lat}
+
+    cache = WeatherCache({"current": SourcePolicy(fetch, grid_deg=0.01, ttl=600, max_stale=1800)})
+    cache.put("current", 23.0, 85.0, {"lat": 23.0})
+    entry = next(iter(cache._entries.values()))
+    entry.fetched_at = time.monotonic() - age
+    return cache
+
+
+def test_max_age_caps_the_ttl_threshold():
+    # 300 s old: not due by 0.75 x 600 s TTL, but due for a 300 s prefetch interval
+    cache = _cache_with_entry(age=300)
+    prefetcher = WeatherPrefetcher(UpdateBroadcaster(), interval=300)
+    assert not cache.needs_warming("current", 23.0, 85.0)
+    assert cache.needs_warming("current", 23.0, 85.0, max_age=prefetcher.max_age)
+    assert prefetcher.max_age < prefetcher.interval
+
+
+def test_prefetcher_pauses_without_subscribers():
+    async def scenario():
+        broadcaster = UpdateBroadcaster()
+        prefetcher = WeatherPrefetcher(broadcaster, interval=3600)
+        cycles = []
+
+        async def run_cycle():
+            cycles.append(time.monotonic())
+
+        prefetcher.run_cycle = run_cycle
+        prefetcher.start()
+        await asyncio.sleep(0.05)
+        assert cycles == []
+        assert prefetcher.stats()["paused"]
+
+        subscriber = broadcaster.subscribe()
+        await asyncio.sleep(0.05)
+        assert len(cycles) == 1
+        assert not prefetcher.stats()["paused"]
+
+        broadcaster.unsubscribe(subscriber)
+        assert prefetcher.stats()["paused"]
+        await prefetcher.stop()
+
+    asyncio.run(scenario())
+
+
+def test_stream_replays_cached_mines_and_queues_the_rest(monkeypatch):
+    from Realtime_API import prefetch
+
+    async def scenario():
+        broadcaster = UpdateBroadcaster()
+        prefetcher = WeatherPrefetcher(broadcaster, interval=3600, requests_per_second=20)
+        mines = {1: {"id": 1}, 2: {"id": 2}, 3: {"id": 3}}
+        refreshed = []
+
+        async def refresh_mine(mine):
+            refreshed.append((mine["id"], time.monotonic()))
+            broadcaster.publish(mine["id"], {"mine_id": mine["id"], "data": {"fresh": True}})
+
+        async def run_cycle():
+            pass
+
+        prefetcher.refresh_mine = refresh_mine
+        prefetcher.run_cycle = run_cycle
+        prefetcher._latest[1] = (time.monotonic(), {"cached": True})
+        monkeypatch.setattr(prefetch, "weather_broadcaster", broadcaster)
+        monkeypatch.setattr(prefetch, "weather_prefetcher", prefetcher)
+        monkeypatch.setattr(prefetch, "list_mines", lambda: list(mines.values()))
+        monkeypatch.setattr(prefetch, "find_mine_by_id", mines.get)
+
+        stream = prefetch.weather_event_stream()
+        first = await stream.__anext__()
+        # The cached mine is sent at once; nothing was fetched inline for the others
+        assert '"mine_id": 1' in first
+        assert refreshed == []
+
+        prefetcher.start()
+        events = [await asyncio.wait_for(stream.__anext__(), 1) for _ in range(2)]
+        assert sorted(mine_id for mine_id, _ in refreshed) == [2, 3]
+        assert all('"fresh": true' in event for event in events)
+        # Requested refreshes keep the upstream spacing
+        assert refreshed[1][1] - refreshed[0][1] >= prefetcher.spacing * 0.9
+        await stream.aclose()
+        await prefetcher.stop()
+
+    asyncio.run(scenario())
@@ -0,0 +1,47 @@
+from Chatbot.response_cache import ResponseCache, parse_query
+
+
+def test_coordinates_are_kept_whole():
+    assert parse_query("weather at 23.456, 85.123") == (("23.456", "85.123"), "weather")
+    assert parse_query("weather at 23.456, 85.123") != parse_query("weather at 24.456, 86.123")
+    # Swapping latitude and longitude is a different place
+    assert parse_query("weather at 85.123, 23.456")[0] != parse_query("weather at 23.456, 85.123")[0]
+
+
+def test_place_names_ignore_word_order_and_filler():
+    assert parse_query("What is the status of Gevra mine?") == parse_query("gevra opencast mine status")
+
+
+def test_answer_for_one_point_is_not_served_for_another():
+    cache = ResponseCache(max_entries=8, threshold=0.6)
+    result = {"latitude": 23.456, "longitude": 85.123, "radius_km": 50}
+    cache.store("nearby mines at 23.456, 85.123", "Three mines nearby.",
+                {("find_nearby_mines", "23.456, 85.123"): result}, cost_ms=900)
+    assert cache.lookup("nearby mines at 23.456, 85.123") == "Three mines nearby."
+    assert cache.lookup("nearby mines at 24.456, 86.123") is None
+
+
+def test_failed_lookups_are_not_stored():
+    cache = ResponseCache(max_entries=8, threshold=0.6)
+    cache.store("weather in Ranchi", "I couldn't get the weather for Ranchi right now.",
+                {("get_weather", "Ranchi"): {"error": "Weather lookup failed with status 503."}}, cost_ms=500)
+    partial = {"polygon_id": "p1", "soil": None, "weather": {"current": {}}, "ndvi": {"ndvi": 0.4},
+               "registered_mines_nearby": []}
+    cache.store("gevra mine status", "Soil data is unavailable, weather is clear.",
+                {("search_weather_and_soil", "gevra"): partial}, cost_ms=800)
+
+    assert cache.lookup("weather in Ranchi") is None
+    assert cache.lookup("gevra mine status") is None
+    assert cache.stats()["stored"] == 0
+    assert cache.stats()["not_stored"] == 2
+
+
+def test_get_weather_reports_failures_as_errors(monkeypatch):
+    from Chatbot import tools
+
+    class _Response:
+        status_code = 503
+        text = ""
+
+    monkeypatch.setattr(tools.requests, "get", lambda *args, **kwargs: _Response())
+    assert tools.get_weather("Ranchi") == {"error": "Weather lookup failed with status 503."}
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from Master_LLM.ML_Models.Catboost.sensitivity import (
+    MAX_SWEEP_POINTS, build_sweep_grid, failure_boundary, sweep_slope_stability,
+)
+
+BASE = {
+    "height": 40, "cohesion": 25, "friction_angle": 32, "unit_weight": 21, "slope_angle": 38,
+    "water_depth_ratio": 0.15, "rainfall_mm_7d": 20, "temperature_c": 30, "vibrations_ms2": 0.2,
+}
+
+
+def test_1d_crossing_on_a_grid_point_is_found_once():
+    x = np.array([0.0, 1.0, 2.0, 3.0])
+    assert failure_boundary(np.array([0.2, 0.5, 0.8, 0.9]), [x], 0.5) == [1.0]
+    # Touching the threshold from below still counts, once
+    assert failure_boundary(np.array([0.2, 0.5, 0.2, 0.1]), [x], 0.5) == [1.0]
+    assert failure_boundary(np.array([0.2, 0.4, 0.6, 0.8]), [x], 0.5) == [1.5]
+
+
+def _assert_connected(line, max_step):
+    steps = np.linalg.norm(np.diff(np.array(line), axis=0), axis=1)
+    assert steps.max() <= max_step
+
+
+def test_2d_boundary_is_an_ordered_closed_loop():
+    x = y = np.linspace(-1, 1, 41)
+    X, Y = np.meshgrid(x, y, indexing="ij")
+    surface = 1 - np.hypot(X, Y)          # >= 0.5 inside a circle of radius 0.5
+    lines = failure_boundary(surface, [x, y], 0.5)
+
+    assert len(lines) == 1
+    loop = np.array(lines[0])
+    assert np.allclose(loop[0], loop[-1])
+    assert np.allclose(np.hypot(loop[:, 0], loop[:, 1]), 0.5, atol=0.01)
+    _assert_connected(lines[0], max_step=0.05 * np.sqrt(2) + 1e-9)
+    # Grid points on the threshold are listed once (apart from the closing point)
+    assert len({tuple(p) for p in lines[0][:-1]}) == len(lines[0]) - 1
+
+
+def test_2d_boundary_crossing_the_grid_is_one_open_line():
+    x = np.linspace(0, 1, 11)
+    y = np.linspace(0, 1, 21)
+    X, Y = np.meshgrid(x, y, indexing="ij")
+    lines = failure_boundary(X + Y, [x, y], 1.0)   # passes through grid points exactly
+
+    assert len(lines) == 1
+    line = np.array(lines[0])
+    assert np.allclose(line.sum(axis=1), 1.0)
+    assert {tuple(line[0]), tuple(line[-1])} == {(0.0, 1.0), (1.0, 0.0)}
+    _assert_connected(lines[0], max_step=0.15)
+
+
+def test_sweep_returns_surface_and_boundary():
+    result = sweep_slope_stability(
+        BASE,
+        [{"feature": "cohesion", "start": 5, "stop": 50, "steps": 12},
+         {"feature": "slope_angle", "start": 20, "stop": 60, "steps": 9}],
+    )
+    assert np.array(result["unstable_probability"]).shape == (12, 9)
+    for line in result["failure_boundary"]:
+        assert all(len(point) == 2 for point in line)
+
+
+def test_oversized_grid_is_rejected_before_allocating(monkeypatch):
+    def no_linspace(*args, **kwargs):
+        raise AssertionError("grid allocated before the size check")
+
+    monkeypatch.setattr(np, "linspace", no_linspace)
+    huge = {"feature": "height", "start": 10, "stop": 80, "steps": 1_000_000_000}
+    with pytest.raises(ValueError, match="exceeds the limit"):
+        build_sweep_grid(BASE, [huge])
+    side = int(MAX_SWEEP_POINTS ** 0.5) + 1
+    with pytest.raises(ValueError, match="exceeds the limit"):
+        build_sweep_grid(BASE, [dict(huge, steps=side), dict(huge, feature="cohesion", steps=side)])
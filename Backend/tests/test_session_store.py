@@ -0,0 +1,42 @@
+import threading
+
+from Chatbot.session_store import SessionStore
+
+
+def test_history_is_a_snapshot_taken_without_holding_the_turn():
+    store = SessionStore(shards=2)
+    session = store.get("browser-a")
+    history = session.history()
+    # The lock is free between reading history and recording, so other turns are not blocked
+    assert not session.lock.locked()
+    store.record_turn(session, "hi", "hello")
+    assert history == []
+    assert [m["role"] for m in session.history()] == ["user", "model"]
+
+
+def test_concurrent_turns_of_one_user_are_all_recorded():
+    store = SessionStore(shards=2, token_budget=10 ** 6)
+    session = store.get("browser-a")
+    barrier = threading.Barrier(8)
+
+    def turn(i):
+        barrier.wait()
+        session.history()
+        store.record_turn(session, f"q{i}", f"a{i}")
+
+    threads = [threading.Thread(target=turn, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    texts = [m["parts"][0]["text"] for m in session.history()]
+    assert len(texts) == 16
+    # Each exchange stays together
+    assert all(texts[i][1:] == texts[i + 1][1:] for i in range(0, 16, 2))
+
+
+def test_users_get_separate_sessions():
+    store = SessionStore(shards=2)
+    store.record_turn(store.get("browser-a"), "a", "1")
+    assert store.get("browser-b").history() == []
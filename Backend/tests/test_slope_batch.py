@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from Master_LLM.ML_Models.Catboost.catboost import (
+    FEATURE_NAMES, BatchTooLargeError, build_feature_matrix, predict_slope_batch,
+)
+
+ROW = [40, 25, 32, 21, 38, 0.15, 20, 30, 0.2]
+
+
+def test_rows_and_columns_build_the_same_matrix():
+    columns = {name: [ROW[i]] * 3 for i, name in enumerate(FEATURE_NAMES)}
+    np.testing.assert_array_equal(build_feature_matrix(rows=[ROW] * 3), build_feature_matrix(columns=columns))
+
+
+def test_batch_over_the_row_limit_is_rejected():
+    with pytest.raises(BatchTooLargeError):
+        build_feature_matrix(rows=[ROW] * 11, max_rows=10)
+    with pytest.raises(BatchTooLargeError):
+        build_feature_matrix(columns={name: [ROW[i]] * 11 for i, name in enumerate(FEATURE_NAMES)}, max_rows=10)
+    assert build_feature_matrix(rows=[ROW] * 10, max_rows=10).shape == (10, len(FEATURE_NAMES))
+
+
+def test_batch_scores_every_row():
+    result = predict_slope_batch(build_feature_matrix(rows=[ROW] * 4))
+    assert result["count"] == 4
+    assert len(result["prediction_encoded"]) == 4
+    for column in result["probabilities"].values():
+        assert len(column) == 4
+
+
+@pytest.mark.parametrize("payload", [
+    {"rows": [ROW, ROW[:-1]]},
+    {"rows": [ROW[:-1] + [float("nan")]]},
+    {"columns": {**{name: [ROW[i]] for i, name in enumerate(FEATURE_NAMES)}, "depth": [1.0]}},
+    {"columns": {name: [ROW[i]] for i, name in enumerate(FEATURE_NAMES[:-1])}},
+    {},
+])
+def test_invalid_payloads_raise_value_error(payload):
+    # The route maps every ValueError (BatchTooLargeError included) to one 422 response
+    with pytest.raises(ValueError):
+        build_feature_matrix(**payload, max_rows=10)
+    assert issubclass(BatchTooLargeError, ValueError)
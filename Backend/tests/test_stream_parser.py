@@ -0,0 +1,61 @@
+import json
+
+from Chatbot.stream_parser import OutputStepParser, plan_round, reply_events
+
+
+def _stream(raw: str, chunk: int = 7):
+    parser = OutputStepParser()
+    for i in range(0, len(raw), chunk):
+        parser.feed(raw[i:i + chunk])
+    return parser
+
+
+def _streamed_reply(raw: str, final_round: bool):
+    """What the stream path leaves on screen, applying the events it yields."""
+    parser = _stream(raw)
+    actions, reply = plan_round("".join(parser.raw), final_round)
+    text = parser.reply
+    if actions:
+        return actions, None
+    for event, value in reply_events(text, reply):
+        text = "" if event == "reset" else text + value
+    return actions, text
+
+
+def test_output_before_action_runs_the_tools_on_both_paths():
+    raw = (json.dumps({"step": "output", "content": "It is sunny."})
+           + json.dumps({"step": "action", "function": "get_weather", "input": "Ranchi"}))
+    assert _stream(raw).reply == "It is sunny."   # previewed while streaming
+    streamed_actions, _ = _streamed_reply(raw, final_round=False)
+    actions, reply = plan_round(raw, final_round=False)
+    assert reply is None
+    assert streamed_actions == actions == [{"step": "action", "function": "get_weather", "input": "Ranchi"}]
+
+
+def test_final_round_with_action_and_output_replies_with_the_output():
+    raw = (json.dumps({"step": "action", "function": "get_weather", "input": "Ranchi"})
+           + json.dumps({"step": "output", "content": "Ranchi is 31°C."}))
+    assert plan_round(raw, final_round=True) == ([], "Ranchi is 31°C.")
+    assert _streamed_reply(raw, final_round=True) == ([], "Ranchi is 31°C.")
+
+
+def test_stream_matches_non_stream_reply():
+    for raw in [
+        json.dumps({"step": "output", "content": "All clear."}),
+        json.dumps({"step": "ask_user", "question": "Which mine?"}),
+        "Plain text answer",
+        json.dumps({"content": "late step key", "step": "output"}),
+    ]:
+        assert _streamed_reply(raw, final_round=False)[1] == plan_round(raw, final_round=False)[1]
+
+
+def test_action_with_dict_input_is_kept():
+    step = {"step": "action", "function": "find_nearby_mines", "input": {"lat": 23.4, "lon": 85.3}}
+    parser = _stream(json.dumps(step), chunk=3)
+    assert parser.actions == [step]
+
+
+def test_reply_events():
+    assert reply_events("Hel", "Hello") == [("delta", "lo")]
+    assert reply_events("Hello", "Hello") == []
+    assert reply_events("guess", "answer") == [("reset", ""), ("delta", "answer")]
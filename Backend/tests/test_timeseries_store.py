@@ -0,0 +1,84 @@
+import threading
+import numpy as np
+
+from Realtime_API import timeseries_store
+from Realtime_API.timeseries_store import MineSeries, TimeSeriesStore, SAMPLE_DTYPE
+
+
+def _payload(value):
+    return {"temperature_C": value}
+
+
+def test_partial_trailing_record_is_ignored(tmp_path):
+    path = tmp_path / "mine_1.bin"
+    rows = np.zeros(3, dtype=SAMPLE_DTYPE)
+    rows["t"] = [0.0, 100.0, 200.0]
+    rows.tofile(path)
+    with open(path, "ab") as f:
+        f.write(b"\x00" * 5)   # write interrupted mid-record
+
+    series = MineSeries(str(path), capacity=8)
+    # Nothing is read or cut until load() runs off the event loop
+    assert series.last_t is None
+    assert path.stat().st_size == 3 * SAMPLE_DTYPE.itemsize + 5
+    series.load()
+    assert series.last_t == 200.0
+    assert path.stat().st_size == 3 * SAMPLE_DTYPE.itemsize
+    series.append(300.0, _payload(1.0))
+    series.flush()
+    assert list(series.range(0, 1000)["t"]) == [0.0, 100.0, 200.0, 300.0]
+
+
+def test_filling_ring_is_flushed_off_the_calling_thread(tmp_path, monkeypatch):
+    store = TimeSeriesStore(directory=str(tmp_path), capacity=4, flush_interval=0)
+    caller = threading.current_thread()
+    flushed_on = []
+    series = store.series(1)
+    flush = series.flush
+    monkeypatch.setattr(series, "flush", lambda: flushed_on.append(threading.current_thread()) or flush())
+
+    for i in range(2):
+        store.record(1, _payload(float(i)), t=i * 100.0)
+    store._flusher.shutdown(wait=True)
+
+    assert flushed_on and caller not in flushed_on
+    assert series.stats()["on_disk"] == 2
+    assert series.stats()["unflushed"] == 0
+
+
+def test_full_ring_drops_oldest_instead_of_writing(tmp_path):
+    series = MineSeries(str(tmp_path / "mine_2.bin"), capacity=2)
+    for i in range(3):
+        series.append(i * 100.0, _payload(float(i)))
+    assert series.dropped == 1
+    assert series.flush() == 2
+    assert list(series.range(0, 1000)["t"]) == [100.0, 200.0]
+
+
+def test_ring_starts_small_and_grows_to_capacity(tmp_path, monkeypatch):
+    monkeypatch.setattr(timeseries_store, "TIMESERIES_RING_INITIAL", 4)
+    series = MineSeries(str(tmp_path / "mine_3.bin"), capacity=20)
+    assert series._ring.size == 4
+    for i in range(25):
+        series.append(i * 100.0, _payload(float(i)))
+    assert series._ring.size == 20
+    assert list(series.range(0, 10000)["t"]) == [i * 100.0 for i in range(5, 25)]
+    assert series.dropped == 5
+
+
+def test_new_series_loads_its_file_off_the_calling_thread(tmp_path, monkeypatch):
+    rows = np.zeros(1, dtype=SAMPLE_DTYPE)
+    rows["t"] = [500.0]
+    rows.tofile(tmp_path / "mine_4.bin")
+    caller = threading.current_thread()
+    loaded_on = []
+    load = MineSeries.load
+    monkeypatch.setattr(MineSeries, "load", lambda self: loaded_on.append(threading.current_thread()) or load(self))
+
+    store = TimeSeriesStore(directory=str(tmp_path), capacity=8, flush_interval=0)
+    store.series(4)
+    store._flusher.shutdown(wait=True)
+
+    assert loaded_on and caller not in loaded_on
+    assert store.series(4).last_t == 500.0
+    assert not store.record(4, _payload(1.0), t=510.0)
@@ -0,0 +1,50 @@
+import pytest
+
+from Master_LLM.ML_Models.Catboost.uncertainty import (
+    HISTOGRAM_BINS, MAX_SAMPLES, monte_carlo_slope_stability,
+)
+
+BASE = {
+    "height": 40, "cohesion": 25, "friction_angle": 32, "unit_weight": 21, "slope_angle": 38,
+    "water_depth_ratio": 0.15, "rainfall_mm_7d": 20, "temperature_c": 30, "vibrations_ms2": 0.2,
+}
+
+
+def _without_timing(result):
+    return {k: v for k, v in result.items() if k != "elapsed_ms"}
+
+
+def test_seeded_result_does_not_depend_on_chunk_size():
+    runs = [
+        _without_timing(monte_carlo_slope_stability(BASE, n_samples=3000, chunk_size=size, seed=7))
+        for size in (1000, 257, 3000)
+    ]
+    first = runs[0]
+    for run in runs[1:]:
+        # Same samples; running sums only differ in float summation order
+        assert run["unstable_probability"]["percentiles"] == first["unstable_probability"]["percentiles"]
+        assert run["exceedance_probability"] == first["exceedance_probability"]
+        assert run["predicted_class_frequency"] == first["predicted_class_frequency"]
+        assert run["unstable_probability"]["mean"] == pytest.approx(first["unstable_probability"]["mean"], rel=1e-12)
+        assert run["unstable_probability"]["std"] == pytest.approx(first["unstable_probability"]["std"], rel=1e-9)
+        assert run["mean_class_probabilities"] == pytest.approx(first["mean_class_probabilities"], rel=1e-12)
+
+
+def test_degenerate_distribution_percentiles_and_exceedance():
+    # No uncertain inputs: every sample is the base row
+    result = monte_carlo_slope_stability(BASE, distributions={}, n_samples=500, seed=1)
+    p = result["unstable_probability"]["mean"]
+    assert result["unstable_probability"]["std"] == pytest.approx(0.0, abs=1e-6)
+    for value in result["unstable_probability"]["percentiles"].values():
+        assert value == pytest.approx(p, abs=1.0 / HISTOGRAM_BINS)
+
+    below = monte_carlo_slope_stability(BASE, distributions={}, n_samples=50, threshold=p - 1e-3)
+    above = monte_carlo_slope_stability(BASE, distributions={}, n_samples=50, threshold=p + 1e-3)
+    assert below["exceedance_probability"] == 1.0
+    assert above["exceedance_probability"] == 0.0
+
+
+@pytest.mark.parametrize("n_samples", [0, -5, MAX_SAMPLES + 1])
+def test_n_samples_out_of_range_is_rejected(n_samples):
+    with pytest.raises(ValueError, match="n_samples"):
+        monte_carlo_slope_stability(BASE, n_samples=n_samples)
@@ -27,6 +27,20 @@ interface Message {
   isLoading?: boolean;
 }
 
+// Chat history is kept per user_id on the server, so each browser gets its own id
+const CHAT_USER_ID_KEY = 'chatUserId';
+
+const getChatUserId = () => {
+  let id = localStorage.getItem(CHAT_USER_ID_KEY);
+  if (!id) {
+    id = typeof crypto !== 'undefined' && 'randomUUID' in crypto
+      ? crypto.randomUUID()
+      : `user-${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+    localStorage.setItem(CHAT_USER_ID_KEY, id);
+  }
+  return id;
+};
+
 export const Chatbot = () => {
   const [messages, setMessages] = useState<Message[]>([
     {
@@ -78,27 +92,66 @@ export const Chatbot = () => {
     try {
       const payload = { 
         user_query: inputMessage,
-        user_id: "dashboard_user"
+        user_id: getChatUserId()
       };
 
-      const response = await fetch('http://localhost:8000/chat', {
+      // Streamed reply: "delta" events append text, "reset" clears it, "done" carries the full reply
+      const response = await fetch('http://localhost:8000/chat/stream', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify(payload)
       });
 
-      if (!response.ok) throw new Error('Failed to get response from server');
+      if (!response.ok || !response.body) throw new Error('Failed to get response from server');
 
-      const data = await response.json();
-
-      const botResponse: Message = {
-        id: messages.length + 3,
-        text: data.response || "I couldn't process your request. Please try again.",
-        sender: 'bot',
-        timestamp: new Date()
+      const showBotText = (text: string, done: boolean) => {
+        const botResponse: Message = {
+          id: messages.length + 3,
+          text,
+          sender: 'bot',
+          timestamp: new Date(),
+          isLoading: !done && !text
+        };
+        setMessages(prev => prev.slice(0, -1).concat(botResponse));
       };
 
-      setMessages(prev => prev.slice(0, -1).concat(botResponse));
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      let replyText = '';
+      let finished = false;
+
+      while (!finished) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) >= 0) {
+          const block = buffer.slice(0, boundary);
+          buffer = buffer.slice(boundary + 2);
+          const event = block.match(/^event: (.*)$/m)?.[1];
+          const dataLine = block.match(/^data: (.*)$/m)?.[1];
+          if (!event || !dataLine) continue;
+          const data = JSON.parse(dataLine);
+
+          if (event === 'delta') {
+            replyText += data.text;
+            showBotText(replyText, false);
+          } else if (event === 'reset') {
+            replyText = '';
+            showBotText(replyText, false);
+          } else if (event === 'done') {
+            replyText = data.response || replyText;
+            finished = true;
+          } else if (event === 'error') {
+            replyText = data.error;
+            finished = true;
+          }
+        }
+      }
+
+      showBotText(replyText || "I couldn't process your request. Please try again.", true);
       
     } catch (error) {
       console.error('Error:', error);
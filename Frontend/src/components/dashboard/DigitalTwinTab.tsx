@@ -150,11 +150,20 @@ export const DigitalTwinTab = () => {
     }
   };
 
-  // Auto-update realtime data when location changes
+  // Live realtime data for the selected mine, pushed by the backend prefetcher
   useEffect(() => {
-    if (selectedLocation) {
-      fetchRealtimeData();
-    }
+    if (!selectedLocation) return;
+
+    const url = new URL("http://localhost:8000/realtimedata/stream");
+    url.searchParams.set("mine_ids", selectedLocation);
+    const source = new EventSource(url.toString());
+    source.addEventListener("weather", (event) => {
+      const { data } = JSON.parse((event as MessageEvent).data);
+      setRealtimeWeather(data);
+    });
+    source.onerror = () => console.error('Realtime stream interrupted, reconnecting...');
+
+    return () => source.close();
   }, [selectedLocation]);
 
   return (
@@ -68,11 +68,20 @@ export const PINNTab = () => {
     }
   };
 
-  // Auto-update weather data when location changes
+  // Live weather data for the selected mine, pushed by the backend prefetcher
   useEffect(() => {
-    if (selectedLocation) {
-      updateWeatherData();
-    }
+    if (!selectedLocation) return;
+
+    const url = new URL('http://localhost:8000/realtimedata/stream');
+    url.searchParams.set('mine_ids', selectedLocation);
+    const source = new EventSource(url.toString());
+    source.addEventListener('weather', (event) => {
+      const { data } = JSON.parse((event as MessageEvent).data);
+      setRealtimeWeather(data);
+    });
+    source.onerror = () => console.error('Weather stream interrupted, reconnecting...');
+
+    return () => source.close();
   }, [selectedLocation]);
 
   // Listen for auto-analysis trigger from Overview tab